@@ -1,4 +1,5 @@
 import pytest
+from django.core.cache import cache
 
 pytest_plugins = (
     'tests.factories.fixtures',
@@ -9,3 +10,10 @@ pytest_plugins = (
 def init_database(db):
     """Init database for all tests."""
     return db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Clear cache for all tests."""
+    yield
+    cache.clear()
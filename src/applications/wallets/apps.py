@@ -6,3 +6,17 @@ class WalletsConfig(AppConfig):
     """Custom configuration for wallets app."""
     name = 'applications.wallets'
     verbose_name = _('wallets')
+
+    def ready(self):
+        """Count changes of wallets for conditional list requests."""
+        from django.core.checks import register
+        from django.db.models.signals import post_delete, post_save
+
+        from applications.wallets.changes import bump_wallet_changes_on_signal
+        from applications.wallets.checks import \
+            check_wallet_list_conditional_get
+        from applications.wallets.models import Wallet
+
+        register(check_wallet_list_conditional_get)
+        post_save.connect(bump_wallet_changes_on_signal, sender=Wallet)
+        post_delete.connect(bump_wallet_changes_on_signal, sender=Wallet)
@@ -0,0 +1,194 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import QuerySet
+from web3 import Web3
+from web3.types import BlockIdentifier, RPCEndpoint
+
+from main.w3 import batch_request, get_w3
+
+BLOCK_NUMBER_CACHE_KEY = 'wallets:block-number'
+
+
+def get_balances(
+    addresses: Union[QuerySet, Iterable[str]],
+) -> Dict[str, int]:
+    """Get balances (wei) of addresses or wallets at the latest block.
+
+    Balances are cached per block, so repeated reads within one block make
+    no RPC. Missing ones are fetched with fetch_balances(). Addresses
+    touched by our transactions are read at the pending block and are not
+    cached until invalidate_balances() forgets them.
+    """
+    if isinstance(addresses, QuerySet):
+        addresses = addresses.values_list('address', flat=True)
+    addresses = list(dict.fromkeys(addresses))
+    if not addresses:
+        return {}
+    w3 = get_w3()
+    block_number = get_block_number(w3)
+    keys = {
+        address: _get_balance_key(block_number, address)
+        for address in addresses
+    }
+    touched_keys = {
+        address: _get_touched_key(address) for address in addresses
+    }
+    balances = cache.get_many([*keys.values(), *touched_keys.values()])
+    missing_addresses = [
+        address for address in addresses if keys[address] not in balances
+    ]
+    touched_addresses = [
+        address for address in missing_addresses
+        if touched_keys[address] in balances
+    ]
+    missing_addresses = [
+        address for address in missing_addresses
+        if touched_keys[address] not in balances
+    ]
+    if missing_addresses:
+        fetched = {
+            keys[address]: balance
+            for address, balance in fetch_balances(
+                missing_addresses,
+                hex(block_number),
+            ).items()
+        }
+        cache.set_many(fetched, settings.WALLET_BALANCE_CACHE_TTL)
+        balances.update(fetched)
+    if touched_addresses:
+        balances.update({
+            keys[address]: balance
+            for address, balance in fetch_balances(
+                touched_addresses,
+                'pending',
+            ).items()
+        })
+    return {address: balances[keys[address]] for address in addresses}
+
+
+def fetch_balances(
+    addresses: List[str],
+    block_identifier: BlockIdentifier = 'latest',
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> Dict[str, int]:
+    """Get balances (wei) of addresses from the node, bypassing cache."""
+    results = _fetch_per_address(
+        addresses,
+        lambda address: [('eth_getBalance', [address, block_identifier])],
+        batch_size,
+        concurrency,
+    )
+    return {address: balance for address, (balance,) in results.items()}
+
+
+def fetch_account_states(
+    addresses: List[str],
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> Dict[str, Tuple[int, int]]:
+    """Get latest balances (wei) and pending nonces from the node."""
+    results = _fetch_per_address(
+        addresses,
+        lambda address: [
+            ('eth_getBalance', [address, 'latest']),
+            ('eth_getTransactionCount', [address, 'pending']),
+        ],
+        batch_size,
+        concurrency,
+    )
+    return {
+        address: (balance, nonce)
+        for address, (balance, nonce) in results.items()
+    }
+
+
+def get_block_number(w3: Web3) -> int:
+    """Get latest block number, it is asked from the node once per TTL."""
+    block_number = cache.get(BLOCK_NUMBER_CACHE_KEY)
+    if block_number is None:
+        block_number = w3.eth.block_number
+        cache.set(
+            BLOCK_NUMBER_CACHE_KEY,
+            block_number,
+            settings.WALLET_BALANCE_BLOCK_TTL,
+        )
+    return block_number
+
+
+def invalidate_balances(addresses: Iterable[str]) -> None:
+    """Drop cached balances of addresses touched by our transactions.
+
+    The cached block does not include the transactions yet, so balances of
+    the addresses are read at the pending block for
+    WALLET_BALANCE_CACHE_TTL seconds.
+    """
+    addresses = list(addresses)
+    block_number = cache.get(BLOCK_NUMBER_CACHE_KEY)
+    if block_number is not None:
+        cache.delete_many([
+            _get_balance_key(block_number, address) for address in addresses
+        ])
+    cache.set_many(
+        {_get_touched_key(address): True for address in addresses},
+        settings.WALLET_BALANCE_CACHE_TTL,
+    )
+
+
+def _get_balance_key(block_number: int, address: str) -> str:
+    """Get cache key of address balance at block."""
+    return f'wallets:balance:{block_number}:{address.lower()}'
+
+
+def _get_touched_key(address: str) -> str:
+    """Get cache key marking address touched by our transaction."""
+    return f'wallets:balance-touched:{address.lower()}'
+
+
+def _fetch_per_address(
+    addresses: List[str],
+    get_calls: Callable[[str], List[Tuple[RPCEndpoint, List[Any]]]],
+    batch_size: Optional[int],
+    concurrency: Optional[int],
+) -> Dict[str, List[int]]:
+    """Make JSON-RPC calls of every address and get integer results.
+
+    Addresses are split into JSON-RPC batches of batch_size, at most
+    concurrency batches are in flight at once.
+    """
+    batch_size = batch_size or settings.WALLET_BALANCE_BATCH_SIZE
+    concurrency = concurrency or settings.WALLET_BALANCE_CONCURRENCY
+    w3 = get_w3()
+    batches = [
+        addresses[start:start + batch_size]
+        for start in range(0, len(addresses), batch_size)
+    ]
+
+    def fetch_batch(batch: List[str]) -> Dict[str, List[int]]:
+        calls = [get_calls(address) for address in batch]
+        results = iter(batch_request(w3, list(chain.from_iterable(calls))))
+        return {
+            address: [
+                Web3.toInt(hexstr=next(results)) for _ in address_calls
+            ]
+            for address, address_calls in zip(batch, calls)
+        }
+
+    fetched: Dict[str, List[int]] = {}
+    if len(batches) == 1 or concurrency == 1:
+        for batch_results in map(fetch_batch, batches):
+            fetched.update(batch_results)
+        return fetched
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(copy_context().run, fetch_batch, batch)
+            for batch in batches
+        ]
+        for future in futures:
+            fetched.update(future.result())
+    return fetched
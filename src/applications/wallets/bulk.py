@@ -0,0 +1,117 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+
+from applications.wallets.changes import bump_wallet_changes
+from applications.wallets.keys import derive_address, derive_addresses
+from applications.wallets.models import (Wallet, WalletSecret,
+                                         get_encryptor_class)
+
+
+def create_wallets(
+    private_keys: Sequence[str],
+    currency: str,
+) -> Iterator[List[Wallet]]:
+    """Create wallets for private keys, yield them batch by batch.
+
+    Addresses are derived by a process pool ahead of the inserts, each
+    batch is encrypted in one pass and written with one INSERT. Wallets
+    whose address is already stored for currency are skipped.
+    """
+    batch_size = settings.WALLET_BULK_CREATE_BATCH_SIZE
+    processes = settings.WALLET_BULK_CREATE_PROCESSES or os.cpu_count() or 1
+    if processes == 1 or len(private_keys) <= batch_size:
+        addresses = map(derive_address, private_keys)
+        yield from _create_batches(private_keys, addresses, currency)
+        return
+    chunk_size = max(1, batch_size // processes)
+    chunks = (
+        private_keys[start:start + chunk_size]
+        for start in range(0, len(private_keys), chunk_size)
+    )
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        addresses = chain.from_iterable(
+            executor.map(derive_addresses, chunks),
+        )
+        yield from _create_batches(private_keys, addresses, currency)
+
+
+def _create_batches(
+    private_keys: Iterable[str],
+    addresses: Iterable[str],
+    currency: str,
+) -> Iterator[List[Wallet]]:
+    """Write wallets with configured batch size."""
+    batch_size = settings.WALLET_BULK_CREATE_BATCH_SIZE
+    pairs = zip(private_keys, addresses)
+    batch = list(islice(pairs, batch_size))
+    while batch:
+        yield _create_batch(batch, currency)
+        batch = list(islice(pairs, batch_size))
+
+
+def _create_batch(
+    batch: List[Tuple[str, str]],
+    currency: str,
+) -> List[Wallet]:
+    """Encrypt private keys and insert one batch of wallets.
+
+    Known addresses are skipped before encryption. The check is repeated on
+    the primary right before the insert, and once more when a concurrent
+    request has inserted some of the addresses in between.
+    """
+    encryptor = get_encryptor_class(settings.WALLET_PRIVATE_KEY_ENCRYPTOR)
+    existing_addresses = _get_existing_addresses(
+        [address for _, address in batch],
+        currency,
+    )
+    wallets = [
+        Wallet(
+            private_key=WalletSecret(
+                encryptor.encrypt(private_key),
+                encryptor,
+            ),
+            address=address,
+            currency=currency,
+        )
+        for private_key, address in batch
+        if address not in existing_addresses
+    ]
+    try:
+        return _insert_wallets(wallets, currency)
+    except IntegrityError:
+        return _insert_wallets(wallets, currency)
+
+
+def _insert_wallets(wallets: List[Wallet], currency: str) -> List[Wallet]:
+    """Insert wallets whose addresses are not stored on the primary."""
+    with transaction.atomic():
+        existing_addresses = _get_existing_addresses(
+            [wallet.address for wallet in wallets],
+            currency,
+            using=DEFAULT_DB_ALIAS,
+        )
+        wallets = Wallet.objects.bulk_create([
+            wallet for wallet in wallets
+            if wallet.address not in existing_addresses
+        ])
+        bump_wallet_changes()
+    return wallets
+
+
+def _get_existing_addresses(
+    addresses: List[str],
+    currency: str,
+    using: Optional[str] = None,
+) -> Set[str]:
+    """Get addresses of currency which are stored already."""
+    return set(
+        Wallet.objects.using(using).filter(
+            currency=currency,
+            address__in=addresses,
+        ).values_list('address', flat=True),
+    )
@@ -0,0 +1,66 @@
+"""Counter of wallet changes for conditional requests of the wallet list.
+
+The counter and the time of the last change are kept in the default cache,
+which must be shared by all processes (see WALLET_LIST_CONDITIONAL_GET).
+"""
+import time
+from typing import Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+CHANGES_CACHE_KEY = 'wallets:changes'
+CHANGED_AT_CACHE_KEY = 'wallets:changed_at'
+MAX_ID_CACHE_KEY = 'wallets:max_id'
+
+
+def get_wallet_changes(max_id: Optional[int]) -> Tuple[int, Optional[int]]:
+    """Get change counter and time (unix seconds) of the last change.
+
+    max_id is the greatest wallet id in the primary database. When it
+    differs from the one seen before, wallets were written without
+    bump_wallet_changes() or the counter was lost, and it is counted as a
+    change.
+
+    The time is None while the last change is in the current second: more
+    changes may follow within it, and a client given that second as
+    Last-Modified would miss them.
+    """
+    max_id = max_id or 0
+    keys = (CHANGES_CACHE_KEY, CHANGED_AT_CACHE_KEY, MAX_ID_CACHE_KEY)
+    values = cache.get_many(keys)
+    if len(values) < len(keys) or values[MAX_ID_CACHE_KEY] != max_id:
+        _bump_wallet_changes(max_id)
+        values = cache.get_many(keys)
+    now = int(time.time())
+    changed_at = values.get(CHANGED_AT_CACHE_KEY, now)
+    return (
+        values.get(CHANGES_CACHE_KEY, 0),
+        changed_at if changed_at < now else None,
+    )
+
+
+def bump_wallet_changes() -> None:
+    """Count change of wallets once the current transaction is committed.
+
+    Readers which see the new counter see the committed wallets too.
+    """
+    transaction.on_commit(_bump_wallet_changes)
+
+
+def _bump_wallet_changes(max_id: Optional[int] = None) -> None:
+    """Count change of wallets, remember max_id seen if it is known."""
+    try:
+        cache.incr(CHANGES_CACHE_KEY)
+    except ValueError:
+        # A lost counter starts from the clock, so it does not repeat
+        # values of ETags made before.
+        cache.add(CHANGES_CACHE_KEY, time.time_ns(), timeout=None)
+    cache.set(CHANGED_AT_CACHE_KEY, int(time.time()), timeout=None)
+    if max_id is not None:
+        cache.set(MAX_ID_CACHE_KEY, max_id, timeout=None)
+
+
+def bump_wallet_changes_on_signal(**kwargs) -> None:
+    """Count change of a saved or deleted wallet."""
+    bump_wallet_changes()
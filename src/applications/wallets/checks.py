@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.checks import Warning
+
+
+def check_wallet_list_conditional_get(app_configs, **kwargs):
+    """Warn that conditional wallet list requests are off."""
+    if settings.WALLET_LIST_CONDITIONAL_GET:
+        return []
+    return [Warning(
+        'ETag, Last-Modified and the page cache of the wallet list are off.',
+        hint=(
+            'Set CACHE_URL to a cache shared by all processes, e.g. '
+            'redis://, instead of locmemcache:// or dummycache://.'
+        ),
+        id='wallets.W001',
+    )]
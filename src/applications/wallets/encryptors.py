@@ -1,32 +1,168 @@
-from cryptography.fernet import Fernet
+import base64
+import os
+import time
+from functools import lru_cache, wraps
+from typing import Any, Callable, Tuple
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, MultiFernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from django.conf import settings
+from eth_utils import decode_hex
+
+from main.costs import get_request_costs, record_cost
+from main.metrics import SECRET_ERRORS, SECRET_OPERATIONS, metrics_enabled
+
+# First byte of AES-GCM secrets. Fernet tokens are stored as base64 text and
+# always start with b'g', so both formats can be kept in one column.
+AES_GCM_VERSION = b'\x01'
+AES_GCM_NONCE_SIZE = 12
+
+
+def counted(operation: str) -> Callable:
+    """Count encryptor classmethod calls in metrics and request costs."""
+
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(cls, value: Any) -> Any:
+            record_metrics = metrics_enabled()
+            if not record_metrics and get_request_costs() is None:
+                return method(cls, value)
+            if record_metrics:
+                SECRET_OPERATIONS.inc(cls.__name__, operation)
+            started = time.perf_counter()
+            try:
+                return method(cls, value)
+            except Exception:
+                if record_metrics:
+                    SECRET_ERRORS.inc(cls.__name__, operation)
+                raise
+            finally:
+                record_cost('crypto', started)
+
+        return wrapper
+
+    return decorator
 
 
 class WalletSecretEncryptorInterface(object):
     """Type interface for the Wallet's private_key encryptors."""
 
     @classmethod
-    def encrypt(cls, private_key: str) -> str:
+    def encrypt(cls, private_key: str) -> bytes:
         """Encrypt private key."""
         raise NotImplementedError
 
     @classmethod
-    def decrypt(cls, value_from_db: str) -> str:
+    def decrypt(cls, value_from_db: bytes) -> str:
         """Decrypt private_key."""
         raise NotImplementedError
 
+    @classmethod
+    def rotate(cls, value_from_db: bytes) -> bytes:
+        """Re-encrypt private_key with the newest key."""
+        raise NotImplementedError
+
 
 class WalletSecretFernetEncryptor(WalletSecretEncryptorInterface):
-    """Encrypt and decrypt Wallet.private_key with Fernet."""
+    """Encrypt and decrypt Wallet.private_key with Fernet.
+
+    settings.FERNET_KEYS may hold several keys, newest first: tokens are
+    always encrypted with the first one and decrypted with any of them.
+    """
 
     @classmethod
-    def encrypt(cls, private_key: str) -> str:
+    @counted('encrypt')
+    def encrypt(cls, private_key: str) -> bytes:
         """Encrypt private key."""
-        fernet = Fernet(settings.FERNET_KEY)
-        return fernet.encrypt(private_key.encode()).decode()
+        return get_fernet().encrypt(private_key.encode())
 
     @classmethod
-    def decrypt(cls, value_from_db: str) -> str:
+    @counted('decrypt')
+    def decrypt(cls, value_from_db: bytes) -> str:
         """Decrypt private_key."""
-        fernet = Fernet(settings.FERNET_KEY)
-        return fernet.decrypt(value_from_db.encode()).decode()
+        return get_fernet().decrypt(value_from_db).decode()
+
+    @classmethod
+    @counted('rotate')
+    def rotate(cls, value_from_db: bytes) -> bytes:
+        """Re-encrypt private_key with the newest key."""
+        return get_fernet().rotate(value_from_db)
+
+
+class WalletSecretAESGCMEncryptor(WalletSecretEncryptorInterface):
+    """Encrypt and decrypt Wallet.private_key with AES-256-GCM.
+
+    A secret is the version byte, 12 bytes nonce and the encrypted 32 bytes
+    of the key with 16 bytes tag, 61 bytes in total. settings.AES_GCM_KEYS
+    hold several keys, newest first, like settings.FERNET_KEYS. Fernet
+    tokens are still decrypted and are converted by rotate().
+    """
+
+    @classmethod
+    @counted('encrypt')
+    def encrypt(cls, private_key: str) -> bytes:
+        """Encrypt private key."""
+        return _aes_gcm_encrypt(private_key)
+
+    @classmethod
+    @counted('decrypt')
+    def decrypt(cls, value_from_db: bytes) -> str:
+        """Decrypt private_key."""
+        return _aes_gcm_decrypt(value_from_db)
+
+    @classmethod
+    @counted('rotate')
+    def rotate(cls, value_from_db: bytes) -> bytes:
+        """Re-encrypt private_key with the newest key in AES-GCM format."""
+        return _aes_gcm_encrypt(_aes_gcm_decrypt(value_from_db))
+
+
+def get_fernet() -> MultiFernet:
+    """Return process-wide cipher for the currently configured keys."""
+    keys = tuple(settings.FERNET_KEYS or (settings.FERNET_KEY,))
+    return _build_fernet(keys)
+
+
+@lru_cache(maxsize=1)
+def _build_fernet(keys: Tuple[str, ...]) -> MultiFernet:
+    """Build cipher once per set of keys."""
+    return MultiFernet([Fernet(key) for key in keys])
+
+
+def get_aes_gcm_ciphers() -> Tuple[AESGCM, ...]:
+    """Return process-wide AES-GCM ciphers, newest key first."""
+    return _build_aes_gcm_ciphers(tuple(settings.AES_GCM_KEYS))
+
+
+@lru_cache(maxsize=1)
+def _build_aes_gcm_ciphers(keys: Tuple[str, ...]) -> Tuple[AESGCM, ...]:
+    """Build ciphers once per set of urlsafe base64 keys."""
+    if not keys:
+        raise ValueError('settings.AES_GCM_KEYS is empty.')
+    return tuple(AESGCM(base64.urlsafe_b64decode(key)) for key in keys)
+
+
+def _aes_gcm_encrypt(private_key: str) -> bytes:
+    """Encrypt private key with the newest AES-GCM key."""
+    nonce = os.urandom(AES_GCM_NONCE_SIZE)
+    return AES_GCM_VERSION + nonce + get_aes_gcm_ciphers()[0].encrypt(
+        nonce,
+        decode_hex(private_key),
+        AES_GCM_VERSION,
+    )
+
+
+def _aes_gcm_decrypt(value_from_db: bytes) -> str:
+    """Decrypt AES-GCM secret or Fernet token."""
+    if value_from_db[:1] != AES_GCM_VERSION:
+        return get_fernet().decrypt(value_from_db).decode()
+    nonce = value_from_db[1:AES_GCM_NONCE_SIZE + 1]
+    ciphertext = value_from_db[AES_GCM_NONCE_SIZE + 1:]
+    for cipher in get_aes_gcm_ciphers():
+        try:
+            private_key = cipher.decrypt(nonce, ciphertext, AES_GCM_VERSION)
+        except InvalidTag:
+            continue
+        return '0x' + private_key.hex()
+    raise InvalidTag('Secret is not encrypted with settings.AES_GCM_KEYS.')
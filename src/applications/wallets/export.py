@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+from typing import Callable, Dict, Iterable, Iterator, Sequence
+
+from django.db.models import QuerySet
+
+EXPORT_FIELDS = ('address', 'currency')
+
+
+def export_wallets(
+    queryset: QuerySet,
+    export_format: str,
+    chunk_size: int,
+) -> Iterator[str]:
+    """Render wallets in export format chunk by chunk.
+
+    Rows are streamed from the database as tuples, so neither model
+    instances nor decrypted secrets are created and memory use does not
+    depend on the number of wallets.
+    """
+    rows = queryset.order_by('id').values_list(*EXPORT_FIELDS).iterator(
+        chunk_size=chunk_size,
+    )
+    render = EXPORT_RENDERERS[export_format]
+    buffer = []
+    for line in render(rows):
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def render_ndjson(rows: Iterable[Sequence[str]]) -> Iterator[str]:
+    """Render rows as newline delimited JSON."""
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+
+def render_csv(rows: Iterable[Sequence[str]]) -> Iterator[str]:
+    """Render rows as CSV with header."""
+    line = io.StringIO()
+    writer = csv.writer(line)
+    for row in _with_header(rows):
+        writer.writerow(row)
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+
+
+def _with_header(rows: Iterable[Sequence[str]]) -> Iterator[Sequence[str]]:
+    """Prepend CSV header to rows."""
+    yield EXPORT_FIELDS
+    yield from rows
+
+
+EXPORT_RENDERERS: Dict[str, Callable[..., Iterator[str]]] = {
+    'ndjson': render_ndjson,
+    'csv': render_csv,
+}
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
@@ -0,0 +1,172 @@
+import logging
+import os
+import statistics
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+
+from main.w3 import get_w3
+
+logger = logging.getLogger(__name__)
+
+
+class Fees(NamedTuple):
+    """EIP-1559 fee estimates (wei)."""
+
+    max_fee_per_gas: int
+    max_priority_fee_per_gas: int
+    updated_at: float
+
+
+class FeeOracle(object):
+    """Refresh fee estimates from eth_feeHistory.
+
+    Estimates are refreshed in a background thread after start(), or on
+    demand by refresh_if_stale(). Readers get the last estimates from
+    memory without any RPC. Until the first refresh, or when estimates are
+    older than FEE_ORACLE_MAX_AGE, fees from ETHEREUM_TRANSACTIONS_DEFAULTS
+    are returned.
+    """
+
+    def __init__(self):
+        self.fees: Optional[Fees] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._refreshed_at: Optional[float] = None
+
+    def get_fees(self) -> Fees:
+        """Get last fee estimates."""
+        fees = self.fees
+        max_age = settings.FEE_ORACLE_MAX_AGE
+        if fees is None or time.monotonic() - fees.updated_at > max_age:
+            defaults = settings.ETHEREUM_TRANSACTIONS_DEFAULTS
+            return Fees(
+                max_fee_per_gas=defaults['maxFeePerGas'],
+                max_priority_fee_per_gas=defaults['maxPriorityFeePerGas'],
+                updated_at=time.monotonic(),
+            )
+        return fees
+
+    def refresh(self) -> Fees:
+        """Estimate fees from the history of recent blocks.
+
+        Max fee covers doubled base fee of the next block, so a transaction
+        stays includable through several blocks of rising base fee.
+        """
+        self._refreshed_at = time.monotonic()
+        fee_history = get_w3().eth.fee_history(
+            settings.FEE_ORACLE_BLOCK_COUNT,
+            'latest',
+            [settings.FEE_ORACLE_REWARD_PERCENTILE],
+        )
+        next_base_fee = fee_history['baseFeePerGas'][-1]
+        priority_fee = int(statistics.median(
+            rewards[0] for rewards in fee_history['reward']
+        ))
+        self.fees = Fees(
+            max_fee_per_gas=2 * next_base_fee + priority_fee,
+            max_priority_fee_per_gas=priority_fee,
+            updated_at=time.monotonic(),
+        )
+        return self.fees
+
+    def refresh_if_stale(self) -> None:
+        """Refresh fees at most once per FEE_ORACLE_INTERVAL seconds."""
+        refreshed_at = self._refreshed_at
+        interval = settings.FEE_ORACLE_INTERVAL
+        if refreshed_at is None or time.monotonic() - refreshed_at > interval:
+            self._try_refresh()
+
+    def start(self) -> None:
+        """Start refreshing fees in a daemon thread."""
+        self._thread = threading.Thread(
+            target=self._run,
+            name='fee-oracle',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop background refreshing."""
+        self._stopped.set()
+
+    def _run(self) -> None:
+        """Refresh fees every FEE_ORACLE_INTERVAL seconds."""
+        while not self._stopped.is_set():
+            self._try_refresh()
+            self._stopped.wait(settings.FEE_ORACLE_INTERVAL)
+
+    def _try_refresh(self) -> None:
+        """Refresh fees, keep previous estimates on errors."""
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception('Fee estimates refresh failed')
+
+
+_oracle: Optional[FeeOracle] = None
+_oracle_lock = threading.Lock()
+
+# Whether fees are refreshed in the background, set by server processes.
+# Forked workers inherit it and start their own oracle.
+_background = False
+
+
+def start_fee_oracle() -> None:
+    """Refresh fees in the background of this server process."""
+    global _background
+    _background = True
+    get_fee_oracle()
+
+
+def get_fee_oracle() -> FeeOracle:
+    """Get fee oracle of this process.
+
+    It is started on first use after start_fee_oracle() only.
+    """
+    global _oracle
+    if _oracle is None:
+        with _oracle_lock:
+            if _oracle is None:
+                oracle = FeeOracle()
+                if _background:
+                    oracle.start()
+                _oracle = oracle
+    return _oracle
+
+
+def get_fees() -> Fees:
+    """Get current fee estimates.
+
+    Server processes read them from memory. Management commands and other
+    processes without the background oracle refresh them on demand.
+    """
+    oracle = get_fee_oracle()
+    if not _background:
+        oracle.refresh_if_stale()
+    return oracle.get_fees()
+
+
+def reset_fee_oracle() -> None:
+    """Stop and drop fee oracle, it is started again on next use."""
+    global _oracle
+    oracle, _oracle = _oracle, None
+    if oracle is not None:
+        oracle.stop()
+
+
+def _reset_fee_oracle_after_fork() -> None:
+    """Drop fee oracle of the parent in a forked child.
+
+    Threads do not survive fork, so the oracle is not stopped and the
+    lock is replaced in case a parent thread held it.
+    """
+    global _oracle, _oracle_lock
+    _oracle = None
+    _oracle_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_fee_oracle_after_fork)
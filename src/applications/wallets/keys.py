@@ -0,0 +1,54 @@
+"""Wallet keys helpers.
+
+Addresses are derived locally from private keys by coincurve (libsecp256k1)
+without a Web3 client.
+
+The module does not depend on Django, so its functions can be run in
+worker processes.
+"""
+import secrets
+from typing import Any, Dict, Iterable, List, Tuple
+
+import coincurve
+from eth_account import Account
+from eth_utils import decode_hex, keccak, to_checksum_address
+
+
+def generate_private_key() -> str:
+    """Generate new ethereum private key."""
+    return '0x' + secrets.token_hex(32)
+
+
+def derive_address(private_key: str) -> str:
+    """Derive checksum ethereum address from private key."""
+    public_key = _get_public_key(decode_hex(private_key))
+    return to_checksum_address(keccak(public_key)[-20:])
+
+
+def derive_addresses(private_keys: Iterable[str]) -> List[str]:
+    """Derive checksum ethereum addresses from many private keys."""
+    return [derive_address(private_key) for private_key in private_keys]
+
+
+def sign_transactions(
+    transactions: Iterable[Tuple[Dict[str, Any], str]],
+) -> List[Tuple[bytes, str]]:
+    """Sign transactions with their private keys.
+
+    Raw transactions and their hashes are returned in the same order.
+    """
+    signed = []
+    for transaction, private_key in transactions:
+        signed_transaction = Account.sign_transaction(transaction, private_key)
+        signed.append((
+            bytes(signed_transaction.rawTransaction),
+            signed_transaction.hash.hex(),
+        ))
+    return signed
+
+
+def _get_public_key(private_key: bytes) -> bytes:
+    """Get 64 bytes of uncompressed public key."""
+    return coincurve.PublicKey.from_secret(private_key).format(
+        compressed=False,
+    )[1:]
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from applications.wallets.export import EXPORT_RENDERERS, export_wallets
+from applications.wallets.models import Wallet
+
+
+class Command(BaseCommand):
+    """Stream address and currency of all wallets to stdout."""
+
+    help = 'Stream address and currency of all wallets as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--output',
+            choices=tuple(EXPORT_RENDERERS),
+            default='ndjson',
+            help='Export format.',
+        )
+        parser.add_argument(
+            '--currency',
+            choices=Wallet.WalletCurrencyChoices.values,
+            help='Export wallets with this currency only.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.WALLET_EXPORT_CHUNK_SIZE,
+            help='Number of rows fetched from the database at once.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Write export chunk by chunk."""
+        queryset = Wallet.objects.all()
+        if options['currency']:
+            queryset = queryset.filter(currency=options['currency'])
+        chunks = export_wallets(
+            queryset,
+            options['output'],
+            options['chunk_size'],
+        )
+        for chunk in chunks:
+            self.stdout.write(chunk, ending='')
@@ -0,0 +1,52 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from applications.wallets.balances import fetch_balances
+from applications.wallets.models import Wallet
+
+
+class Command(BaseCommand):
+    """Print balances of all wallets with batched JSON-RPC."""
+
+    help = 'Print balances (wei) of all wallets as NDJSON.'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--currency',
+            choices=Wallet.WalletCurrencyChoices.values,
+            help='Read wallets with this currency only.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.WALLET_BALANCE_BATCH_SIZE,
+            help='Balances asked by one JSON-RPC batch.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.WALLET_BALANCE_CONCURRENCY,
+            help='Batches sent to the node at once.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Fetch and print balances."""
+        wallets = Wallet.objects.order_by('id')
+        if options['currency']:
+            wallets = wallets.filter(currency=options['currency'])
+        addresses = list(
+            dict.fromkeys(wallets.values_list('address', flat=True)),
+        )
+        balances = fetch_balances(
+            addresses,
+            batch_size=options['batch_size'],
+            concurrency=options['concurrency'],
+        )
+        for address, balance in balances.items():
+            self.stdout.write(
+                json.dumps({'address': address, 'balance': balance}),
+            )
+        self.stderr.write(f'Total: {sum(balances.values())} wei')
@@ -0,0 +1,187 @@
+import math
+import random
+import secrets
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+
+OPERATIONS = ('create', 'list', 'transfer')
+
+PERCENTILES = (50, 90, 99)
+
+
+class Command(BaseCommand):
+    """Send concurrent wallet traffic to a running service."""
+
+    help = (
+        'Run concurrent create, list and transfer requests against the '
+        'service and report throughput and latency percentiles.'
+    )
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--base-url',
+            default='http://127.0.0.1:8000',
+            help='Address of the running service.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Requests to send.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=10,
+            help='Requests in flight at once.',
+        )
+        parser.add_argument(
+            '--mix',
+            default='create=1,list=4,transfer=1',
+            help='Weights of operations.',
+        )
+        parser.add_argument(
+            '--wallets',
+            type=int,
+            default=10,
+            help='Wallets created before the run to transfer from.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Seed wallets, send traffic and print report."""
+        self.base_url = options['base_url'].rstrip('/')
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=options['concurrency'])
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.addresses: List[str] = []
+        self.addresses_lock = threading.Lock()
+
+        for _ in range(options['wallets']):
+            status_code, _ = self._create()
+            if status_code != 201:
+                raise CommandError(f'Wallet creation failed: {status_code}')
+
+        operations, weights = self._parse_mix(options['mix'])
+        plan = random.choices(operations, weights, k=options['requests'])
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(self._run, plan))
+        elapsed = time.perf_counter() - started
+        self._report(results, elapsed)
+
+    def _run(self, operation: str) -> Tuple[str, int, float]:
+        """Send one request, get operation, status code and latency."""
+        started = time.perf_counter()
+        try:
+            status_code, _ = getattr(self, f'_{operation}')()
+        except requests.RequestException:
+            status_code = 0
+        return operation, status_code, time.perf_counter() - started
+
+    def _create(self, remember: bool = True) -> Tuple[int, dict]:
+        """Create wallet and remember its address to transfer from."""
+        response = self.session.post(
+            self.base_url + reverse('wallets:wallets-list'),
+            json={},
+        )
+        data = response.json() if response.status_code == 201 else {}
+        if remember and 'address' in data:
+            with self.addresses_lock:
+                self.addresses.append(data['address'])
+        return response.status_code, data
+
+    def _list(self) -> Tuple[int, dict]:
+        """Get first page of wallets."""
+        response = self.session.get(
+            self.base_url + reverse('wallets:wallets-list'),
+        )
+        return response.status_code, {}
+
+    def _transfer(self) -> Tuple[int, dict]:
+        """Transfer balance of a known wallet to a random address.
+
+        Every wallet is drained by its transfer, so it is used once and a
+        new one is created when none are left.
+        """
+        with self.addresses_lock:
+            address = None
+            if self.addresses:
+                address = self.addresses.pop(
+                    random.randrange(len(self.addresses)),
+                )
+        if address is None:
+            status_code, data = self._create(remember=False)
+            if status_code != 201:
+                return status_code, {}
+            address = data['address']
+        response = self.session.post(
+            self.base_url + reverse('wallets:wallets-transfer'),
+            json={
+                '_from': address,
+                '_to': Web3.toChecksumAddress('0x' + secrets.token_hex(20)),
+                'currency': 'eth',
+            },
+        )
+        return response.status_code, {}
+
+    def _parse_mix(self, mix: str) -> Tuple[List[str], List[float]]:
+        """Parse operation weights like create=1,list=4,transfer=1."""
+        weights: Dict[str, float] = {}
+        for item in mix.split(','):
+            operation, _, weight = item.partition('=')
+            if operation not in OPERATIONS:
+                raise CommandError(f'Unknown operation {operation}')
+            try:
+                weights[operation] = float(weight)
+            except ValueError:
+                raise CommandError(f'Incorrect weight of {operation}')
+        return list(weights), list(weights.values())
+
+    def _report(
+        self,
+        results: List[Tuple[str, int, float]],
+        elapsed: float,
+    ) -> None:
+        """Print throughput and latency percentiles per operation."""
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        errors: Dict[str, int] = defaultdict(int)
+        for operation, status_code, latency in results:
+            latencies[operation].append(latency)
+            if not 200 <= status_code < 300:
+                errors[operation] += 1
+        self.stdout.write(
+            f'{len(results)} requests in {elapsed:.2f}s, '
+            f'{len(results) / elapsed:.1f} requests/s',
+        )
+        for operation in OPERATIONS:
+            if not latencies[operation]:
+                continue
+            values = sorted(latencies[operation])
+            percentiles = ', '.join(
+                f'p{percentile} '
+                f'{_get_percentile(values, percentile) * 1000:.1f}ms'
+                for percentile in PERCENTILES
+            )
+            self.stdout.write(
+                f'{operation}: {len(values)} requests, '
+                f'{errors[operation]} errors, '
+                f'{len(values) / elapsed:.1f} requests/s, {percentiles}, '
+                f'max {max(values) * 1000:.1f}ms',
+            )
+
+
+def _get_percentile(ordered_values: List[float], percentile: int) -> float:
+    """Get percentile of sorted values by nearest rank."""
+    rank = math.ceil(percentile / 100 * len(ordered_values))
+    return ordered_values[max(0, rank - 1)]
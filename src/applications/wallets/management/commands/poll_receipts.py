@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from applications.wallets.receipts import poll_receipts
+from main.w3 import get_w3
+
+
+class Command(BaseCommand):
+    """Update pending transactions with receipts once per new block."""
+
+    help = 'Poll receipts of pending transactions on every new block.'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Poll receipts once and exit.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.WALLET_RECEIPT_POLL_INTERVAL,
+            help='Seconds between checks for a new block.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.WALLET_RECEIPT_BATCH_SIZE,
+            help='Receipts asked by one JSON-RPC batch.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Poll receipts until interrupted.
+
+        Errors of the node are reported and the block is polled again.
+        """
+        last_block_number = None
+        while True:
+            try:
+                block_number = get_w3().eth.block_number
+                if block_number != last_block_number:
+                    finished = poll_receipts(options['batch_size'])
+                    last_block_number = block_number
+                    self.stdout.write(
+                        f'Block {block_number}: '
+                        f'{finished} transactions finished',
+                    )
+            except Exception as exc:
+                self.stderr.write(f'Polling receipts failed: {exc!r}')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from applications.wallets.models import Wallet, WalletSecret
+from applications.wallets.signers import get_signer_cache
+
+
+class Command(BaseCommand):
+    """Re-encrypt all Wallet.private_key values with the newest key.
+
+    WalletSecretAESGCMEncryptor converts Fernet tokens on the way.
+    """
+
+    help = 'Re-encrypt all Wallet.private_key values with the newest key.'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of wallets loaded and updated at once.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Rotate keys chunk by chunk."""
+        chunk_size = options['chunk_size']
+        queryset = Wallet.objects.only('id', 'private_key').order_by('id')
+        rotated = 0
+        chunk = []
+        for wallet in queryset.iterator(chunk_size=chunk_size):
+            wallet.private_key = self._rotate(wallet.private_key)
+            chunk.append(wallet)
+            if len(chunk) >= chunk_size:
+                rotated += self._update(chunk)
+                chunk = []
+        if chunk:
+            rotated += self._update(chunk)
+        self.stdout.write(f'Rotated {rotated} wallet keys.')
+
+    def _rotate(self, secret: WalletSecret) -> WalletSecret:
+        """Re-encrypt secret with the newest key.
+
+        The encryptor decrypts the key in memory to encrypt it again, the
+        plaintext is neither kept by the secret nor cached as a signer.
+        """
+        encryptor = secret.encryptor
+        rotated_value = encryptor.rotate(secret.encrypted_value)
+        return WalletSecret(rotated_value, encryptor)
+
+    def _update(self, wallets) -> int:
+        """Write one chunk of rotated wallets."""
+        with transaction.atomic():
+            Wallet.objects.bulk_update(wallets, ('private_key',))
+        get_signer_cache().invalidate(wallet.pk for wallet in wallets)
+        return len(wallets)
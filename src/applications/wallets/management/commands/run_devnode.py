@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from main.devnode import DevNode, DevNodeServer
+
+
+class Command(BaseCommand):
+    """Serve in-memory stand-in Ethereum node for local load tests."""
+
+    help = 'Run local JSON-RPC stand-in node, point W3_PROVIDER_URL at it.'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8545)
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.0,
+            help='Seconds every HTTP request is delayed by.',
+        )
+        parser.add_argument(
+            '--error-rate',
+            type=float,
+            default=0.0,
+            help='Share of JSON-RPC calls answered with an error.',
+        )
+        parser.add_argument(
+            '--balance',
+            type=int,
+            default=10 ** 20,
+            help='Balance (wei) of accounts unknown to the node.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Serve until interrupted."""
+        node = DevNode(
+            default_balance=options['balance'],
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+        )
+        server = DevNodeServer((options['host'], options['port']), node)
+        self.stdout.write(
+            f'Serving JSON-RPC on http://{options["host"]}:{options["port"]}',
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.7 on 2026-10-18 16:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletNonce',
+            fields=[
+                ('wallet', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='nonce_counter', serialize=False, to='wallets.wallet', verbose_name='wallet')),
+                ('nonce', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='nonce')),
+            ],
+            options={
+                'verbose_name': 'wallet nonce',
+                'verbose_name_plural': 'wallet nonces',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.7 on 2026-10-18 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0002_wallet_nonce'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wallet',
+            index=models.Index(fields=['currency', '-id'], name='wallets_currency_id_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.7 on 2026-10-18 16:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0003_wallet_currency_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(max_length=66, unique=True, verbose_name='hash')),
+                ('nonce', models.PositiveBigIntegerField(verbose_name='nonce')),
+                ('to_address', models.CharField(max_length=42, verbose_name='to address')),
+                ('value', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='value')),
+                ('max_fee_per_gas', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='max fee per gas')),
+                ('max_priority_fee_per_gas', models.DecimalField(decimal_places=0, max_digits=78, verbose_name='max priority fee per gas')),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('success', 'success'), ('failed', 'failed')], default='pending', max_length=7, verbose_name='status')),
+                ('block_number', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='block number')),
+                ('gas_used', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='gas used')),
+                ('effective_gas_price', models.DecimalField(blank=True, decimal_places=0, max_digits=78, null=True, verbose_name='effective gas price')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='wallets.wallet', verbose_name='wallet')),
+            ],
+            options={
+                'verbose_name': 'wallet transaction',
+                'verbose_name_plural': 'wallet transactions',
+                'ordering': ('-id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(fields=['status', 'id'], name='wallets_tx_status_id_idx'),
+        ),
+    ]
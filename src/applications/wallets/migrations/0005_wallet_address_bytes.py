@@ -0,0 +1,158 @@
+# Generated by Django 3.2.7 on 2026-10-18 16:31
+
+import logging
+
+import applications.wallets.models
+from django.db import migrations, models
+from django.db.models import Count, Min
+from eth_utils import to_canonical_address
+
+logger = logging.getLogger(__name__)
+
+# Wallets converted by one UPDATE.
+BATCH_SIZE = 10000
+
+
+def copy_addresses(apps, source: str, target: str, convert) -> None:
+    """Copy wallet addresses between fields batch by batch."""
+    Wallet = apps.get_model('wallets', 'Wallet')
+    last_id = 0
+    while True:
+        wallets = list(
+            Wallet.objects.filter(id__gt=last_id).order_by('id').only(
+                'id',
+                'private_key',
+                source,
+            )[:BATCH_SIZE],
+        )
+        if not wallets:
+            return
+        for wallet in wallets:
+            setattr(wallet, target, convert(wallet, getattr(wallet, source)))
+        Wallet.objects.bulk_update(wallets, (target,))
+        last_id = wallets[-1].id
+
+
+def to_bytes(wallet, address: str) -> bytes:
+    """Get canonical bytes of address, derive malformed ones from the key."""
+    from applications.wallets.encryptors import WalletSecretFernetEncryptor
+    from applications.wallets.keys import derive_address
+
+    try:
+        return to_canonical_address(address)
+    except ValueError:
+        pass
+    try:
+        private_key = WalletSecretFernetEncryptor.decrypt(
+            wallet.private_key.encode(),
+        )
+        derived_address = derive_address(private_key)
+    except Exception:
+        raise ValueError(
+            f'Wallet {wallet.id} has malformed address {address!r} and its '
+            f'private key cannot be decrypted, fix or delete it first.',
+        )
+    logger.warning(
+        'Wallet %s malformed address %r is replaced with %s.',
+        wallet.id,
+        address,
+        derived_address,
+    )
+    return to_canonical_address(derived_address)
+
+
+def to_text(wallet, address: str) -> str:
+    """Keep checksum address."""
+    return address
+
+
+def merge_duplicates(apps) -> None:
+    """Merge wallets of one account and currency into the oldest one.
+
+    Addresses which differed in letter case only become equal bytes.
+    Transactions of merged wallets are moved, their nonce counters are
+    dropped, so the kept wallet syncs its nonce with the node.
+    """
+    Wallet = apps.get_model('wallets', 'Wallet')
+    WalletNonce = apps.get_model('wallets', 'WalletNonce')
+    WalletTransaction = apps.get_model('wallets', 'WalletTransaction')
+    duplicates = Wallet.objects.order_by().values(
+        'address_bytes',
+        'currency',
+    ).annotate(
+        count=Count('id'),
+        kept_id=Min('id'),
+    ).filter(count__gt=1)
+    for duplicate in duplicates:
+        merged_ids = list(
+            Wallet.objects.filter(
+                address_bytes=duplicate['address_bytes'],
+                currency=duplicate['currency'],
+            ).exclude(id=duplicate['kept_id']).values_list('id', flat=True),
+        )
+        logger.warning(
+            'Wallets %s duplicate wallet %s and are merged into it.',
+            merged_ids,
+            duplicate['kept_id'],
+        )
+        WalletTransaction.objects.filter(wallet_id__in=merged_ids).update(
+            wallet_id=duplicate['kept_id'],
+        )
+        WalletNonce.objects.filter(
+            wallet_id__in=merged_ids + [duplicate['kept_id']],
+        ).delete()
+        Wallet.objects.filter(id__in=merged_ids).delete()
+
+
+def copy_addresses_to_bytes(apps, schema_editor) -> None:
+    """Store addresses as canonical bytes, one wallet per account."""
+    copy_addresses(apps, 'address', 'address_bytes', to_bytes)
+    merge_duplicates(apps)
+
+
+def copy_addresses_to_text(apps, schema_editor) -> None:
+    """Store addresses as checksum strings."""
+    copy_addresses(apps, 'address_bytes', 'address', to_text)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0004_wallet_transaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='address_bytes',
+            field=applications.wallets.models.EthereumAddressField(max_length=20, null=True, verbose_name='address'),
+        ),
+        migrations.AlterField(
+            model_name='wallet',
+            name='address',
+            field=models.CharField(max_length=42, null=True, verbose_name='address'),
+        ),
+        migrations.RunPython(copy_addresses_to_bytes, copy_addresses_to_text),
+        migrations.AlterUniqueTogether(
+            name='wallet',
+            unique_together=set(),
+        ),
+        migrations.RemoveField(
+            model_name='wallet',
+            name='address',
+        ),
+        migrations.RenameField(
+            model_name='wallet',
+            old_name='address_bytes',
+            new_name='address',
+        ),
+        migrations.AlterField(
+            model_name='wallet',
+            name='address',
+            field=applications.wallets.models.EthereumAddressField(max_length=20, verbose_name='address'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='wallet',
+            unique_together={('address', 'currency')},
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 3.2.7 on 2026-10-18 17:02
+
+import applications.wallets.models
+from django.db import migrations, models
+
+# Wallets copied by one UPDATE, every batch is committed on its own.
+BATCH_SIZE = 10000
+
+
+def copy_secrets(apps, source: str, target: str, convert) -> None:
+    """Copy encrypted private keys between fields batch by batch."""
+    Wallet = apps.get_model('wallets', 'Wallet')
+    last_id = 0
+    while True:
+        wallets = list(
+            Wallet.objects.filter(id__gt=last_id).order_by('id').only(
+                'id',
+                source,
+            )[:BATCH_SIZE],
+        )
+        if not wallets:
+            return
+        for wallet in wallets:
+            setattr(wallet, target, convert(getattr(wallet, source)))
+        Wallet.objects.bulk_update(wallets, (target,))
+        last_id = wallets[-1].id
+
+
+def to_bytes(secret: str) -> bytes:
+    """Keep Fernet token as its ASCII bytes."""
+    return secret.encode()
+
+
+def to_text(secret: bytes) -> str:
+    """Get Fernet token of a secret, AES-GCM secrets are re-encrypted."""
+    from applications.wallets.encryptors import (AES_GCM_VERSION,
+                                                 WalletSecretAESGCMEncryptor,
+                                                 WalletSecretFernetEncryptor)
+
+    secret = bytes(secret)
+    if secret[:1] == AES_GCM_VERSION:
+        secret = WalletSecretFernetEncryptor.encrypt(
+            WalletSecretAESGCMEncryptor.decrypt(secret),
+        )
+    return secret.decode()
+
+
+def copy_secrets_to_bytes(apps, schema_editor) -> None:
+    """Store encrypted private keys in the binary column."""
+    copy_secrets(apps, 'private_key', 'private_key_bytes', to_bytes)
+
+
+def copy_secrets_to_text(apps, schema_editor) -> None:
+    """Store encrypted private keys as Fernet tokens in the text column."""
+    copy_secrets(apps, 'private_key_bytes', 'private_key', to_text)
+
+
+class Migration(migrations.Migration):
+
+    # The binary column is added empty, filled in committed batches and then
+    # takes the place of the text column, the table is never rewritten.
+    atomic = False
+
+    dependencies = [
+        ('wallets', '0005_wallet_address_bytes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='private_key_bytes',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='wallet',
+            name='private_key',
+            field=models.CharField(max_length=250, null=True, verbose_name='private_key'),
+        ),
+        migrations.RunPython(copy_secrets_to_bytes, copy_secrets_to_text),
+        migrations.RemoveField(
+            model_name='wallet',
+            name='private_key',
+        ),
+        migrations.RenameField(
+            model_name='wallet',
+            old_name='private_key_bytes',
+            new_name='private_key',
+        ),
+        migrations.AlterField(
+            model_name='wallet',
+            name='private_key',
+            field=applications.wallets.models.WalletSecretField(max_length=250, verbose_name='private_key'),
+        ),
+    ]
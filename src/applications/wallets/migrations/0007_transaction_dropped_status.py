@@ -0,0 +1,18 @@
+# Generated by Django 3.2.7 on 2026-10-18 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0006_wallet_private_key_binary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='wallettransaction',
+            name='status',
+            field=models.CharField(choices=[('pending', 'pending'), ('success', 'success'), ('failed', 'failed'), ('dropped', 'dropped')], default='pending', max_length=7, verbose_name='status'),
+        ),
+    ]
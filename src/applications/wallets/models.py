@@ -1,36 +1,149 @@
-import importlib
-import secrets
-from typing import TYPE_CHECKING, Type
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Type, Union
 
 from django.conf import settings
 from django.db import models
+from django.utils.module_loading import import_string
 from django.utils.translation import ugettext_lazy as _
+from eth_utils import to_canonical_address, to_checksum_address
 
-from main.w3 import get_w3
+from applications.wallets.keys import derive_address, generate_private_key
 
 if TYPE_CHECKING:
     from applications.wallets.encryptors import WalletSecretEncryptorInterface
 
 
-class WalletSecretField(models.CharField):
-    """Field to store Wallet.private_key."""
+class WalletSecret(object):
+    """Encrypted Wallet.private_key, decrypted on first access."""
 
-    def get_prep_value(self, value: str):
+    def __init__(
+        self,
+        encrypted_value: bytes,
+        encryptor: Type['WalletSecretEncryptorInterface'],
+    ):
+        self.encrypted_value = encrypted_value
+        self.encryptor = encryptor
+        self._decrypted_value: Optional[str] = None
+
+    @property
+    def value(self) -> str:
+        """Decrypted private key."""
+        if self._decrypted_value is None:
+            self._decrypted_value = self.encryptor.decrypt(
+                self.encrypted_value,
+            )
+        return self._decrypted_value
+
+    def __str__(self):
+        return self.value
+
+    def __eq__(self, other):
+        if isinstance(other, WalletSecret):
+            return self.value == other.value
+        return self.value == other
+
+    # Secrets are equal by their keys, while encrypting one key twice gives
+    # different ciphertexts, so a hash of the ciphertext would break the
+    # hash contract. Hashing the key would decrypt it, secrets are left
+    # unhashable instead.
+    __hash__ = None
+
+    def __bool__(self):
+        return bool(self.encrypted_value)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: ***>'
+
+
+class WalletSecretField(models.BinaryField):
+    """Field to store Wallet.private_key encrypted in a binary column."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('editable', True)
+        super().__init__(*args, **kwargs)
+
+    def get_prep_value(self, value: Union[str, WalletSecret, None]):
         """Override get_prep_value."""
+        if value is None:
+            return value
+        if isinstance(value, WalletSecret):
+            return _to_bytes(value.encrypted_value)
         encryptor = self._get_encryptor()
-        return encryptor.encrypt(value)
+        return _to_bytes(encryptor.encrypt(value))
 
-    def from_db_value(self, value: str, *args):
-        """Decrypt value from database."""
-        encryptor = self._get_encryptor()
-        return encryptor.decrypt(value)
+    def from_db_value(self, value: Union[bytes, memoryview, str, None], *args):
+        """Wrap value from database, decryption is deferred until access."""
+        if value is None:
+            return value
+        return WalletSecret(_to_bytes(value), self._get_encryptor())
+
+    def to_python(self, value):
+        """Keep WalletSecret and plain private keys untouched."""
+        return value
 
     def _get_encryptor(self) -> Type['WalletSecretEncryptorInterface']:
         """Get current encryptor class."""
-        parts = settings.WALLET_PRIVATE_KEY_ENCRYPTOR.split('.')
-        module_path, class_name = '.'.join(parts[:-1]), parts[-1]
-        module = importlib.import_module(module_path)
-        return getattr(module, class_name)
+        return get_encryptor_class(settings.WALLET_PRIVATE_KEY_ENCRYPTOR)
+
+
+def _to_bytes(value: Union[bytes, memoryview, str]) -> bytes:
+    """Get bytes of value, text is left by Fernet columns or encryptors."""
+    if isinstance(value, str):
+        return value.encode()
+    return bytes(value)
+
+
+@lru_cache(maxsize=None)
+def get_encryptor_class(
+    path: str,
+) -> Type['WalletSecretEncryptorInterface']:
+    """Import encryptor class by its dotted path once."""
+    return import_string(path)
+
+
+class EthereumAddressField(models.BinaryField):
+    """Field to store Ethereum address as 20 raw bytes.
+
+    Addresses are read as checksum strings. Any hex form is accepted for
+    saving and lookups, so differently cased addresses of one account match.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', 20)
+        super().__init__(*args, **kwargs)
+
+    def get_prep_value(self, value: Union[str, bytes, None]):
+        """Convert address to its canonical 20 bytes."""
+        value = super().get_prep_value(value)
+        if value is None or isinstance(value, (bytes, memoryview)):
+            return value
+        return to_canonical_address(value)
+
+    def from_db_value(self, value: Optional[bytes], *args):
+        """Convert stored bytes to checksum address."""
+        if value is None:
+            return value
+        return to_checksum_address(bytes(value))
+
+    def to_python(self, value: Union[str, bytes, None]):
+        """Get checksum address of value."""
+        if value is None or value == '':
+            return value
+        if isinstance(value, memoryview):
+            value = bytes(value)
+        return to_checksum_address(value)
+
+    def pre_save(self, model_instance: models.Model, add: bool):
+        """Keep checksum address in the saved instance."""
+        value = getattr(model_instance, self.attname)
+        if value:
+            value = self.to_python(value)
+            setattr(model_instance, self.attname, value)
+        return value
+
+    def value_to_string(self, obj: models.Model) -> str:
+        """Serialize address as checksum string."""
+        return self.value_from_object(obj)
 
 
 class Wallet(models.Model):
@@ -47,10 +160,7 @@ class Wallet(models.Model):
         verbose_name=_('private_key'),
         max_length=250,
     )
-    address = models.CharField(
-        verbose_name=_('address'),
-        max_length=42,
-    )
+    address = EthereumAddressField(verbose_name=_('address'))
     currency = models.CharField(
         verbose_name=_('currency'),
         max_length=3,
@@ -61,16 +171,14 @@ class Wallet(models.Model):
     def save(self, *args, **kwargs) -> None:
         """Override save() method."""
         if not self.private_key:
-            self.private_key = '0x' + secrets.token_hex(32)
+            self.private_key = generate_private_key()
         if not self.address:
             self.address = self._create_new_address()
         return super().save(*args, **kwargs)
 
     def _create_new_address(self) -> str:
         """Create new ethereum address"""
-        w3 = get_w3()
-        account = w3.eth.account.from_key(self.private_key)
-        return account.address
+        return derive_address(str(self.private_key))
 
     def __str__(self):
         return f'{self.currency} - {self.address}'
@@ -79,6 +187,130 @@ class Wallet(models.Model):
         verbose_name = _('wallet')
         verbose_name_plural = _('wallets')
         ordering = ('-id',)
+        # The unique index leads with address, so it serves lookups by
+        # address alone and no separate address index is needed.
         unique_together = (
             ('address', 'currency'),
         )
+        indexes = (
+            models.Index(
+                fields=('currency', '-id'),
+                name='wallets_currency_id_idx',
+            ),
+        )
+
+
+class WalletNonce(models.Model):
+    """Next nonce to sign outgoing transactions of a Wallet with."""
+
+    wallet = models.OneToOneField(
+        Wallet,
+        verbose_name=_('wallet'),
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='nonce_counter',
+    )
+    nonce = models.PositiveBigIntegerField(
+        verbose_name=_('nonce'),
+        null=True,
+        blank=True,
+    )
+
+    def __str__(self):
+        return f'{self.wallet} - {self.nonce}'
+
+    class Meta:
+        verbose_name = _('wallet nonce')
+        verbose_name_plural = _('wallet nonces')
+
+
+class WalletTransaction(models.Model):
+    """Outgoing transaction of a Wallet."""
+
+    class StatusChoices(models.TextChoices):
+        """Choices for WalletTransaction.status field."""
+
+        PENDING = 'pending', 'pending'
+        SUCCESS = 'success', 'success'
+        FAILED = 'failed', 'failed'
+        DROPPED = 'dropped', 'dropped'
+
+    # Wei amounts may exceed 64 bit integers.
+    WEI_DIGITS = 78
+
+    wallet = models.ForeignKey(
+        Wallet,
+        verbose_name=_('wallet'),
+        on_delete=models.CASCADE,
+        related_name='transactions',
+    )
+    hash = models.CharField(
+        verbose_name=_('hash'),
+        max_length=66,
+        unique=True,
+    )
+    nonce = models.PositiveBigIntegerField(verbose_name=_('nonce'))
+    to_address = models.CharField(
+        verbose_name=_('to address'),
+        max_length=42,
+    )
+    value = models.DecimalField(
+        verbose_name=_('value'),
+        max_digits=WEI_DIGITS,
+        decimal_places=0,
+    )
+    max_fee_per_gas = models.DecimalField(
+        verbose_name=_('max fee per gas'),
+        max_digits=WEI_DIGITS,
+        decimal_places=0,
+    )
+    max_priority_fee_per_gas = models.DecimalField(
+        verbose_name=_('max priority fee per gas'),
+        max_digits=WEI_DIGITS,
+        decimal_places=0,
+    )
+    status = models.CharField(
+        verbose_name=_('status'),
+        max_length=7,
+        choices=StatusChoices.choices,
+        default=StatusChoices.PENDING,
+    )
+    block_number = models.PositiveBigIntegerField(
+        verbose_name=_('block number'),
+        null=True,
+        blank=True,
+    )
+    gas_used = models.PositiveBigIntegerField(
+        verbose_name=_('gas used'),
+        null=True,
+        blank=True,
+    )
+    effective_gas_price = models.DecimalField(
+        verbose_name=_('effective gas price'),
+        max_digits=WEI_DIGITS,
+        decimal_places=0,
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        verbose_name=_('created at'),
+        auto_now_add=True,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name=_('updated at'),
+        auto_now=True,
+    )
+
+    def __str__(self):
+        return f'{self.hash} - {self.status}'
+
+    class Meta:
+        verbose_name = _('wallet transaction')
+        verbose_name_plural = _('wallet transactions')
+        ordering = ('-id',)
+        indexes = (
+            models.Index(
+                fields=('status', 'id'),
+                name='wallets_tx_status_id_idx',
+            ),
+        )
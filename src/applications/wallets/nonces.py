@@ -0,0 +1,79 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.db import transaction
+
+from applications.wallets.models import Wallet, WalletNonce
+
+# Wallets whose counters were synchronized with the node by this process.
+_synced_wallets: Set[int] = set()
+
+
+def allocate_nonce(wallet: Wallet, node_nonce: int) -> int:
+    """Reserve next nonce for a transaction of wallet.
+
+    node_nonce is the pending transaction count of the wallet, read from
+    the node before the counter row is locked. The locked counter gives
+    concurrent transfers from one wallet distinct nonces. It is set to
+    node_nonce the first time this process signs for the wallet and after
+    reset_nonce(), so nonces left unsent by a crash or a failed broadcast
+    are reused instead of holding back later transactions.
+    """
+    with transaction.atomic():
+        counter, _ = WalletNonce.objects.select_for_update().get_or_create(
+            wallet=wallet,
+            defaults={'nonce': node_nonce},
+        )
+        if counter.nonce is None or wallet.pk not in _synced_wallets:
+            counter.nonce = node_nonce
+        nonce = counter.nonce
+        counter.nonce += 1
+        counter.save(update_fields=('nonce',))
+    _synced_wallets.add(wallet.pk)
+    return nonce
+
+
+def allocate_nonces(
+    node_nonces: Iterable[Tuple[Wallet, int]],
+) -> Dict[int, int]:
+    """Reserve next nonces of many wallets, get them by wallet id.
+
+    Works like allocate_nonce() with a constant number of queries: missing
+    counters are created, all of them are locked in wallet id order and
+    updated at once.
+    """
+    node_nonces = {wallet.pk: node_nonce for wallet, node_nonce in node_nonces}
+    nonces = {}
+    with transaction.atomic():
+        WalletNonce.objects.bulk_create(
+            [
+                WalletNonce(wallet_id=wallet_id, nonce=node_nonce)
+                for wallet_id, node_nonce in node_nonces.items()
+            ],
+            ignore_conflicts=True,
+        )
+        counters = list(
+            WalletNonce.objects.select_for_update().filter(
+                wallet_id__in=node_nonces,
+            ).order_by('wallet_id'),
+        )
+        for counter in counters:
+            wallet_id = counter.wallet_id
+            if counter.nonce is None or wallet_id not in _synced_wallets:
+                counter.nonce = node_nonces[wallet_id]
+            nonces[wallet_id] = counter.nonce
+            counter.nonce += 1
+        WalletNonce.objects.bulk_update(counters, ('nonce',))
+    _synced_wallets.update(nonces)
+    return nonces
+
+
+def reset_nonce(wallet: Wallet) -> None:
+    """Resynchronize wallet nonce with the node on next allocation."""
+    reset_nonces([wallet])
+
+
+def reset_nonces(wallets: List[Wallet]) -> None:
+    """Resynchronize nonces of wallets with the node on next allocation."""
+    wallet_ids = [wallet.pk for wallet in wallets]
+    WalletNonce.objects.filter(wallet_id__in=wallet_ids).update(nonce=None)
+    _synced_wallets.difference_update(wallet_ids)
@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class WalletCursorPagination(CursorPagination):
+    """Keyset pagination of wallets by id.
+
+    Every page is one index range scan, so deep pages cost the same as
+    the first one.
+    """
+
+    ordering = '-id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -0,0 +1,125 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+from web3 import Web3
+
+from applications.wallets.models import Wallet, WalletTransaction
+from applications.wallets.nonces import reset_nonces
+from main.w3 import batch_request, get_w3
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_FIELDS = (
+    'status',
+    'block_number',
+    'gas_used',
+    'effective_gas_price',
+    'updated_at',
+)
+
+
+def poll_receipts(batch_size: Optional[int] = None) -> int:
+    """Update pending transactions with their receipts from the node.
+
+    Pending hashes are read by id ranges and asked with one JSON-RPC batch
+    per range. A range the node fails to answer is logged and asked again
+    by the next poll. Transactions without a receipt older than
+    settings.WALLET_RECEIPT_DROP_AFTER seconds which the node does not know
+    are dropped, nonces of their wallets are synchronized with the node
+    again. Returns number of transactions which are no longer pending.
+    """
+    batch_size = batch_size or settings.WALLET_RECEIPT_BATCH_SIZE
+    w3 = get_w3()
+    pending = WalletTransaction.objects.filter(
+        status=WalletTransaction.StatusChoices.PENDING,
+    ).order_by('id')
+    drop_before = timezone.now() - timedelta(
+        seconds=settings.WALLET_RECEIPT_DROP_AFTER,
+    )
+    finished = 0
+    last_id = 0
+    while True:
+        batch = list(
+            pending.filter(id__gt=last_id).values_list(
+                'id',
+                'hash',
+                'wallet_id',
+                'created_at',
+            )[:batch_size],
+        )
+        if not batch:
+            return finished
+        last_id = batch[-1][0]
+        try:
+            finished += _poll_batch(w3, batch, drop_before)
+        except Exception:
+            logger.warning(
+                'Receipts of transactions %s-%s were not polled',
+                batch[0][0],
+                last_id,
+                exc_info=True,
+            )
+
+
+def _poll_batch(
+    w3: Web3,
+    batch: List[Tuple[int, str, int, datetime]],
+    drop_before: datetime,
+) -> int:
+    """Update transactions of one batch, get number of finished ones."""
+    receipts = batch_request(
+        w3,
+        [('eth_getTransactionReceipt', [row[1]]) for row in batch],
+    )
+    transactions = []
+    stale = []
+    for row, receipt in zip(batch, receipts):
+        if receipt is not None:
+            transactions.append(
+                _apply_receipt(WalletTransaction(id=row[0]), receipt),
+            )
+        elif row[3] < drop_before:
+            stale.append(row)
+    dropped = []
+    if stale:
+        known = batch_request(
+            w3,
+            [('eth_getTransactionByHash', [row[1]]) for row in stale],
+        )
+        dropped = [row for row, found in zip(stale, known) if found is None]
+    for row in dropped:
+        transactions.append(_drop(WalletTransaction(id=row[0])))
+    WalletTransaction.objects.bulk_update(transactions, RECEIPT_FIELDS)
+    reset_nonces([Wallet(id=row[2]) for row in dropped])
+    return len(transactions)
+
+
+def _apply_receipt(
+    transaction: WalletTransaction,
+    receipt: Dict[str, Any],
+) -> WalletTransaction:
+    """Set status and receipt fields of transaction."""
+    statuses = WalletTransaction.StatusChoices
+    if Web3.toInt(hexstr=receipt['status']) == 1:
+        transaction.status = statuses.SUCCESS
+    else:
+        transaction.status = statuses.FAILED
+    transaction.block_number = Web3.toInt(hexstr=receipt['blockNumber'])
+    transaction.gas_used = Web3.toInt(hexstr=receipt['gasUsed'])
+    effective_gas_price = receipt.get('effectiveGasPrice')
+    if effective_gas_price is not None:
+        transaction.effective_gas_price = Web3.toInt(
+            hexstr=effective_gas_price,
+        )
+    transaction.updated_at = timezone.now()
+    return transaction
+
+
+def _drop(transaction: WalletTransaction) -> WalletTransaction:
+    """Mark transaction forgotten by the node without a receipt."""
+    transaction.status = WalletTransaction.StatusChoices.DROPPED
+    transaction.updated_at = timezone.now()
+    return transaction
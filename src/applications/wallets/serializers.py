@@ -1,14 +1,22 @@
+import asyncio
 import re
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db.models import QuerySet
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 from web3 import Web3
 
-from applications.wallets.models import Wallet
-from main.w3 import get_w3
+from applications.wallets.balances import invalidate_balances
+from applications.wallets.fees import Fees, get_fees
+from applications.wallets.keys import generate_private_key
+from applications.wallets.models import Wallet, WalletTransaction
+from applications.wallets.nonces import allocate_nonce, reset_nonce
+from applications.wallets.signers import sign_transaction
+from main.w3 import batch_request, get_async_w3, get_w3
 
 
 def ethereum_address_validator(value: str):
@@ -20,19 +28,239 @@ def ethereum_address_validator(value: str):
         raise serializers.ValidationError(error_message)
 
 
+def private_key_validator(value: str):
+    """Check that value is correct Ethereum private key."""
+    if not re.match(r'^0x[a-fA-F0-9]{64}$', value):
+        error_message = _('Incorrect Ethereum private key value.')
+        raise serializers.ValidationError(error_message)
+
+
 class WalletSerializer(serializers.ModelSerializer):
     """Serialize Wallets."""
 
+    private_key = serializers.CharField(
+        max_length=250,
+        write_only=True,
+        required=False,
+        validators=(private_key_validator,),
+    )
+    address = serializers.CharField(read_only=True)
+
     class Meta:
         model = Wallet
         fields = ('private_key', 'address', 'currency')
         read_only_fields = ('address',)
         extra_kwargs = {
-            'private_key': {'write_only': True, 'required': False},
             'currency': {'required': False},
         }
 
 
+class WalletBulkCreateSerializer(serializers.Serializer):
+    """Validate bulk creation of wallets by count or private keys."""
+
+    count = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.WALLET_BULK_CREATE_MAX_WALLETS,
+        required=False,
+    )
+    private_keys = serializers.ListField(
+        child=serializers.CharField(validators=(private_key_validator,)),
+        min_length=1,
+        max_length=settings.WALLET_BULK_CREATE_MAX_WALLETS,
+        required=False,
+    )
+    currency = serializers.ChoiceField(
+        choices=Wallet.WalletCurrencyChoices.choices,
+        default=Wallet.DEFAULT_WALLET_CURRENCY,
+    )
+
+    def validate(self, attrs: Dict[str, Any]):
+        """Check that exactly one of count and private_keys is given."""
+        if ('count' in attrs) == ('private_keys' in attrs):
+            error_message = _('Pass either count or private_keys.')
+            raise serializers.ValidationError(error_message)
+        private_keys = attrs.get('private_keys', ())
+        if len({key.lower() for key in private_keys}) < len(private_keys):
+            error_message = _('Private keys must be unique.')
+            raise serializers.ValidationError({'private_keys': error_message})
+        return attrs
+
+    def get_private_keys(self) -> List[str]:
+        """Get private keys of wallets to create."""
+        if 'private_keys' in self.validated_data:
+            return self.validated_data['private_keys']
+        return [
+            generate_private_key()
+            for _ in range(self.validated_data['count'])
+        ]
+
+
+class WalletBalanceQuerySerializer(serializers.Serializer):
+    """Validate addresses of wallets which balances are requested."""
+
+    address = serializers.ListField(
+        child=serializers.CharField(validators=(ethereum_address_validator,)),
+        min_length=1,
+        max_length=settings.WALLET_BALANCE_MAX_ADDRESSES,
+    )
+
+
+class WalletSelectionSerializer(serializers.Serializer):
+    """Validate wallets selected by addresses or currency.
+
+    At most get_max_wallets() wallets can be selected by one request.
+    """
+
+    too_many_wallets_message = _('At most {0} wallets can be selected.')
+
+    addresses = serializers.ListField(
+        child=serializers.CharField(validators=(ethereum_address_validator,)),
+        min_length=1,
+        required=False,
+        write_only=True,
+    )
+    currency = serializers.ChoiceField(
+        choices=Wallet.WalletCurrencyChoices.choices,
+        required=False,
+        write_only=True,
+    )
+
+    def get_max_wallets(self) -> int:
+        """Get most wallets selected by one request."""
+        raise NotImplementedError
+
+    def validate_addresses(self, addresses: List[str]) -> List[str]:
+        """Check that addresses are not too many."""
+        max_wallets = self.get_max_wallets()
+        if len(addresses) > max_wallets:
+            raise serializers.ValidationError(
+                self.too_many_wallets_message.format(max_wallets),
+            )
+        return addresses
+
+    def validate(self, attrs: Dict[str, Any]):
+        """Check that wallets are selected explicitly."""
+        if 'addresses' not in attrs and 'currency' not in attrs:
+            error_message = _('Pass addresses or currency of wallets.')
+            raise serializers.ValidationError(error_message)
+        return attrs
+
+    def get_wallets(self) -> QuerySet:
+        """Get selected wallets, fail when there are too many of them."""
+        wallets = Wallet.objects.all()
+        if 'currency' in self.validated_data:
+            wallets = wallets.filter(
+                currency=self.validated_data['currency'],
+            )
+        if 'addresses' in self.validated_data:
+            wallets = wallets.filter(
+                address__in=self.validated_data['addresses'],
+            )
+        max_wallets = self.get_max_wallets()
+        if wallets.count() > max_wallets:
+            raise serializers.ValidationError(
+                self.too_many_wallets_message.format(max_wallets),
+            )
+        return wallets
+
+    def get_missing_addresses(self, wallets: Iterable[Wallet]) -> List[str]:
+        """Get passed addresses which none of wallets has."""
+        found = {wallet.address.lower() for wallet in wallets}
+        return [
+            address
+            for address in self.validated_data.get('addresses', ())
+            if address.lower() not in found
+        ]
+
+
+class WalletBalanceBatchSerializer(WalletSelectionSerializer):
+    """Validate batch balance lookup of wallets."""
+
+    balances = serializers.DictField(
+        child=serializers.IntegerField(),
+        read_only=True,
+    )
+    total = serializers.IntegerField(read_only=True)
+
+    def get_max_wallets(self) -> int:
+        """Get most wallets which balances are read by one request."""
+        return settings.WALLET_BALANCE_BATCH_MAX_WALLETS
+
+
+class WalletSweepResultSerializer(serializers.Serializer):
+    """Serialize sweep result of one wallet."""
+
+    address = serializers.CharField()
+    status = serializers.CharField()
+    hash = serializers.CharField(allow_null=True)
+    nonce = serializers.IntegerField(allow_null=True)
+    value = serializers.IntegerField(allow_null=True)
+    error = serializers.CharField(allow_null=True)
+
+
+class WalletSweepSerializer(WalletSelectionSerializer):
+    """Validate sweep of wallets selected by addresses or currency."""
+
+    destination = serializers.CharField(
+        validators=(ethereum_address_validator,),
+    )
+    results = WalletSweepResultSerializer(many=True, read_only=True)
+    missing = serializers.ListField(
+        child=serializers.CharField(),
+        read_only=True,
+    )
+
+    too_many_wallets_message = _('At most {0} wallets can be swept at once.')
+
+    def get_max_wallets(self) -> int:
+        """Get most wallets swept by one request."""
+        return settings.WALLET_SWEEP_MAX_WALLETS
+
+
+class WalletTransactionSerializer(serializers.ModelSerializer):
+    """Serialize stored outgoing transactions."""
+
+    address = serializers.CharField(source='wallet.address')
+    value = serializers.IntegerField()
+    max_fee_per_gas = serializers.IntegerField()
+    max_priority_fee_per_gas = serializers.IntegerField()
+    effective_gas_price = serializers.IntegerField(allow_null=True)
+
+    class Meta:
+        model = WalletTransaction
+        fields = (
+            'hash',
+            'address',
+            'nonce',
+            'to_address',
+            'value',
+            'max_fee_per_gas',
+            'max_priority_fee_per_gas',
+            'status',
+            'block_number',
+            'gas_used',
+            'effective_gas_price',
+            'created_at',
+            'updated_at',
+        )
+        read_only_fields = fields
+
+
+class WalletBalanceSerializer(serializers.ModelSerializer):
+    """Serialize Wallets with balances passed in context."""
+
+    balance = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Wallet
+        fields = ('address', 'currency', 'balance')
+        read_only_fields = fields
+
+    def get_balance(self, wallet: Wallet) -> int:
+        """Get wallet balance (wei)."""
+        return self.context['balances'][wallet.address]
+
+
 class WalletTransferSerializer(serializers.Serializer):
     """Serialize transfer all ethereum from one wallet to another."""
 
@@ -55,21 +283,53 @@ class WalletTransferSerializer(serializers.Serializer):
 
     wallet: Wallet = Wallet()
 
+    @cached_property
+    def account_state(self) -> Dict[str, int]:
+        """Get wallet balance and pending nonce with one JSON-RPC batch."""
+        balance, nonce = batch_request(
+            self.w3,
+            (
+                (
+                    'eth_getBalance',
+                    [self.wallet.address, self.w3.eth.default_block],
+                ),
+                ('eth_getTransactionCount', [self.wallet.address, 'pending']),
+            ),
+        )
+        return {
+            'balance': Web3.toInt(hexstr=balance),
+            'nonce': Web3.toInt(hexstr=nonce),
+        }
+
     @cached_property
     def balance(self) -> int:
         """Get wallet balance (wei)."""
-        return self.w3.eth.get_balance(self.wallet.address)
+        return self.account_state['balance']
+
+    @cached_property
+    def fees(self) -> Fees:
+        """Get fee estimates of the fee oracle."""
+        return get_fees()
 
     @cached_property
     def gas_price(self, ) -> int:
-        """Generate gas price (wei)."""
-        gas_price = self.w3.eth.generate_gas_price() or 0
-        return Web3.toWei(gas_price, 'gwei')
+        """Get gas price (wei)."""
+        return self.fees.max_fee_per_gas
+
+    @cached_property
+    def fee(self) -> int:
+        """Get the greatest fee (wei) of the transfer."""
+        return settings.ETHEREUM_TRANSFER_GAS * self.gas_price
 
-    @property
+    @cached_property
+    def value(self) -> int:
+        """Get amount (wei) sent, the balance left after the fee."""
+        return self.balance - self.fee
+
+    @cached_property
     def actual_nonce(self) -> int:
-        """Get number of transaction."""
-        return self.w3.eth.get_transaction_count(self.wallet.address)
+        """Reserve number of transaction."""
+        return allocate_nonce(self.wallet, self.account_state['nonce'])
 
     @cached_property
     def w3(self) -> Web3:
@@ -85,29 +345,55 @@ class WalletTransferSerializer(serializers.Serializer):
     def create(self, validated_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create transaction."""
         transaction_hex = self._send_transaction(validated_data['_to'])
+        self._record_transaction(transaction_hex, validated_data['_to'])
+        invalidate_balances((self.wallet.address, validated_data['_to']))
         return {'hash': transaction_hex, 'nonce': self.actual_nonce}
 
+    def _record_transaction(
+        self,
+        transaction_hex: str,
+        recipient_address: str,
+    ) -> WalletTransaction:
+        """Store sent transaction, its receipt is polled later."""
+        return WalletTransaction.objects.create(
+            wallet=self.wallet,
+            hash=transaction_hex,
+            nonce=self.actual_nonce,
+            to_address=recipient_address,
+            value=self.value,
+            max_fee_per_gas=self.fees.max_fee_per_gas,
+            max_priority_fee_per_gas=self.fees.max_priority_fee_per_gas,
+        )
+
     def _send_transaction(self, recipient_address: str) -> str:
         """Send transaction to recipient wallet."""
+        try:
+            signed_txn = sign_transaction(
+                self.wallet,
+                self._get_sign_params(recipient_address),
+            )
+            hex_bytes = self.w3.eth.send_raw_transaction(
+                signed_txn.rawTransaction,
+            )
+        except Exception:
+            reset_nonce(self.wallet)
+            raise
+        return hex_bytes.hex()
+
+    def _get_sign_params(self, recipient_address: str) -> Dict[str, Any]:
+        """Get params of transaction to recipient wallet."""
         defaults = settings.ETHEREUM_TRANSACTIONS_DEFAULTS
-        gas_price_as_gwei = Web3.fromWei(self.gas_price, 'gwei')
-        sign_params = {
+        return {
             'nonce': self.actual_nonce,
-            'maxFeePerGas': defaults['maxFeePerGas'],
-            'maxPriorityFeePerGas': defaults['maxPriorityFeePerGas'],
-            'gas': int(gas_price_as_gwei),
-            'to': recipient_address,
-            'value': self.balance,
+            'maxFeePerGas': self.fees.max_fee_per_gas,
+            'maxPriorityFeePerGas': self.fees.max_priority_fee_per_gas,
+            'gas': settings.ETHEREUM_TRANSFER_GAS,
+            'to': Web3.toChecksumAddress(recipient_address),
+            'value': self.value,
             'data': b'',
             'type': defaults['type'],
-            'chanId': defaults['chanId'],
+            'chainId': defaults['chainId'],
         }
-        signed_txn = self.w3.eth.account.sign_transaction(
-            sign_params,
-            self.wallet.private_key,
-        )
-        hex_bytes = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        return hex_bytes.hex()
 
     def _validate_balance(self) -> None:
         """Validate balance."""
@@ -116,11 +402,11 @@ class WalletTransferSerializer(serializers.Serializer):
                 'Balance of wallet {0} is zero or negative',
             ).format(self.wallet.address)
             raise serializers.ValidationError({'_from': error_message})
-        if self.balance <= self.gas_price:
+        if self.balance <= self.fee:
             error_message = _(
                 'Balance of wallet {0} does not provide payment of '
                 'commission ({1})',
-            ).format(self.wallet.address, self.gas_price)
+            ).format(self.wallet.address, self.fee)
             raise serializers.ValidationError({'_from': error_message})
 
     def _validate_wallet_exists(self, attrs: Dict[str, Any]) -> None:
@@ -135,3 +421,62 @@ class WalletTransferSerializer(serializers.Serializer):
             ).format(attrs.get('_from'), attrs.get('currency'))
             raise serializers.ValidationError({'_from': error_message})
         self.wallet = wallet
+
+
+class AsyncWalletTransferSerializer(WalletTransferSerializer):
+    """Transfer all ethereum without blocking the event loop.
+
+    is_valid() checks fields only, the wallet and its balance are
+    validated by avalidate(). Node reads are made concurrently.
+    """
+
+    @cached_property
+    def w3(self) -> Web3:
+        """Asynchronous Web3py instance."""
+        return get_async_w3()
+
+    def validate(self, attrs: Dict[str, Any]):
+        """Override validation, see avalidate()."""
+        return attrs
+
+    async def avalidate(self) -> None:
+        """Validate wallet and its balance."""
+        await sync_to_async(self._validate_wallet_exists)(self.validated_data)
+        address = Web3.toChecksumAddress(self.wallet.address)
+        balance, nonce = await asyncio.gather(
+            self.w3.eth.get_balance(address),
+            self.w3.eth.get_transaction_count(address, 'pending'),
+        )
+        self.account_state = {'balance': balance, 'nonce': nonce}
+        self._validate_balance()
+
+    async def asave(self) -> Dict[str, Any]:
+        """Create transaction.
+
+        Signing may decrypt the private key and invalidation talks to the
+        cache, both block and run in a worker thread.
+        """
+        self.actual_nonce = await sync_to_async(allocate_nonce)(
+            self.wallet,
+            self.account_state['nonce'],
+        )
+        try:
+            signed_txn = await sync_to_async(sign_transaction)(
+                self.wallet,
+                self._get_sign_params(self.validated_data['_to']),
+            )
+            hex_bytes = await self.w3.eth.send_raw_transaction(
+                signed_txn.rawTransaction,
+            )
+        except Exception:
+            await sync_to_async(reset_nonce)(self.wallet)
+            raise
+        await sync_to_async(self._record_transaction)(
+            hex_bytes.hex(),
+            self.validated_data['_to'],
+        )
+        await sync_to_async(invalidate_balances)(
+            (self.wallet.address, self.validated_data['_to']),
+        )
+        self.instance = {'hash': hex_bytes.hex(), 'nonce': self.actual_nonce}
+        return self.data
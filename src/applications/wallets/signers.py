@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Union
+
+from django.conf import settings
+from eth_account import Account
+from eth_account.datastructures import SignedTransaction
+from eth_account.signers.local import LocalAccount
+
+from applications.wallets.models import Wallet
+from main.metrics import REGISTRY, Counter, metrics_enabled
+
+SIGNER_CACHE_REQUESTS = REGISTRY.register(Counter(
+    'wallet_signer_cache_requests_total',
+    'Signer cache lookups by result.',
+    ('result',),
+))
+
+
+class CachedSigner(NamedTuple):
+    """Account of a wallet and what it was derived from."""
+
+    account: LocalAccount
+    secret: Union[bytes, str]
+    expires_at: float
+
+
+class SignerCache(object):
+    """Ready-to-sign accounts of wallets with LRU eviction and TTL.
+
+    Entries are keyed by wallet id and remember the encrypted private key
+    (the key itself for unsaved wallets) they were derived from, so a wallet
+    with a re-encrypted or replaced key misses the cache even in processes
+    which were not invalidated.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._signers: 'OrderedDict[int, CachedSigner]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, wallet: Wallet) -> LocalAccount:
+        """Get account of wallet, decrypt its key on a miss."""
+        secret = getattr(
+            wallet.private_key,
+            'encrypted_value',
+            wallet.private_key,
+        )
+        now = time.monotonic()
+        with self._lock:
+            signer = self._signers.get(wallet.pk)
+            hit = (
+                signer is not None
+                and signer.expires_at > now
+                and signer.secret == secret
+            )
+            if hit:
+                self._signers.move_to_end(wallet.pk)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if metrics_enabled():
+            SIGNER_CACHE_REQUESTS.inc('hit' if hit else 'miss')
+        if hit:
+            return signer.account
+        account = Account.from_key(str(wallet.private_key))
+        if self.max_size > 0 and wallet.pk is not None:
+            with self._lock:
+                self._signers[wallet.pk] = CachedSigner(
+                    account,
+                    secret,
+                    now + self.ttl,
+                )
+                self._signers.move_to_end(wallet.pk)
+                while len(self._signers) > self.max_size:
+                    self._signers.popitem(last=False)
+        return account
+
+    def invalidate(self, wallet_ids: Optional[Iterable[int]] = None) -> None:
+        """Drop accounts of wallets, all accounts by default."""
+        with self._lock:
+            if wallet_ids is None:
+                self._signers.clear()
+                return
+            for wallet_id in wallet_ids:
+                self._signers.pop(wallet_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hits, misses and size of the cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._signers),
+                'max_size': self.max_size,
+            }
+
+
+_signer_cache: Optional[SignerCache] = None
+_signer_cache_lock = threading.Lock()
+
+
+def get_signer_cache() -> SignerCache:
+    """Get signer cache of this process."""
+    global _signer_cache
+    if _signer_cache is None:
+        with _signer_cache_lock:
+            if _signer_cache is None:
+                _signer_cache = SignerCache(
+                    settings.WALLET_SIGNER_CACHE_SIZE,
+                    settings.WALLET_SIGNER_CACHE_TTL,
+                )
+    return _signer_cache
+
+
+def sign_transaction(
+    wallet: Wallet,
+    transaction: Dict[str, Any],
+) -> SignedTransaction:
+    """Sign transaction with cached account of wallet."""
+    return get_signer_cache().get(wallet).sign_transaction(transaction)
+
+
+def reset_signer_cache() -> None:
+    """Drop signer cache, it is created again on next use.
+
+    Children of forked processes do not inherit decrypted keys.
+    """
+    global _signer_cache
+    signer_cache, _signer_cache = _signer_cache, None
+    if signer_cache is not None:
+        signer_cache.invalidate()
+
+
+def _reset_signer_cache_after_fork() -> None:
+    """Drop signer cache of the parent in a forked child.
+
+    Locks held by parent threads are never released in the child, so
+    they are replaced and the decrypted keys are cleared without them.
+    """
+    global _signer_cache, _signer_cache_lock
+    signer_cache, _signer_cache = _signer_cache, None
+    _signer_cache_lock = threading.Lock()
+    if signer_cache is not None:
+        signer_cache._signers.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_signer_cache_after_fork)
@@ -0,0 +1,247 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import copy_context
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+import django
+from django.conf import settings
+from web3 import Web3
+
+from applications.wallets.balances import (fetch_account_states,
+                                           invalidate_balances)
+from applications.wallets.encryptors import WalletSecretEncryptorInterface
+from applications.wallets.fees import Fees, get_fees
+from applications.wallets.keys import sign_transactions
+from applications.wallets.models import Wallet, WalletTransaction
+from applications.wallets.nonces import allocate_nonces, reset_nonces
+from applications.wallets.signers import sign_transaction
+from main.w3 import get_w3
+
+SWEEP_SENT = 'sent'
+SWEEP_SKIPPED = 'skipped'
+SWEEP_FAILED = 'failed'
+
+
+def sweep_wallets(
+    wallets: Iterable[Wallet],
+    destination: str,
+) -> List[Dict[str, Any]]:
+    """Move whole balances of wallets to destination address.
+
+    Balances and pending nonces are read with batched JSON-RPC, nonces are
+    allocated by one locked batch, transactions are signed by a process pool
+    and broadcast by a bounded thread pool.
+    Wallets whose balance does not cover the fee are skipped. One report is
+    returned for every wallet.
+    """
+    destination = Web3.toChecksumAddress(destination)
+    wallets = _get_unique_wallets(wallets, destination)
+    states = fetch_account_states([wallet.address for wallet in wallets])
+    fees = get_fees()
+    fee = settings.ETHEREUM_TRANSFER_GAS * fees.max_fee_per_gas
+    reports = {}
+    funded_wallets = []
+    for wallet in wallets:
+        balance, node_nonce = states[wallet.address]
+        if balance <= fee:
+            reports[wallet.address] = _get_report(
+                wallet,
+                SWEEP_SKIPPED,
+                error='Balance {0} does not cover fee {1}.'.format(
+                    balance,
+                    fee,
+                ),
+            )
+            continue
+        funded_wallets.append((wallet, node_nonce))
+    nonces = allocate_nonces(funded_wallets)
+    transfers = [
+        (
+            wallet,
+            _get_sign_params(
+                nonces[wallet.pk],
+                states[wallet.address][0] - fee,
+                destination,
+                fees,
+            ),
+        )
+        for wallet, _ in funded_wallets
+    ]
+    try:
+        signed = _sign(transfers)
+    except Exception:
+        reset_nonces([wallet for wallet, _ in transfers])
+        raise
+    results = _broadcast([raw_transaction for raw_transaction, _ in signed])
+    sent_transactions = []
+    failed_wallets = []
+    for (wallet, params), (_, hash_), error in zip(
+        transfers,
+        signed,
+        results,
+    ):
+        if error is not None:
+            failed_wallets.append(wallet)
+            reports[wallet.address] = _get_report(
+                wallet,
+                SWEEP_FAILED,
+                nonce=params['nonce'],
+                value=params['value'],
+                error=error,
+            )
+            continue
+        reports[wallet.address] = _get_report(
+            wallet,
+            SWEEP_SENT,
+            hash_=hash_,
+            nonce=params['nonce'],
+            value=params['value'],
+        )
+        sent_transactions.append(WalletTransaction(
+            wallet=wallet,
+            hash=hash_,
+            nonce=params['nonce'],
+            to_address=destination,
+            value=params['value'],
+            max_fee_per_gas=fees.max_fee_per_gas,
+            max_priority_fee_per_gas=fees.max_priority_fee_per_gas,
+        ))
+    reset_nonces(failed_wallets)
+    WalletTransaction.objects.bulk_create(sent_transactions)
+    invalidate_balances(
+        [wallet.address for wallet in wallets] + [destination],
+    )
+    return [reports[wallet.address] for wallet in wallets]
+
+
+def _get_unique_wallets(
+    wallets: Iterable[Wallet],
+    destination: str,
+) -> List[Wallet]:
+    """Get wallets with distinct addresses other than destination.
+
+    Wallets of different currencies may share one address, its balance is
+    swept once.
+    """
+    unique_wallets = {}
+    for wallet in wallets:
+        address = wallet.address.lower()
+        if address != destination.lower():
+            unique_wallets.setdefault(address, wallet)
+    return list(unique_wallets.values())
+
+
+def _get_sign_params(
+    nonce: int,
+    value: int,
+    destination: str,
+    fees: Fees,
+) -> Dict[str, Any]:
+    """Get params of transaction sweeping value to destination."""
+    defaults = settings.ETHEREUM_TRANSACTIONS_DEFAULTS
+    return {
+        'nonce': nonce,
+        'maxFeePerGas': fees.max_fee_per_gas,
+        'maxPriorityFeePerGas': fees.max_priority_fee_per_gas,
+        'gas': settings.ETHEREUM_TRANSFER_GAS,
+        'to': destination,
+        'value': value,
+        'data': b'',
+        'type': defaults['type'],
+        'chainId': defaults['chainId'],
+    }
+
+
+def _sign(
+    transfers: List[Tuple[Wallet, Dict[str, Any]]],
+) -> List[Tuple[bytes, str]]:
+    """Sign transfers, by a process pool when there are many of them.
+
+    Few transfers are signed in this process with cached accounts. Workers
+    get encrypted private keys and decrypt them themselves, so plaintext
+    keys are never pickled.
+    """
+    chunk_size = settings.WALLET_SWEEP_SIGN_CHUNK_SIZE
+    processes = settings.WALLET_SWEEP_SIGN_PROCESSES or os.cpu_count() or 1
+    if processes == 1 or len(transfers) <= chunk_size:
+        signed = []
+        for wallet, params in transfers:
+            signed_transaction = sign_transaction(wallet, params)
+            signed.append((
+                bytes(signed_transaction.rawTransaction),
+                signed_transaction.hash.hex(),
+            ))
+        return signed
+    transactions = [
+        (
+            params,
+            wallet.private_key.encrypted_value,
+            wallet.private_key.encryptor,
+        )
+        for wallet, params in transfers
+    ]
+    chunks = (
+        transactions[start:start + chunk_size]
+        for start in range(0, len(transactions), chunk_size)
+    )
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=django.setup,
+    ) as executor:
+        return list(chain.from_iterable(executor.map(_sign_secrets, chunks)))
+
+
+def _sign_secrets(
+    transactions: List[Tuple[
+        Dict[str, Any],
+        bytes,
+        Type[WalletSecretEncryptorInterface],
+    ]],
+) -> List[Tuple[bytes, str]]:
+    """Sign transactions with encrypted private keys in a worker process."""
+    return sign_transactions(
+        (params, encryptor.decrypt(encrypted_value))
+        for params, encrypted_value, encryptor in transactions
+    )
+
+
+def _broadcast(raw_transactions: List[bytes]) -> List[Optional[str]]:
+    """Send raw transactions, get error of every failed one."""
+    w3 = get_w3()
+
+    def send(raw_transaction: bytes) -> Optional[str]:
+        try:
+            w3.eth.send_raw_transaction(raw_transaction)
+        except Exception as exc:
+            return str(exc) or exc.__class__.__name__
+        return None
+
+    if not raw_transactions:
+        return []
+    concurrency = settings.WALLET_SWEEP_BROADCAST_CONCURRENCY
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(copy_context().run, send, raw_transaction)
+            for raw_transaction in raw_transactions
+        ]
+        return [future.result() for future in futures]
+
+
+def _get_report(
+    wallet: Wallet,
+    status: str,
+    hash_: Optional[str] = None,
+    nonce: Optional[int] = None,
+    value: Optional[int] = None,
+    error: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Get sweep result of one wallet."""
+    return {
+        'address': wallet.address,
+        'status': status,
+        'hash': hash_,
+        'nonce': nonce,
+        'value': value,
+        'error': error,
+    }
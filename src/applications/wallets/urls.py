@@ -1,10 +1,14 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from applications.wallets.views import WalletViewSet
+from applications.wallets.views import WalletViewSet, transfer_async
 
 app_name = 'wallets'
 
 router = DefaultRouter()
 router.register(r'', WalletViewSet, basename='wallets')
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('transfer-async/', transfer_async, name='wallets-transfer-async'),
+    *router.urls,
+]
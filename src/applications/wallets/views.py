@@ -1,11 +1,42 @@
+import hashlib
+import json
+from itertools import chain
+from typing import Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Max
+from django.http import (HttpRequest, HttpResponse, HttpResponseNotAllowed,
+                         JsonResponse, StreamingHttpResponse)
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.mixins import CreateModelMixin, ListModelMixin
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
-from applications.wallets.models import Wallet
-from applications.wallets.serializers import (WalletSerializer,
+from applications.wallets.balances import get_balances
+from applications.wallets.bulk import create_wallets
+from applications.wallets.changes import get_wallet_changes
+from applications.wallets.export import (EXPORT_CONTENT_TYPES,
+                                         EXPORT_RENDERERS, export_wallets)
+from applications.wallets.models import Wallet, WalletTransaction
+from applications.wallets.pagination import WalletCursorPagination
+from applications.wallets.serializers import (AsyncWalletTransferSerializer,
+                                              WalletBalanceBatchSerializer,
+                                              WalletBalanceQuerySerializer,
+                                              WalletBalanceSerializer,
+                                              WalletBulkCreateSerializer,
+                                              WalletSerializer,
+                                              WalletSweepSerializer,
+                                              WalletTransactionSerializer,
                                               WalletTransferSerializer)
+from applications.wallets.sweep import sweep_wallets
 
 
 class WalletViewSet(CreateModelMixin, ListModelMixin, GenericViewSet):
@@ -13,6 +44,36 @@ class WalletViewSet(CreateModelMixin, ListModelMixin, GenericViewSet):
 
     queryset = Wallet.objects.all()
     serializer_class = WalletSerializer
+    pagination_class = WalletCursorPagination
+
+    def get_queryset(self):
+        """Filter wallets by currency query param."""
+        queryset = super().get_queryset()
+        currency = self.request.query_params.get('currency')
+        if currency:
+            queryset = queryset.filter(currency=currency)
+        return queryset
+
+    def list(self, request, *args, **kwargs) -> HttpResponse:
+        """List wallets, 304 Not Modified if the page has not changed.
+
+        Rendered pages are kept in settings.WALLET_LIST_CACHE when it is set.
+        Both are off unless settings.WALLET_LIST_CONDITIONAL_GET is on.
+        """
+        if not settings.WALLET_LIST_CONDITIONAL_GET:
+            return super().list(request, *args, **kwargs)
+        etag, last_modified = self._get_list_validators()
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        if response is None:
+            response = self._get_list_page(etag)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
 
     @action(
         methods=('post',),
@@ -25,3 +86,221 @@ class WalletViewSet(CreateModelMixin, ListModelMixin, GenericViewSet):
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data)
+
+    @action(
+        methods=('post',),
+        detail=False,
+        serializer_class=WalletBulkCreateSerializer,
+    )
+    def bulk(self, request, *args, **kwargs) -> HttpResponse:
+        """Create many wallets at once.
+
+        Large batches are committed and streamed as they are written.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        private_keys = serializer.get_private_keys()
+        currency = serializer.validated_data['currency']
+        threshold = settings.WALLET_BULK_CREATE_STREAM_THRESHOLD
+        if len(private_keys) >= threshold:
+            return StreamingHttpResponse(
+                self._stream_wallets(create_wallets(private_keys, currency)),
+                status=status.HTTP_201_CREATED,
+                content_type='application/json',
+            )
+        with transaction.atomic():
+            wallets = list(chain(*create_wallets(private_keys, currency)))
+        return Response(
+            WalletSerializer(wallets, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(
+        methods=('get',),
+        detail=False,
+        serializer_class=WalletBalanceSerializer,
+    )
+    def balances(self, request, *args, **kwargs) -> Response:
+        """Get balances (wei) of wallets by address query params."""
+        query_serializer = WalletBalanceQuerySerializer(
+            data={'address': request.query_params.getlist('address')},
+        )
+        query_serializer.is_valid(raise_exception=True)
+        wallets = list(
+            self.get_queryset().filter(
+                address__in=query_serializer.validated_data['address'],
+            ).only('address', 'currency'),
+        )
+        balances = get_balances(list({wallet.address for wallet in wallets}))
+        serializer = self.get_serializer(
+            wallets,
+            many=True,
+            context={**self.get_serializer_context(), 'balances': balances},
+        )
+        return Response(serializer.data)
+
+    @action(
+        methods=('post',),
+        detail=False,
+        url_path='balances/batch',
+        serializer_class=WalletBalanceBatchSerializer,
+    )
+    def balances_batch(self, request, *args, **kwargs) -> Response:
+        """Get balances (wei) of many wallets with batched JSON-RPC."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        balances = get_balances(serializer.get_wallets())
+        serializer.instance = {
+            'balances': balances,
+            'total': sum(balances.values()),
+        }
+        return Response(serializer.data)
+
+    @action(
+        methods=('post',),
+        detail=False,
+        serializer_class=WalletSweepSerializer,
+    )
+    def sweep(self, request, *args, **kwargs) -> Response:
+        """Transfer whole balances of many wallets to one destination.
+
+        Every selected wallet gets its result: sent, skipped or failed.
+        Passed addresses without a wallet are listed as missing.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        destination = serializer.validated_data['destination']
+        wallets = list(serializer.get_wallets())
+        serializer.instance = {
+            'destination': destination,
+            'results': sweep_wallets(wallets, destination),
+            'missing': serializer.get_missing_addresses(wallets),
+        }
+        return Response(serializer.data)
+
+    @action(
+        methods=('get',),
+        detail=False,
+        url_path=r'transactions/(?P<hash>0x[0-9a-fA-F]{64})',
+        serializer_class=WalletTransactionSerializer,
+    )
+    def transaction(self, request, hash, *args, **kwargs) -> Response:
+        """Get status of outgoing transaction stored by a transfer."""
+        wallet_transaction = get_object_or_404(
+            WalletTransaction.objects.select_related('wallet'),
+            hash=hash.lower(),
+        )
+        return Response(self.get_serializer(wallet_transaction).data)
+
+    @action(methods=('get',), detail=False)
+    def export(self, request, *args, **kwargs) -> HttpResponse:
+        """Stream address and currency of all wallets as NDJSON or CSV.
+
+        Output format is chosen with the output query param.
+        """
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_RENDERERS:
+            error_message = _('Unknown export format {0}.').format(
+                export_format,
+            )
+            raise ValidationError({'output': error_message})
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            export_wallets(
+                queryset,
+                export_format,
+                settings.WALLET_EXPORT_CHUNK_SIZE,
+            ),
+            content_type=EXPORT_CONTENT_TYPES[export_format],
+        )
+
+    def _get_list_validators(self) -> Tuple[str, Optional[int]]:
+        """Get ETag and Last-Modified time of the requested list page.
+
+        The fingerprint is the wallets change counter, the greatest wallet
+        id (read from the index instead of counting rows) and the page URL.
+        The id is read from the primary, replicas lagging by different
+        amounts would make the counter change back and forth.
+        """
+        max_id = Wallet.objects.using(DEFAULT_DB_ALIAS).aggregate(
+            max_id=Max('id'),
+        )['max_id']
+        changes, changed_at = get_wallet_changes(max_id)
+        fingerprint = '{0}:{1}:{2}:{3}'.format(
+            changes,
+            max_id,
+            self.request.accepted_renderer.format,
+            self.request.get_full_path(),
+        )
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        return etag, changed_at
+
+    def _get_list_page(self, etag: str) -> HttpResponse:
+        """Get rendered list page from cache or render it."""
+        page_cache = _get_list_cache()
+        cache_key = f'wallets:list:{etag}'
+        if page_cache is not None:
+            cached_page = page_cache.get(cache_key)
+            if cached_page is not None:
+                content, content_type = cached_page
+                return HttpResponse(content, content_type=content_type)
+        response = super().list(self.request)
+        if page_cache is not None:
+            response.add_post_render_callback(
+                lambda rendered_response: page_cache.set(
+                    cache_key,
+                    (
+                        rendered_response.content,
+                        rendered_response['Content-Type'],
+                    ),
+                    settings.WALLET_LIST_CACHE_TTL,
+                ),
+            )
+        return response
+
+    def _stream_wallets(
+        self,
+        batches: Iterator[List[Wallet]],
+    ) -> Iterator[str]:
+        """Render wallets as JSON array batch by batch."""
+        yield '['
+        separator = ''
+        for batch in batches:
+            if not batch:
+                continue
+            data = WalletSerializer(batch, many=True).data
+            yield separator + ','.join(json.dumps(item) for item in data)
+            separator = ','
+        yield ']'
+
+
+def _get_list_cache() -> Optional[BaseCache]:
+    """Get cache of rendered wallet list pages, None if it is off."""
+    if settings.WALLET_LIST_CACHE is None:
+        return None
+    return caches[settings.WALLET_LIST_CACHE]
+
+
+async def transfer_async(request: HttpRequest) -> HttpResponse:
+    """Transfer Ethereum from one wallet to another under ASGI.
+
+    Request and response are the same as for WalletViewSet.transfer.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(('POST',))
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError as exc:
+        return JsonResponse({'detail': str(exc)}, status=400)
+    serializer = AsyncWalletTransferSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+    try:
+        await serializer.avalidate()
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+    return JsonResponse(await serializer.asave())
+
+
+# Django 3.2 decorators wrap views into sync functions, so mark it directly.
+transfer_async.csrf_exempt = True  # type: ignore
@@ -11,6 +11,10 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from applications.wallets.fees import start_fee_oracle
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
 
 application = get_asgi_application()
+
+start_fee_oracle()
@@ -0,0 +1,256 @@
+"""Per-request accounting of SQL, private key crypto and JSON-RPC costs.
+
+RequestCostsMiddleware opens RequestCosts for every API call, the DB
+connections, the wallet encryptor and the Web3 clients add their calls to
+it. Totals are sent in Server-Timing header and logged.
+"""
+import asyncio
+import cProfile
+import logging
+import random
+import time
+from contextvars import ContextVar, Token
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponse
+from django.utils.text import slugify
+
+logger = logging.getLogger(__name__)
+
+COST_CATEGORIES = ('db', 'crypto', 'rpc')
+
+# Server-Timing descriptions of category counts.
+COST_UNITS = {
+    'db': 'queries',
+    'crypto': 'operations',
+    'rpc': 'round-trips',
+}
+
+_request_costs: ContextVar[Optional['RequestCosts']] = ContextVar(
+    'request_costs',
+    default=None,
+)
+
+
+class RequestCosts(object):
+    """Counts and seconds spent per cost category."""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = dict.fromkeys(COST_CATEGORIES, 0)
+        self.durations: Dict[str, float] = dict.fromkeys(COST_CATEGORIES, 0.0)
+
+    def record(self, category: str, duration: float) -> None:
+        """Add one call of category."""
+        self.counts[category] += 1
+        self.durations[category] += duration
+
+    def get_server_timing(self, total: float) -> str:
+        """Format costs as Server-Timing header value."""
+        metrics = [
+            '{0};desc="{1} {2}";dur={3:.2f}'.format(
+                category,
+                self.counts[category],
+                COST_UNITS[category],
+                self.durations[category] * 1000,
+            )
+            for category in COST_CATEGORIES
+        ]
+        metrics.append('total;dur={0:.2f}'.format(total * 1000))
+        return ', '.join(metrics)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Get costs for structured logs, durations in milliseconds."""
+        costs: Dict[str, Any] = {}
+        for category in COST_CATEGORIES:
+            costs[f'{category}_count'] = self.counts[category]
+            costs[f'{category}_ms'] = round(
+                self.durations[category] * 1000,
+                2,
+            )
+        return costs
+
+
+def get_request_costs() -> Optional[RequestCosts]:
+    """Get costs of the current request, None outside of requests."""
+    return _request_costs.get()
+
+
+def record_cost(category: str, started: float) -> None:
+    """Add call of category started at perf_counter() value."""
+    costs = _request_costs.get()
+    if costs is not None:
+        costs.record(category, time.perf_counter() - started)
+
+
+def install_query_costs(connection: BaseDatabaseWrapper, **kwargs) -> None:
+    """Add SQL queries made by connection to request costs."""
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _record_query(execute, sql, params, many, context):
+    """Add query to request costs."""
+    if _request_costs.get() is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record_cost('db', started)
+
+
+def rpc_costs_middleware(
+    make_request: Callable[[str, Any], Any],
+    w3: Any,
+) -> Callable[[str, Any], Any]:
+    """Web3 middleware adding JSON-RPC round-trips to request costs."""
+
+    def middleware(method: str, params: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return make_request(method, params)
+        finally:
+            record_cost('rpc', started)
+
+    return middleware
+
+
+async def async_rpc_costs_middleware(
+    make_request: Callable[[str, Any], Any],
+    w3: Any,
+) -> Callable[[str, Any], Any]:
+    """Asynchronous version of rpc_costs_middleware."""
+
+    async def middleware(method: str, params: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await make_request(method, params)
+        finally:
+            record_cost('rpc', started)
+
+    return middleware
+
+
+class RequestCostsMiddleware(object):
+    """Account costs of API calls and profile sampled slow requests."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Django 3.2 detects async middleware by this marker.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request: HttpRequest) -> Any:
+        """Run request with costs accounting."""
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not settings.REQUEST_COSTS_ENABLED:
+            return self.get_response(request)
+        for connection in connections.all():
+            install_query_costs(connection)
+        costs, token, profiler = self._start()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            self._stop(token, profiler)
+        return self._finish(request, response, costs, profiler, started)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """Run asynchronous request with costs accounting."""
+        if not settings.REQUEST_COSTS_ENABLED:
+            return await self.get_response(request)
+        costs, token, profiler = self._start()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._stop(token, profiler)
+        return self._finish(request, response, costs, profiler, started)
+
+    def _start(self) -> Tuple[RequestCosts, Token, Optional[cProfile.Profile]]:
+        """Open request costs and start sampled profiler."""
+        costs = RequestCosts()
+        token = _request_costs.set(costs)
+        profiler = self._get_profiler()
+        if profiler is not None:
+            profiler.enable()
+        return costs, token, profiler
+
+    def _stop(
+        self,
+        token: Token,
+        profiler: Optional[cProfile.Profile],
+    ) -> None:
+        """Close request costs and stop profiler."""
+        if profiler is not None:
+            profiler.disable()
+        _request_costs.reset(token)
+
+    def _finish(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        costs: RequestCosts,
+        profiler: Optional[cProfile.Profile],
+        started: float,
+    ) -> HttpResponse:
+        """Send costs in header, log them and save profile."""
+        total = time.perf_counter() - started
+        response['Server-Timing'] = costs.get_server_timing(total)
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            **costs.as_dict(),
+        }
+        logger.info(
+            'request costs %s',
+            ' '.join(f'{name}={value}' for name, value in fields.items()),
+            extra=fields,
+        )
+        if profiler is not None:
+            self._dump_profile(profiler, request, total)
+        return response
+
+    def _get_profiler(self) -> Optional[cProfile.Profile]:
+        """Get profiler for a sampled request."""
+        sample_rate = settings.REQUEST_PROFILE_SAMPLE_RATE
+        if sample_rate and random.random() < sample_rate:
+            return cProfile.Profile()
+        return None
+
+    def _dump_profile(
+        self,
+        profiler: cProfile.Profile,
+        request: HttpRequest,
+        total: float,
+    ) -> None:
+        """Save profile of request slower than REQUEST_PROFILE_MIN_DURATION."""
+        if total < settings.REQUEST_PROFILE_MIN_DURATION:
+            return
+        directory = Path(settings.REQUEST_PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / '{0}-{1}-{2}.prof'.format(
+            int(time.time() * 1000),
+            request.method.lower(),
+            slugify(request.path) or 'root',
+        )
+        profiler.dump_stats(path)
+        logger.info(
+            'slow request profiled',
+            extra={'path': request.path, 'profile': str(path)},
+        )
+
+
+# Connections opened later, in any thread, are instrumented on creation.
+connection_created.connect(install_query_costs)
@@ -0,0 +1,312 @@
+"""In-memory stand-in for an Ethereum JSON-RPC node.
+
+It answers the calls made by the service, so it can be load-tested end to
+end without a real provider. Every sent transaction is mined at once in a
+new block. Signatures, nonces, intrinsic gas and funds are checked like an
+automining node does, so transactions after a nonce gap are rejected instead
+of being held back until the gap is filled. Senders are debited by the
+value and the whole gas limit at the effective gas price, recipients are
+credited by the value.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import rlp
+from eth_account import Account
+from eth_utils import big_endian_to_int, keccak, to_bytes, to_checksum_address
+
+logger = logging.getLogger(__name__)
+
+# Gas used by a plain ether transfer.
+INTRINSIC_GAS = 21000
+
+# Transaction fields positions in RLP lists of transaction types.
+TRANSACTION_FIELDS = {
+    0: {'nonce': 0, 'gas_price': 1, 'gas': 2, 'to': 3, 'value': 4},
+    1: {'nonce': 1, 'gas_price': 2, 'gas': 3, 'to': 4, 'value': 5},
+    2: {'nonce': 1, 'gas_price': 3, 'gas': 4, 'to': 5, 'value': 6},
+}
+
+
+class DevNodeError(Exception):
+    """JSON-RPC error returned to the client."""
+
+    def __init__(self, message: str, code: int = -32000):
+        super().__init__(message)
+        self.code = code
+
+
+class DevNode(object):
+    """Chain state kept in memory and JSON-RPC methods over it.
+
+    Unknown accounts hold default_balance. Each call fails with probability
+    error_rate, every HTTP request is delayed by latency seconds.
+    """
+
+    def __init__(
+        self,
+        default_balance: int = 10 ** 20,
+        base_fee: int = 1000000000,
+        priority_fee: int = 2000000000,
+        chain_id: int = 1,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+    ):
+        self.default_balance = default_balance
+        self.base_fee = base_fee
+        self.priority_fee = priority_fee
+        self.chain_id = chain_id
+        self.latency = latency
+        self.error_rate = error_rate
+        self.block_number = 0
+        self.balances: Dict[str, int] = {}
+        self.nonces: Dict[str, int] = {}
+        self.receipts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._methods: Dict[str, Callable[..., Any]] = {
+            'eth_blockNumber': self.eth_block_number,
+            'eth_chainId': self.eth_chain_id,
+            'net_version': self.net_version,
+            'eth_getBalance': self.eth_get_balance,
+            'eth_getTransactionCount': self.eth_get_transaction_count,
+            'eth_gasPrice': self.eth_gas_price,
+            'eth_maxPriorityFeePerGas': self.eth_max_priority_fee_per_gas,
+            'eth_feeHistory': self.eth_fee_history,
+            'eth_sendRawTransaction': self.eth_send_raw_transaction,
+            'eth_getTransactionReceipt': self.eth_get_transaction_receipt,
+        }
+
+    def handle(
+        self,
+        payload: Union[Dict[str, Any], List[Dict[str, Any]]],
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """Answer JSON-RPC request or batch."""
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(payload, list):
+            return [self._handle_call(call) for call in payload]
+        return self._handle_call(payload)
+
+    def eth_block_number(self) -> str:
+        """Get number of the latest block."""
+        return hex(self.block_number)
+
+    def eth_chain_id(self) -> str:
+        """Get chain id."""
+        return hex(self.chain_id)
+
+    def net_version(self) -> str:
+        """Get network id."""
+        return str(self.chain_id)
+
+    def eth_get_balance(self, address: str, block: Any = 'latest') -> str:
+        """Get balance (wei) of address."""
+        return hex(self._get_balance(address))
+
+    def eth_get_transaction_count(
+        self,
+        address: str,
+        block: Any = 'latest',
+    ) -> str:
+        """Get nonce of address, pending and latest are the same."""
+        return hex(self.nonces.get(address.lower(), 0))
+
+    def eth_gas_price(self) -> str:
+        """Get legacy gas price."""
+        return hex(self.base_fee + self.priority_fee)
+
+    def eth_max_priority_fee_per_gas(self) -> str:
+        """Get suggested priority fee."""
+        return hex(self.priority_fee)
+
+    def eth_fee_history(
+        self,
+        block_count: Union[int, str],
+        newest_block: Any,
+        reward_percentiles: Optional[List[float]] = None,
+    ) -> Dict[str, Any]:
+        """Get constant fee history of recent blocks."""
+        if isinstance(block_count, str):
+            block_count = int(block_count, 16)
+        block_count = max(1, min(block_count, self.block_number + 1))
+        percentiles = reward_percentiles or []
+        return {
+            'oldestBlock': hex(self.block_number - block_count + 1),
+            'baseFeePerGas': [hex(self.base_fee)] * (block_count + 1),
+            'gasUsedRatio': [0.5] * block_count,
+            'reward': [
+                [hex(self.priority_fee)] * len(percentiles)
+            ] * block_count,
+        }
+
+    def eth_send_raw_transaction(self, raw_transaction: str) -> str:
+        """Mine transaction in a new block."""
+        raw = to_bytes(hexstr=raw_transaction)
+        try:
+            sender = Account.recover_transaction(raw).lower()
+            transaction = decode_transaction(raw)
+        except Exception as exc:
+            raise DevNodeError(f'invalid transaction: {exc}')
+        transaction_hash = '0x' + keccak(raw).hex()
+        with self._lock:
+            balance = self._get_balance(sender)
+            check_transaction(
+                transaction,
+                balance,
+                self.nonces.get(sender, 0),
+            )
+            gas_price = min(
+                transaction['gas_price'],
+                self.base_fee + self.priority_fee,
+            )
+            self.balances[sender] = (
+                balance
+                - transaction['value']
+                - transaction['gas'] * gas_price
+            )
+            recipient = transaction['to']
+            if recipient:
+                self.balances[recipient] = (
+                    self._get_balance(recipient) + transaction['value']
+                )
+            self.nonces[sender] = transaction['nonce'] + 1
+            self.block_number += 1
+            self.receipts[transaction_hash] = {
+                'transactionHash': transaction_hash,
+                'transactionIndex': '0x0',
+                'blockHash': '0x' + keccak(
+                    self.block_number.to_bytes(32, 'big'),
+                ).hex(),
+                'blockNumber': hex(self.block_number),
+                'from': to_checksum_address(sender),
+                'to': to_checksum_address(recipient) if recipient else None,
+                'cumulativeGasUsed': hex(transaction['gas']),
+                'gasUsed': hex(transaction['gas']),
+                'effectiveGasPrice': hex(gas_price),
+                'contractAddress': None,
+                'logs': [],
+                'logsBloom': '0x' + '00' * 256,
+                'status': '0x1',
+                'type': hex(transaction['type']),
+            }
+        return transaction_hash
+
+    def eth_get_transaction_receipt(
+        self,
+        transaction_hash: str,
+    ) -> Optional[Dict[str, Any]]:
+        """Get receipt of a mined transaction."""
+        return self.receipts.get(transaction_hash.lower())
+
+    def _get_balance(self, address: str) -> int:
+        """Get balance of address, default for unknown ones."""
+        return self.balances.get(address.lower(), self.default_balance)
+
+    def _handle_call(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer one JSON-RPC call."""
+        response: Dict[str, Any] = {'jsonrpc': '2.0', 'id': call.get('id')}
+        method = self._methods.get(call.get('method'))
+        try:
+            if method is None:
+                raise DevNodeError(
+                    f'the method {call.get("method")} does not exist',
+                    code=-32601,
+                )
+            if self.error_rate and random.random() < self.error_rate:
+                raise DevNodeError('injected error')
+            response['result'] = method(*call.get('params', []))
+        except DevNodeError as exc:
+            response['error'] = {'code': exc.code, 'message': str(exc)}
+        except Exception as exc:
+            response['error'] = {'code': -32602, 'message': str(exc)}
+        return response
+
+
+class DevNodeRequestHandler(BaseHTTPRequestHandler):
+    """Serve JSON-RPC requests of the server's node."""
+
+    server: 'DevNodeServer'
+
+    def do_POST(self) -> None:
+        """Answer JSON-RPC request."""
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._send_json(
+                {
+                    'jsonrpc': '2.0',
+                    'id': None,
+                    'error': {'code': -32700, 'message': 'parse error'},
+                },
+            )
+            return
+        self._send_json(self.server.node.handle(payload))
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Log requests to debug level instead of stderr."""
+        logger.debug(format, *args)
+
+    def _send_json(self, data: Any) -> None:
+        """Send JSON response."""
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class DevNodeServer(ThreadingHTTPServer):
+    """Threaded HTTP server of a DevNode."""
+
+    daemon_threads = True
+
+    def __init__(self, address, node: DevNode):
+        super().__init__(address, DevNodeRequestHandler)
+        self.node = node
+
+
+def check_transaction(
+    transaction: Dict[str, Any],
+    balance: int,
+    nonce: int,
+) -> None:
+    """Reject decoded transaction a node would not mine now.
+
+    nonce is the next nonce of the sender, balance is its balance.
+    """
+    if transaction['nonce'] < nonce:
+        raise DevNodeError('nonce too low')
+    if transaction['nonce'] > nonce:
+        raise DevNodeError(
+            f'nonce too high: expected {nonce}, got {transaction["nonce"]}',
+        )
+    if transaction['gas'] < INTRINSIC_GAS:
+        raise DevNodeError('intrinsic gas too low')
+    cost = transaction['value'] + transaction['gas'] * transaction['gas_price']
+    if cost > balance:
+        raise DevNodeError('insufficient funds for gas * price + value')
+
+
+def decode_transaction(raw: bytes) -> Dict[str, Any]:
+    """Decode fields of legacy or typed raw transaction."""
+    if raw[0] > 0x7f:
+        transaction_type, fields = 0, rlp.decode(raw)
+    else:
+        transaction_type, fields = raw[0], rlp.decode(raw[1:])
+    positions = TRANSACTION_FIELDS[transaction_type]
+    to = fields[positions['to']]
+    return {
+        'type': transaction_type,
+        'nonce': big_endian_to_int(fields[positions['nonce']]),
+        'gas_price': big_endian_to_int(fields[positions['gas_price']]),
+        'gas': big_endian_to_int(fields[positions['gas']]),
+        'to': '0x' + to.hex() if to else None,
+        'value': big_endian_to_int(fields[positions['value']]),
+    }
@@ -0,0 +1,288 @@
+"""Process-wide metrics rendered in Prometheus text format.
+
+Metrics are kept in memory of each worker process. Recording is skipped
+entirely while settings.METRICS_ENABLED is off.
+"""
+import math
+import threading
+import time
+from typing import (TYPE_CHECKING, Any, Callable, Dict, List, Optional,
+                    Sequence, Tuple)
+
+from django.conf import settings
+
+if TYPE_CHECKING:
+    from web3 import Web3
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds (seconds) of latency histogram buckets.
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Metric(object):
+    """Base of metrics with labelled values."""
+
+    type_name = ''
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        """Get lines of text exposition format."""
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type_name}',
+            *self._render_samples(),
+        ]
+
+    def _render_samples(self) -> List[str]:
+        """Get sample lines."""
+        raise NotImplementedError
+
+    def _format_labels(self, labels: Tuple[str, ...], **extra: str) -> str:
+        """Format label pairs like {method="eth_call"}."""
+        pairs = [*zip(self.labelnames, labels), *extra.items()]
+        if not pairs:
+            return ''
+        return '{' + ','.join(
+            '{0}="{1}"'.format(name, _escape(value)) for name, value in pairs
+        ) + '}'
+
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+
+    type_name = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Increase value of labels."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        """Get value of labels."""
+        return self._values.get(labels, 0)
+
+    def _render_samples(self) -> List[str]:
+        """Get sample lines."""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f'{self.name}{self._format_labels(labels)} {_format(value)}'
+            for labels, value in values
+        ]
+
+
+class Histogram(Metric):
+    """Distribution of observed values over cumulative buckets."""
+
+    type_name = 'histogram'
+
+    def __init__(
+        self,
+        *args,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.buckets = (*sorted(buckets), math.inf)
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record value for labels."""
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            counts[-1] += value
+
+    def get_count(self, *labels: str) -> int:
+        """Get number of observed values of labels."""
+        return int(sum(self._values.get(labels, [0])[:-1]))
+
+    def _render_samples(self) -> List[str]:
+        """Get sample lines."""
+        with self._lock:
+            values = sorted(
+                (labels, list(counts))
+                for labels, counts in self._values.items()
+            )
+        lines = []
+        for labels, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket_labels = self._format_labels(labels, le=_format(bound))
+                lines.append(
+                    f'{self.name}_bucket{bucket_labels} {int(cumulative)}',
+                )
+            formatted_labels = self._format_labels(labels)
+            lines.append(
+                f'{self.name}_sum{formatted_labels} {_format(counts[-1])}',
+            )
+            lines.append(
+                f'{self.name}_count{formatted_labels} {int(cumulative)}',
+            )
+        return lines
+
+
+class Registry(object):
+    """Metrics of the process."""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Add metric to the exposition."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Get all metrics in Prometheus text format."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+RPC_REQUESTS = REGISTRY.register(Counter(
+    'w3_rpc_requests_total',
+    'JSON-RPC calls made to the node.',
+    ('method',),
+))
+RPC_ERRORS = REGISTRY.register(Counter(
+    'w3_rpc_errors_total',
+    'JSON-RPC calls failed or answered with an error.',
+    ('method',),
+))
+RPC_DURATION = REGISTRY.register(Histogram(
+    'w3_rpc_duration_seconds',
+    'Round-trip time of JSON-RPC requests, batches are labelled "batch".',
+    ('method',),
+))
+SECRET_OPERATIONS = REGISTRY.register(Counter(
+    'wallet_secret_operations_total',
+    'Private key encryptor calls.',
+    ('encryptor', 'operation'),
+))
+SECRET_ERRORS = REGISTRY.register(Counter(
+    'wallet_secret_errors_total',
+    'Private key encryptor calls which failed.',
+    ('encryptor', 'operation'),
+))
+
+
+def metrics_enabled() -> bool:
+    """Check that metrics are recorded."""
+    return settings.METRICS_ENABLED
+
+
+def record_rpc(
+    method: str,
+    duration: float,
+    failed: bool,
+) -> None:
+    """Record JSON-RPC request."""
+    RPC_REQUESTS.inc(method)
+    RPC_DURATION.observe(duration, method)
+    if failed:
+        RPC_ERRORS.inc(method)
+
+
+def record_rpc_batch(
+    calls: Sequence[Tuple[str, Any]],
+    duration: float,
+    responses: Optional[Sequence[Dict[str, Any]]],
+) -> None:
+    """Record JSON-RPC batch, responses are None when it failed."""
+    RPC_DURATION.observe(duration, 'batch')
+    for index, (method, _) in enumerate(calls):
+        RPC_REQUESTS.inc(method)
+        if responses is None or 'error' in responses[index]:
+            RPC_ERRORS.inc(method)
+
+
+def rpc_metrics_middleware(
+    make_request: Callable[[str, Any], Any],
+    w3: 'Web3',
+) -> Callable[[str, Any], Any]:
+    """Web3 middleware recording count, latency and errors per method."""
+
+    def middleware(method: str, params: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            response = make_request(method, params)
+        except Exception:
+            record_rpc(method, time.perf_counter() - started, failed=True)
+            raise
+        record_rpc(
+            method,
+            time.perf_counter() - started,
+            failed='error' in response,
+        )
+        return response
+
+    return middleware
+
+
+async def async_rpc_metrics_middleware(
+    make_request: Callable[[str, Any], Any],
+    w3: 'Web3',
+) -> Callable[[str, Any], Any]:
+    """Asynchronous version of rpc_metrics_middleware."""
+
+    async def middleware(method: str, params: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            response = await make_request(method, params)
+        except Exception:
+            record_rpc(method, time.perf_counter() - started, failed=True)
+            raise
+        record_rpc(
+            method,
+            time.perf_counter() - started,
+            failed='error' in response,
+        )
+        return response
+
+    return middleware
+
+
+def _escape(value: str) -> str:
+    """Escape label value."""
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\n', '\\n')
+        .replace('"', '\\"')
+    )
+
+
+def _format(value: float) -> str:
+    """Format sample value."""
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -0,0 +1,160 @@
+"""Routing of read queries to database replicas.
+
+Reads of settings.DATABASE_REPLICA_APPS models go to a random replica of
+settings.DATABASE_REPLICAS. They stay on the primary inside transactions,
+after the current request has written anything and while every replica
+lags behind by more than settings.DATABASE_REPLICA_MAX_LAG seconds.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.models import Model
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# Seconds PostgreSQL replica is behind the primary, 0 when it has replayed
+# everything it received.
+POSTGRESQL_LAG_SQL = (
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() '
+    'THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM '
+    'now() - pg_last_xact_replay_timestamp()), 0) END'
+)
+
+_use_primary: ContextVar[bool] = ContextVar('use_primary', default=False)
+
+
+class ReplicaLagMonitor(object):
+    """Replication lag of replicas measured at most once per interval."""
+
+    def __init__(self):
+        self._lags: Dict[str, Tuple[Optional[float], float]] = {}
+        self._lock = threading.Lock()
+
+    def is_fresh(self, alias: str) -> bool:
+        """Check that replica is reachable and lags less than allowed."""
+        max_lag = settings.DATABASE_REPLICA_MAX_LAG
+        if max_lag is None:
+            return True
+        lag = self.get_lag(alias)
+        return lag is not None and lag <= max_lag
+
+    def get_lag(self, alias: str) -> Optional[float]:
+        """Get lag (seconds) of replica, None when it can't be measured."""
+        now = time.monotonic()
+        with self._lock:
+            lag, checked_at = self._lags.get(alias, (None, -float('inf')))
+            if now - checked_at < settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL:
+                return lag
+            # Other threads use the last value while this one measures.
+            self._lags[alias] = (lag, now)
+        lag = self._measure_lag(alias)
+        with self._lock:
+            self._lags[alias] = (lag, now)
+        return lag
+
+    def _measure_lag(self, alias: str) -> Optional[float]:
+        """Ask replica for its lag."""
+        connection = connections[alias]
+        if connection.vendor != 'postgresql':
+            return 0.0
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(POSTGRESQL_LAG_SQL)
+                return float(cursor.fetchone()[0])
+        except DatabaseError:
+            logger.warning('Replica %s lag check failed', alias, exc_info=True)
+            return None
+
+
+class ReplicaRouter(object):
+    """Send reads to replicas and writes to the primary database."""
+
+    def __init__(self):
+        self.lag_monitor = ReplicaLagMonitor()
+
+    def db_for_read(self, model: Type[Model], **hints: Any) -> Optional[str]:
+        """Choose replica for read of model."""
+        if not self._is_replicated(model) or self._must_use_primary():
+            return DEFAULT_DB_ALIAS
+        replicas = self._get_fresh_replicas()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model: Type[Model], **hints: Any) -> str:
+        """Write to the primary, later reads of the request follow it."""
+        _use_primary.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> bool:
+        """Allow relations, replicas hold the same data as the primary."""
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> bool:
+        """Migrate the primary only, replicas are copies of it."""
+        return db not in settings.DATABASE_REPLICAS
+
+    def _is_replicated(self, model: Type[Model]) -> bool:
+        """Check that reads of model may go to replicas."""
+        return (
+            bool(settings.DATABASE_REPLICAS)
+            and model._meta.app_label in settings.DATABASE_REPLICA_APPS
+        )
+
+    def _must_use_primary(self) -> bool:
+        """Check that read must see writes of the primary."""
+        return (
+            _use_primary.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        )
+
+    def _get_fresh_replicas(self) -> List[str]:
+        """Get replicas which lag is acceptable."""
+        return [
+            alias for alias in settings.DATABASE_REPLICAS
+            if self.lag_monitor.is_fresh(alias)
+        ]
+
+
+class ReplicaRoutingMiddleware(object):
+    """Start every request with reads allowed to go to replicas."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Django 3.2 detects async middleware by this marker.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request: HttpRequest) -> Any:
+        """Run request with its own primary pinning."""
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = _use_primary.set(False)
+        try:
+            return self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """Run asynchronous request with its own primary pinning."""
+        token = _use_primary.set(False)
+        try:
+            return await self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+
+
+def use_primary() -> None:
+    """Send the following reads of the current context to the primary."""
+    _use_primary.set(True)
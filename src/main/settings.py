@@ -21,11 +21,30 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Environment defaults
 env = environ.Env(
     DEFAULT_DATABASE=(str, f'sqlite://{BASE_DIR / "db.sqlite3"}'),
+    REPLICA_DATABASES=(list, []),
+    DATABASE_REPLICA_MAX_LAG=(float, 5.0),
     SECRET_KEY=(str, 'mysecretkey'),
     DEBUG=(bool, True),
     ALLOWED_HOSTS=(list, ['127.0.0.1']),
     FERNET_KEY=(str, ''),
+    FERNET_KEYS=(list, []),
+    AES_GCM_KEYS=(list, []),
+    WALLET_PRIVATE_KEY_ENCRYPTOR=(
+        str,
+        'applications.wallets.encryptors.WalletSecretFernetEncryptor',
+    ),
     W3_PROVIDER_URL=(str, ''),
+    W3_PROVIDER_URLS=(list, []),
+    W3_PROVIDER_HEDGE_AFTER=(float, 0.0),
+    W3_PROVIDER_POOL_SIZE=(int, 10),
+    W3_PROVIDER_TIMEOUT=(float, 10.0),
+    CACHE_URL=(str, 'locmemcache://'),
+    WALLET_LIST_CACHE_URL=(str, ''),
+    METRICS_ENABLED=(bool, False),
+    REQUEST_COSTS_ENABLED=(bool, False),
+    REQUEST_PROFILE_SAMPLE_RATE=(float, 0.0),
+    REQUEST_PROFILE_MIN_DURATION=(float, 1.0),
+    REQUEST_PROFILE_DIR=(str, str(BASE_DIR.parent / 'profiles')),
 )
 environ.Env.read_env(str(BASE_DIR.parent / '.env'))
 
@@ -58,6 +77,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'main.costs.RequestCostsMiddleware',
+    'main.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -95,6 +116,57 @@ DATABASES = {
     'default': dj_database_url.config(default=env('DEFAULT_DATABASE')),
 }
 
+# Read replicas of the default database, comma separated URLs. Tests use
+# the default database instead of them.
+DATABASE_REPLICAS = []
+for index, replica_url in enumerate(env('REPLICA_DATABASES')):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **dj_database_url.parse(replica_url),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['main.routers.ReplicaRouter']
+
+# Apps which models are read from replicas.
+DATABASE_REPLICA_APPS = ('wallets',)
+
+# Reads go back to the primary while replicas lag behind by more than
+# DATABASE_REPLICA_MAX_LAG seconds (None turns the check off). Lag of each
+# replica is measured at most every DATABASE_REPLICA_LAG_CHECK_INTERVAL
+# seconds.
+DATABASE_REPLICA_MAX_LAG = env('DATABASE_REPLICA_MAX_LAG')
+DATABASE_REPLICA_LAG_CHECK_INTERVAL = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': env.cache('CACHE_URL'),
+}
+
+# ETag and Last-Modified of the wallet list rely on a change counter in the
+# default cache, so they are off when each process has its own cache. That
+# is the default CACHE_URL=locmemcache://, set it to a shared cache such as
+# redis:// to turn them on, the check wallets.W001 warns while they are off.
+WALLET_LIST_CONDITIONAL_GET = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Cache of rendered wallet list pages, e.g. locmemcache:// or
+# filecache:///var/tmp/wallet_list. Pages are not cached if it is not set
+# or WALLET_LIST_CONDITIONAL_GET is off.
+WALLET_LIST_CACHE = None
+if env('WALLET_LIST_CACHE_URL'):
+    CACHES['wallet_list'] = env.cache('WALLET_LIST_CACHE_URL')
+    WALLET_LIST_CACHE = 'wallet_list'
+
+# Seconds rendered wallet list pages are kept.
+WALLET_LIST_CACHE_TTL = 60
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -136,15 +208,136 @@ SPECTACULAR_SETTINGS = {
 
 FERNET_KEY = env('FERNET_KEY')
 
-WALLET_PRIVATE_KEY_ENCRYPTOR = (
-    'applications.wallets.encryptors.WalletSecretFernetEncryptor'
-)
+# Fernet keys, newest first. FERNET_KEY is used when the list is empty.
+FERNET_KEYS = env('FERNET_KEYS')
+
+# AES-GCM keys (32 bytes, urlsafe base64 like Fernet keys), newest first.
+AES_GCM_KEYS = env('AES_GCM_KEYS')
+
+# Fernet or applications.wallets.encryptors.WalletSecretAESGCMEncryptor.
+# The AES-GCM encryptor reads Fernet tokens too, rotate_wallet_keys
+# converts them while the service is running.
+WALLET_PRIVATE_KEY_ENCRYPTOR = env('WALLET_PRIVATE_KEY_ENCRYPTOR')
 
 W3_PROVIDER_URL = env('W3_PROVIDER_URL')
 
+# Keep-alive connections to the provider kept by each worker process.
+W3_PROVIDER_POOL_SIZE = env('W3_PROVIDER_POOL_SIZE')
+
+# Seconds to wait for the provider to respond.
+W3_PROVIDER_TIMEOUT = env('W3_PROVIDER_TIMEOUT')
+
+# Several providers, comma separated. Reads go to the fastest healthy one
+# and fail over to the others, transactions are sent to the first healthy
+# one. W3_PROVIDER_URL is used when the list is empty.
+W3_PROVIDER_URLS = env('W3_PROVIDER_URLS')
+
+# Seconds after which a read is sent to the second provider too, 0 turns
+# hedging off.
+W3_PROVIDER_HEDGE_AFTER = env('W3_PROVIDER_HEDGE_AFTER')
+
+# Failures in a row after which a provider is ejected and seconds it is
+# not used for.
+W3_PROVIDER_MAX_FAILURES = 3
+W3_PROVIDER_EJECT_SECONDS = 30
+
+# Bulk wallet creation: most wallets per request, rows per INSERT, address
+# derivation processes (cpu count if not set) and number of wallets from
+# which the response is streamed.
+WALLET_BULK_CREATE_MAX_WALLETS = 50000
+WALLET_BULK_CREATE_BATCH_SIZE = 1000
+WALLET_BULK_CREATE_PROCESSES = None
+WALLET_BULK_CREATE_STREAM_THRESHOLD = 1000
+
+# Rows fetched from the database per chunk by wallets export.
+WALLET_EXPORT_CHUNK_SIZE = 2000
+
+# Seconds the latest block number is trusted before asking the node again
+# and seconds cached wallet balances of a block are kept.
+WALLET_BALANCE_BLOCK_TTL = 3
+WALLET_BALANCE_CACHE_TTL = 60
+
+# Decrypted accounts of wallets kept by each worker process for signing
+# and seconds they are kept for. 0 size turns the cache off.
+WALLET_SIGNER_CACHE_SIZE = 10000
+WALLET_SIGNER_CACHE_TTL = 300
+
+# Most wallets which balances are read by one request.
+WALLET_BALANCE_MAX_ADDRESSES = 100
+
+# Most wallets which balances are read by one batch request, balances of
+# all wallets are read by the fetch_balances command.
+WALLET_BALANCE_BATCH_MAX_WALLETS = 2000
+
+# Balances asked from the node by one JSON-RPC batch and batches sent
+# concurrently.
+WALLET_BALANCE_BATCH_SIZE = 500
+WALLET_BALANCE_CONCURRENCY = 4
+
+# Fee oracle refreshes EIP-1559 fee estimates from eth_feeHistory every
+# FEE_ORACLE_INTERVAL seconds over FEE_ORACLE_BLOCK_COUNT recent blocks.
+# It runs in the background of WSGI and ASGI processes only, management
+# commands refresh estimates on demand at the same interval. Estimates older
+# than FEE_ORACLE_MAX_AGE seconds are replaced with
+# ETHEREUM_TRANSACTIONS_DEFAULTS fees.
+FEE_ORACLE_INTERVAL = 12
+FEE_ORACLE_BLOCK_COUNT = 10
+FEE_ORACLE_REWARD_PERCENTILE = 50
+FEE_ORACLE_MAX_AGE = 120
+
+# Record JSON-RPC and private key encryption metrics and serve them on
+# /metrics in Prometheus text format.
+METRICS_ENABLED = env('METRICS_ENABLED')
+
+# Count SQL queries, private key crypto and JSON-RPC round-trips of every
+# request, send them in Server-Timing header and log them.
+REQUEST_COSTS_ENABLED = env('REQUEST_COSTS_ENABLED')
+
+# Share of requests run under cProfile, profiles of those slower than
+# REQUEST_PROFILE_MIN_DURATION seconds are saved to REQUEST_PROFILE_DIR.
+REQUEST_PROFILE_SAMPLE_RATE = env('REQUEST_PROFILE_SAMPLE_RATE')
+REQUEST_PROFILE_MIN_DURATION = env('REQUEST_PROFILE_MIN_DURATION')
+REQUEST_PROFILE_DIR = env('REQUEST_PROFILE_DIR')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'main.costs': {
+            'handlers': ('console',),
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Sweep: most wallets per request, transactions signed by one worker
+# process (small sweeps are signed inline), signing processes (cpu count if
+# not set) and transactions broadcast concurrently.
+WALLET_SWEEP_MAX_WALLETS = 5000
+WALLET_SWEEP_SIGN_CHUNK_SIZE = 100
+WALLET_SWEEP_SIGN_PROCESSES = None
+WALLET_SWEEP_BROADCAST_CONCURRENCY = 8
+
+# Receipts of pending transactions asked by one JSON-RPC batch and seconds
+# between checks for a new block by poll_receipts command.
+WALLET_RECEIPT_BATCH_SIZE = 500
+WALLET_RECEIPT_POLL_INTERVAL = 2
+
+# Seconds after which a pending transaction unknown to the node is dropped.
+WALLET_RECEIPT_DROP_AFTER = 3600
+
+# Gas limit of plain ether transfer.
+ETHEREUM_TRANSFER_GAS = 21000
+
 ETHEREUM_TRANSACTIONS_DEFAULTS = {
     'maxFeePerGas': 3000000000,
     'maxPriorityFeePerGas': 2000000000,
     'type': 2,
-    'chanId': 1,
+    'chainId': 1,
 }
@@ -2,11 +2,14 @@ from django.conf import settings
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView
 
+from main import views
+
 urlpatterns = [
     path(
         'api/wallets',
         include('applications.wallets.urls', namespace='wallets'),
-    )
+    ),
+    path('metrics', views.metrics, name='metrics'),
 ]
 
 if settings.DEBUG:
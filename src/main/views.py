@@ -0,0 +1,10 @@
+from django.http import Http404, HttpRequest, HttpResponse
+
+from main.metrics import CONTENT_TYPE, REGISTRY, metrics_enabled
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    """Expose metrics of this process in Prometheus text format."""
+    if not metrics_enabled():
+        raise Http404
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
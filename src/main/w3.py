@@ -1,8 +1,693 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
+from contextvars import copy_context
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import requests
+from aiohttp import ClientTimeout
 from django.conf import settings
+from django.core.signals import setting_changed
+from requests.adapters import HTTPAdapter
 from web3 import Web3
+from web3._utils.encoding import FriendlyJsonSerde
+from web3.eth import AsyncEth
+from web3.providers.async_base import AsyncBaseProvider
+from web3.providers.async_rpc import AsyncHTTPProvider
+from web3.providers.base import BaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+from main.costs import (async_rpc_costs_middleware, record_cost,
+                        rpc_costs_middleware)
+from main.metrics import (async_rpc_metrics_middleware, metrics_enabled,
+                          record_rpc_batch, rpc_metrics_middleware)
+
+logger = logging.getLogger(__name__)
+
+_w3: Optional[Web3] = None
+_async_w3: Optional[Web3] = None
+_w3_lock = threading.Lock()
+
+W3_SETTINGS = (
+    'W3_PROVIDER_URL',
+    'W3_PROVIDER_URLS',
+    'W3_PROVIDER_POOL_SIZE',
+    'W3_PROVIDER_TIMEOUT',
+    'W3_PROVIDER_HEDGE_AFTER',
+    'W3_PROVIDER_MAX_FAILURES',
+    'W3_PROVIDER_EJECT_SECONDS',
+    'METRICS_ENABLED',
+)
+
+# Calls which change the chain state, they are never retried on another
+# provider nor hedged.
+BROADCAST_METHODS = frozenset((
+    'eth_sendRawTransaction',
+    'eth_sendTransaction',
+))
+
+# Weight of the latest round-trip in the provider latency average.
+LATENCY_SMOOTHING = 0.3
+
+# JSON-RPC error codes of provider trouble (limit exceeded, internal
+# error), reads answered with them fail over to another provider.
+RETRYABLE_ERROR_CODES = frozenset((-32005, -32603))
+
+
+class RetryableResponseError(Exception):
+    """Provider answered with an error worth trying another provider."""
+
+    def __init__(self, response: Any):
+        super().__init__(response)
+        self.response = response
+
+
+class PooledHTTPProvider(Web3.HTTPProvider):
+    """HTTP provider sending every request through one pooled session."""
+
+    def __init__(
+        self,
+        endpoint_uri: str,
+        session: requests.Session,
+        request_kwargs: Optional[Any] = None,
+    ):
+        super().__init__(endpoint_uri, request_kwargs)
+        self.session = session
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        """Send JSON-RPC request over a keep-alive connection."""
+        request_data = self.encode_rpc_request(method, params)
+        response = self.session.post(
+            self.endpoint_uri,
+            data=request_data,
+            **self.get_request_kwargs(),
+        )
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+    def make_batch_request(
+        self,
+        calls: Sequence[Tuple[RPCEndpoint, Any]],
+    ) -> List[RPCResponse]:
+        """Send several JSON-RPC requests as one batch.
+
+        Responses are returned in the same order as calls. A provider may
+        answer the whole batch with one error object (batch too large, rate
+        limited), it is returned as the response of every call, so
+        retryable ones fail over like errors of single requests.
+        """
+        batch = [
+            {
+                'jsonrpc': '2.0',
+                'method': method,
+                'params': params,
+                'id': next(self.request_counter),
+            }
+            for method, params in calls
+        ]
+        response = self.session.post(
+            self.endpoint_uri,
+            data=FriendlyJsonSerde().json_encode(batch).encode(),
+            **self.get_request_kwargs(),
+        )
+        response.raise_for_status()
+        decoded = self.decode_rpc_response(response.content)
+        if isinstance(decoded, dict) and 'error' in decoded:
+            return [
+                {
+                    'jsonrpc': '2.0',
+                    'id': request['id'],
+                    'error': decoded['error'],
+                }
+                for request in batch
+            ]
+        if not isinstance(decoded, list):
+            raise ValueError(f'Unexpected batch response: {decoded!r}')
+        responses = {
+            rpc_response.get('id'): rpc_response
+            for rpc_response in decoded
+            if isinstance(rpc_response, dict)
+        }
+        missing = [
+            request['id']
+            for request in batch
+            if request['id'] not in responses
+        ]
+        if missing:
+            raise ValueError(f'Batch response misses requests {missing}')
+        return [responses[request['id']] for request in batch]
+
+
+class ProviderEndpoint(object):
+    """Provider with its measured latency and health."""
+
+    def __init__(self, provider: Any):
+        self.provider = provider
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def is_healthy(self, now: float) -> bool:
+        """Check that endpoint is not ejected at monotonic time now."""
+        return self.ejected_until <= now
+
+
+class ProviderRouter(object):
+    """Order providers for calls and keep track of their health.
+
+    Reads go to the healthy provider with the lowest average latency,
+    providers not measured yet are tried first. Broadcasts go to the first
+    healthy provider in configured order. A provider failing max_failures
+    times in a row is ejected for eject_seconds and is tried again after.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[Any],
+        max_failures: int,
+        eject_seconds: float,
+    ):
+        self.endpoints = [ProviderEndpoint(provider) for provider in providers]
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self._lock = threading.Lock()
+
+    def get_read_endpoints(self) -> List[ProviderEndpoint]:
+        """Get endpoints in order to try for a read call.
+
+        Ejected endpoints come last, so calls are still tried when every
+        provider is ejected.
+        """
+        now = time.monotonic()
+        healthy = [
+            endpoint for endpoint in self.endpoints
+            if endpoint.is_healthy(now)
+        ]
+        healthy.sort(
+            key=lambda endpoint: (
+                endpoint.latency is not None,
+                endpoint.latency or 0.0,
+            ),
+        )
+        ejected = sorted(
+            (
+                endpoint for endpoint in self.endpoints
+                if not endpoint.is_healthy(now)
+            ),
+            key=lambda endpoint: endpoint.ejected_until,
+        )
+        return healthy + ejected
+
+    def get_broadcast_endpoint(self) -> ProviderEndpoint:
+        """Get endpoint for a call changing the chain state."""
+        now = time.monotonic()
+        for endpoint in self.endpoints:
+            if endpoint.is_healthy(now):
+                return endpoint
+        return self.endpoints[0]
+
+    def record_success(
+        self,
+        endpoint: ProviderEndpoint,
+        duration: float,
+    ) -> None:
+        """Update latency of endpoint and bring it back if ejected."""
+        with self._lock:
+            if endpoint.latency is None:
+                endpoint.latency = duration
+            else:
+                endpoint.latency += LATENCY_SMOOTHING * (
+                    duration - endpoint.latency
+                )
+            if endpoint.ejected_until:
+                logger.info('Provider %s recovered', _get_uri(endpoint))
+            endpoint.failures = 0
+            endpoint.ejected_until = 0.0
+
+    def record_failure(self, endpoint: ProviderEndpoint) -> None:
+        """Count failure of endpoint and eject it after too many."""
+        with self._lock:
+            endpoint.failures += 1
+            if endpoint.failures < self.max_failures:
+                return
+            endpoint.ejected_until = time.monotonic() + self.eject_seconds
+        logger.warning(
+            'Provider %s ejected for %ss after %s failures',
+            _get_uri(endpoint),
+            self.eject_seconds,
+            endpoint.failures,
+        )
+
+
+class RoutedHTTPProvider(BaseProvider):
+    """Provider spreading calls over several pooled HTTP providers.
+
+    Reads fail over to the next provider and, when hedge_after is set, a
+    read not answered in hedge_after seconds is sent to the second provider
+    as well and the first answer wins.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[PooledHTTPProvider],
+        session: requests.Session,
+        max_failures: int,
+        eject_seconds: float,
+        hedge_after: float = 0.0,
+    ):
+        self.router = ProviderRouter(providers, max_failures, eject_seconds)
+        self.session = session
+        self.hedge_after = hedge_after
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._hedge_slots = threading.BoundedSemaphore(
+            settings.W3_PROVIDER_POOL_SIZE,
+        )
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        """Send JSON-RPC request to the chosen provider."""
+        return self._route(
+            method in BROADCAST_METHODS,
+            lambda provider: provider.make_request(method, params),
+        )
+
+    def make_batch_request(
+        self,
+        calls: Sequence[Tuple[RPCEndpoint, Any]],
+    ) -> List[RPCResponse]:
+        """Send JSON-RPC batch to the chosen provider."""
+        return self._route(
+            any(method in BROADCAST_METHODS for method, _ in calls),
+            lambda provider: provider.make_batch_request(calls),
+        )
+
+    def isConnected(self) -> bool:
+        """Check that any provider is connected."""
+        return any(
+            endpoint.provider.isConnected()
+            for endpoint in self.router.endpoints
+        )
+
+    def _route(self, broadcast: bool, send: Callable[[Any], Any]) -> Any:
+        """Send call to providers in routing order."""
+        try:
+            if broadcast:
+                return self._send(self.router.get_broadcast_endpoint(), send)
+            endpoints = self.router.get_read_endpoints()
+            if self.hedge_after and len(endpoints) > 1:
+                return self._hedge(endpoints, send)
+            return self._fail_over(endpoints, send)
+        except RetryableResponseError as exc:
+            return exc.response
+
+    def _send(
+        self,
+        endpoint: ProviderEndpoint,
+        send: Callable[[Any], Any],
+    ) -> Any:
+        """Send call to endpoint and record its latency or failure.
+
+        Retryable error responses count as failures and are raised as
+        RetryableResponseError.
+        """
+        started = time.perf_counter()
+        try:
+            response = send(endpoint.provider)
+        except Exception:
+            self.router.record_failure(endpoint)
+            raise
+        if is_retryable_response(response):
+            self.router.record_failure(endpoint)
+            raise RetryableResponseError(response)
+        self.router.record_success(endpoint, time.perf_counter() - started)
+        return response
+
+    def _fail_over(
+        self,
+        endpoints: Sequence[ProviderEndpoint],
+        send: Callable[[Any], Any],
+        error: Optional[Exception] = None,
+    ) -> Any:
+        """Send call to endpoints one by one until one answers."""
+        for endpoint in endpoints:
+            try:
+                return self._send(endpoint, send)
+            except Exception as exc:
+                error = exc
+        raise error
+
+    def _hedge(
+        self,
+        endpoints: Sequence[ProviderEndpoint],
+        send: Callable[[Any], Any],
+    ) -> Any:
+        """Send call to the second endpoint too if the first is slow.
+
+        The call is not hedged while all hedging threads are busy, so
+        losing requests which still run can't pile up.
+        """
+        executor = self._get_executor()
+        first = self._submit(executor, endpoints[0], send)
+        if first is None:
+            return self._fail_over(endpoints, send)
+        try:
+            return first.result(timeout=self.hedge_after)
+        except FutureTimeoutError:
+            pass
+        except Exception as exc:
+            return self._fail_over(endpoints[1:], send, exc)
+        second = self._submit(executor, endpoints[1], send)
+        if second is None:
+            try:
+                return first.result()
+            except Exception as exc:
+                return self._fail_over(endpoints[1:], send, exc)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        return self._fail_over(endpoints[2:], send, error)
+
+    def _submit(
+        self,
+        executor: ThreadPoolExecutor,
+        endpoint: ProviderEndpoint,
+        send: Callable[[Any], Any],
+    ) -> Optional[Future]:
+        """Send call to endpoint in the executor, None if it is busy."""
+        if not self._hedge_slots.acquire(blocking=False):
+            return None
+        future = executor.submit(
+            copy_context().run,
+            self._send,
+            endpoint,
+            send,
+        )
+        future.add_done_callback(lambda _: self._hedge_slots.release())
+        return future
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get threads sending hedged reads."""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=settings.W3_PROVIDER_POOL_SIZE,
+                        thread_name_prefix='w3-hedge',
+                    )
+        return self._executor
+
+
+class RoutedAsyncHTTPProvider(AsyncBaseProvider):
+    """Asynchronous version of RoutedHTTPProvider."""
+
+    def __init__(
+        self,
+        providers: Sequence[AsyncHTTPProvider],
+        max_failures: int,
+        eject_seconds: float,
+        hedge_after: float = 0.0,
+    ):
+        super().__init__()
+        self.router = ProviderRouter(providers, max_failures, eject_seconds)
+        self.hedge_after = hedge_after
+
+    async def make_request(
+        self,
+        method: RPCEndpoint,
+        params: Any,
+    ) -> RPCResponse:
+        """Send JSON-RPC request to the chosen provider."""
+        try:
+            if method in BROADCAST_METHODS:
+                return await self._send(
+                    self.router.get_broadcast_endpoint(),
+                    method,
+                    params,
+                )
+            endpoints = self.router.get_read_endpoints()
+            if self.hedge_after and len(endpoints) > 1:
+                return await self._hedge(endpoints, method, params)
+            return await self._fail_over(endpoints, method, params)
+        except RetryableResponseError as exc:
+            return exc.response
+
+    async def isConnected(self) -> bool:
+        """Check that any provider is connected."""
+        for endpoint in self.router.endpoints:
+            if await endpoint.provider.isConnected():
+                return True
+        return False
+
+    async def _send(
+        self,
+        endpoint: ProviderEndpoint,
+        method: RPCEndpoint,
+        params: Any,
+    ) -> RPCResponse:
+        """Send request to endpoint and record its latency or failure."""
+        started = time.perf_counter()
+        try:
+            response = await endpoint.provider.make_request(method, params)
+        except Exception:
+            self.router.record_failure(endpoint)
+            raise
+        if is_retryable_response(response):
+            self.router.record_failure(endpoint)
+            raise RetryableResponseError(response)
+        self.router.record_success(endpoint, time.perf_counter() - started)
+        return response
+
+    async def _fail_over(
+        self,
+        endpoints: Sequence[ProviderEndpoint],
+        method: RPCEndpoint,
+        params: Any,
+        error: Optional[Exception] = None,
+    ) -> RPCResponse:
+        """Send request to endpoints one by one until one answers."""
+        for endpoint in endpoints:
+            try:
+                return await self._send(endpoint, method, params)
+            except Exception as exc:
+                error = exc
+        raise error
+
+    async def _hedge(
+        self,
+        endpoints: Sequence[ProviderEndpoint],
+        method: RPCEndpoint,
+        params: Any,
+    ) -> RPCResponse:
+        """Send request to the second endpoint too if the first is slow."""
+        first = asyncio.ensure_future(self._send(endpoints[0], method, params))
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(first),
+                self.hedge_after,
+            )
+        except asyncio.TimeoutError:
+            pass
+        except Exception as exc:
+            return await self._fail_over(endpoints[1:], method, params, exc)
+        pending = {
+            first,
+            asyncio.ensure_future(self._send(endpoints[1], method, params)),
+        }
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                if task.exception() is None:
+                    for task_left in pending:
+                        task_left.cancel()
+                    return task.result()
+                error = task.exception()
+        return await self._fail_over(endpoints[2:], method, params, error)
+
+
+def is_retryable_response(response: Any) -> bool:
+    """Check that response or any response of batch is a retryable error."""
+    responses = response if isinstance(response, list) else [response]
+    for rpc_response in responses:
+        if not isinstance(rpc_response, dict):
+            continue
+        error = rpc_response.get('error')
+        code = error.get('code') if isinstance(error, dict) else None
+        if code in RETRYABLE_ERROR_CODES:
+            return True
+    return False
+
+
+def get_provider_urls() -> List[str]:
+    """Get URLs of providers, W3_PROVIDER_URL if no list is configured."""
+    return list(settings.W3_PROVIDER_URLS) or [settings.W3_PROVIDER_URL]
 
 
 def get_w3() -> Web3:
-    """Returns Web3 connection Client."""
-    provider = Web3.HTTPProvider(settings.W3_PROVIDER_URL)
-    return Web3(provider)
+    """Returns Web3 connection Client shared by the whole process."""
+    global _w3
+    if _w3 is None:
+        with _w3_lock:
+            if _w3 is None:
+                _w3 = _create_w3()
+    return _w3
+
+
+def get_async_w3() -> Web3:
+    """Returns asynchronous Web3 client shared by the whole process."""
+    global _async_w3
+    if _async_w3 is None:
+        with _w3_lock:
+            if _async_w3 is None:
+                _async_w3 = _create_async_w3()
+    return _async_w3
+
+
+def batch_request(
+    w3: Web3,
+    calls: Sequence[Tuple[RPCEndpoint, Any]],
+) -> List[Any]:
+    """Make JSON-RPC calls in one round-trip and return their results."""
+    started = time.perf_counter()
+    try:
+        responses = w3.provider.make_batch_request(calls)
+    except Exception:
+        if metrics_enabled():
+            record_rpc_batch(calls, time.perf_counter() - started, None)
+        raise
+    finally:
+        record_cost('rpc', started)
+    if metrics_enabled():
+        record_rpc_batch(calls, time.perf_counter() - started, responses)
+    results = []
+    for response in responses:
+        if 'error' in response:
+            raise ValueError(response['error'])
+        results.append(response['result'])
+    return results
+
+
+def reset_w3() -> None:
+    """Drop the shared client, it is recreated on next get_w3() call."""
+    global _w3, _async_w3
+    with _w3_lock:
+        w3, _w3 = _w3, None
+        _async_w3 = None
+    if w3 is not None:
+        w3.provider.session.close()
+        executor = getattr(w3.provider, '_executor', None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def _reset_w3_after_fork() -> None:
+    """Forget the parent's client in a forked child.
+
+    The lock may be held by a parent thread which does not exist in the
+    child, so it is replaced instead of acquired. Sockets of the parent
+    are left open for the parent.
+    """
+    global _w3, _async_w3, _w3_lock
+    _w3 = None
+    _async_w3 = None
+    _w3_lock = threading.Lock()
+
+
+def _create_w3() -> Web3:
+    """Create Web3 client with pooled keep-alive session.
+
+    Calls are routed between providers when several are configured.
+    """
+    urls = get_provider_urls()
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=len(urls),
+        pool_maxsize=settings.W3_PROVIDER_POOL_SIZE,
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    providers = [
+        PooledHTTPProvider(
+            url,
+            session=session,
+            request_kwargs={'timeout': settings.W3_PROVIDER_TIMEOUT},
+        )
+        for url in urls
+    ]
+    provider = providers[0]
+    if len(providers) > 1:
+        provider = RoutedHTTPProvider(
+            providers,
+            session=session,
+            max_failures=settings.W3_PROVIDER_MAX_FAILURES,
+            eject_seconds=settings.W3_PROVIDER_EJECT_SECONDS,
+            hedge_after=settings.W3_PROVIDER_HEDGE_AFTER,
+        )
+    w3 = Web3(provider)
+    w3.middleware_onion.inject(rpc_costs_middleware, 'rpc_costs', layer=0)
+    if metrics_enabled():
+        w3.middleware_onion.inject(
+            rpc_metrics_middleware,
+            'rpc_metrics',
+            layer=0,
+        )
+    return w3
+
+
+def _create_async_w3() -> Web3:
+    """Create Web3 client for the event loop of ASGI application."""
+    providers = [
+        AsyncHTTPProvider(
+            url,
+            request_kwargs={
+                'timeout': ClientTimeout(total=settings.W3_PROVIDER_TIMEOUT),
+            },
+        )
+        for url in get_provider_urls()
+    ]
+    provider = providers[0]
+    if len(providers) > 1:
+        provider = RoutedAsyncHTTPProvider(
+            providers,
+            max_failures=settings.W3_PROVIDER_MAX_FAILURES,
+            eject_seconds=settings.W3_PROVIDER_EJECT_SECONDS,
+            hedge_after=settings.W3_PROVIDER_HEDGE_AFTER,
+        )
+    middlewares = [async_rpc_costs_middleware]
+    if metrics_enabled():
+        middlewares.append(async_rpc_metrics_middleware)
+    return Web3(
+        provider,
+        modules={'eth': (AsyncEth,)},
+        middlewares=middlewares,
+    )
+
+
+def _get_uri(endpoint: ProviderEndpoint) -> str:
+    """Get URL of endpoint provider."""
+    return getattr(endpoint.provider, 'endpoint_uri', repr(endpoint.provider))
+
+
+def _reset_w3_on_setting_changed(setting: str, **kwargs) -> None:
+    """Recreate client when provider settings are overridden."""
+    if setting in W3_SETTINGS:
+        reset_w3()
+
+
+setting_changed.connect(_reset_w3_on_setting_changed)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_w3_after_fork)
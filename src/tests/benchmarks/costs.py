@@ -0,0 +1,143 @@
+import json
+import os
+import secrets
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from eth_utils import to_bytes
+
+from applications.wallets.encryptors import WalletSecretFernetEncryptor
+from main.devnode import DevNodeError, check_transaction, decode_transaction
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+
+# Set to rewrite baseline.json with the measured costs.
+UPDATE_BASELINE_ENV = 'BENCHMARK_UPDATE_BASELINE'
+
+COST_NAMES = ('queries', 'encrypts', 'decrypts', 'rpc_requests', 'rpc_calls')
+
+
+class FakeNode(object):
+    """JSON-RPC node answering from memory and counting requests.
+
+    Sent transactions are checked for nonce, intrinsic gas and funds like the
+    dev node does. The nonce of accepted ones is counted, the balance is
+    never debited.
+
+    rpc_requests counts HTTP round-trips, rpc_calls counts JSON-RPC calls,
+    a batch is one request of several calls.
+    """
+
+    def __init__(self, balance: int = 10 ** 18, nonce: int = 0):
+        self.balance = balance
+        self.nonce = nonce
+        self.rpc_requests = 0
+        self.rpc_calls = 0
+
+    def make_request(self, method: str, params: List[Any]) -> Dict[str, Any]:
+        """Answer one JSON-RPC call."""
+        self.rpc_requests += 1
+        return self._get_response(0, method, params)
+
+    def make_batch_request(self, calls) -> List[Dict[str, Any]]:
+        """Answer JSON-RPC batch."""
+        self.rpc_requests += 1
+        return [
+            self._get_response(request_id, method, params)
+            for request_id, (method, params) in enumerate(calls)
+        ]
+
+    def _get_response(
+        self,
+        request_id: int,
+        method: str,
+        params: List[Any],
+    ) -> Dict[str, Any]:
+        """Get response of a call."""
+        self.rpc_calls += 1
+        if method == 'eth_sendRawTransaction':
+            try:
+                check_transaction(
+                    decode_transaction(to_bytes(hexstr=params[0])),
+                    self.balance,
+                    self.nonce,
+                )
+            except DevNodeError as exc:
+                return {
+                    'jsonrpc': '2.0',
+                    'id': request_id,
+                    'error': {'code': exc.code, 'message': str(exc)},
+                }
+            self.nonce += 1
+        results = {
+            'eth_blockNumber': hex(100),
+            'eth_chainId': hex(1),
+            'eth_getBalance': hex(self.balance),
+            'eth_getTransactionCount': hex(self.nonce),
+            'eth_sendRawTransaction': '0x' + secrets.token_hex(32),
+        }
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': results[method]}
+
+
+class CostCounter(object):
+    """Count SQL queries, private key crypto and RPC calls of a callable."""
+
+    def __init__(self, mocker, node: FakeNode):
+        self.node = node
+        self.encrypt = mocker.patch.object(
+            WalletSecretFernetEncryptor,
+            'encrypt',
+            wraps=WalletSecretFernetEncryptor.encrypt,
+        )
+        self.decrypt = mocker.patch.object(
+            WalletSecretFernetEncryptor,
+            'decrypt',
+            wraps=WalletSecretFernetEncryptor.decrypt,
+        )
+
+    @contextmanager
+    def count(self) -> Iterator[Dict[str, int]]:
+        """Count costs of the wrapped block into the yielded dict."""
+        costs: Dict[str, int] = {}
+        started = self._get_counts()
+        with CaptureQueriesContext(connection) as queries:
+            yield costs
+        finished = self._get_counts()
+        costs['queries'] = len(queries.captured_queries)
+        for name in COST_NAMES[1:]:
+            costs[name] = finished[name] - started[name]
+
+    def _get_counts(self) -> Dict[str, int]:
+        """Get current values of counters."""
+        return {
+            'encrypts': self.encrypt.call_count,
+            'decrypts': self.decrypt.call_count,
+            'rpc_requests': self.node.rpc_requests,
+            'rpc_calls': self.node.rpc_calls,
+        }
+
+
+def check_baseline(name: str, costs: Dict[str, int]) -> None:
+    """Fail when any cost is higher than stored in baseline.json.
+
+    Costs are deterministic, so a single extra query or RPC call is a
+    regression. With BENCHMARK_UPDATE_BASELINE set the baseline is
+    rewritten instead.
+    """
+    baseline = json.loads(BASELINE_PATH.read_text())
+    if os.environ.get(UPDATE_BASELINE_ENV):
+        baseline[name] = costs
+        BASELINE_PATH.write_text(
+            json.dumps(baseline, indent=4, sort_keys=True) + '\n',
+        )
+        return
+    assert name in baseline, f'No baseline for {name}'
+    regressions = [
+        f'{cost}: {costs[cost]} > {baseline[name][cost]}'
+        for cost in COST_NAMES
+        if costs[cost] > baseline[name][cost]
+    ]
+    assert not regressions, f'{name} regressed: ' + ', '.join(regressions)
@@ -0,0 +1,117 @@
+import secrets
+from string import hexdigits
+
+import pytest
+from django.test import Client
+from factory.fuzzy import FuzzyText
+from rest_framework.reverse import reverse
+
+from applications.wallets.keys import generate_private_key
+from applications.wallets.models import Wallet, WalletSecret, WalletSecretField
+from tests.benchmarks.costs import CostCounter, FakeNode, check_baseline
+from tests.factories.wallets import WalletFactory
+
+TABLE_SIZES = (100, 1000)
+
+
+@pytest.fixture
+def node(mocker) -> FakeNode:
+    node = FakeNode()
+    mocker.patch(
+        'main.w3.PooledHTTPProvider.make_request',
+        side_effect=node.make_request,
+    )
+    mocker.patch(
+        'main.w3.PooledHTTPProvider.make_batch_request',
+        side_effect=node.make_batch_request,
+    )
+    return node
+
+
+@pytest.fixture
+def counter(mocker, node) -> CostCounter:
+    return CostCounter(mocker, node)
+
+
+@pytest.fixture
+def mock_wallet_create_new_address():
+    """Derive addresses for real, Wallet.save is measured as a whole."""
+
+
+@pytest.fixture
+def client() -> Client:
+    return Client()
+
+
+def measure(benchmark, counter, name, function):
+    """Check costs of one call against baseline and time the function."""
+    with counter.count() as costs:
+        function()
+    check_baseline(name, costs)
+    benchmark(function)
+
+
+def test_secret_encrypt(benchmark, counter):
+    field = WalletSecretField()
+    private_key = generate_private_key()
+    measure(
+        benchmark,
+        counter,
+        'secret_encrypt',
+        lambda: field.get_prep_value(private_key),
+    )
+
+
+def test_secret_decrypt(benchmark, counter):
+    encrypted_value = WalletSecretField().get_prep_value(
+        generate_private_key(),
+    )
+    encryptor = WalletSecretField()._get_encryptor()
+    measure(
+        benchmark,
+        counter,
+        'secret_decrypt',
+        lambda: WalletSecret(encrypted_value, encryptor).value,
+    )
+
+
+def test_wallet_save(benchmark, counter):
+    measure(
+        benchmark,
+        counter,
+        'wallet_save',
+        lambda: Wallet(private_key=generate_private_key()).save(),
+    )
+
+
+@pytest.mark.parametrize('table_size', TABLE_SIZES)
+def test_wallet_list(benchmark, counter, client, table_size):
+    WalletFactory.create_batch(
+        table_size,
+        address=FuzzyText(prefix='0x', length=40, chars=hexdigits),
+    )
+
+    def get_list():
+        response = client.get(reverse('wallets:wallets-list'))
+        assert response.status_code == 200
+
+    measure(benchmark, counter, f'wallet_list_{table_size}', get_list)
+
+
+def test_transfer(benchmark, counter, client):
+    wallet = Wallet(private_key=generate_private_key())
+    wallet.save()
+
+    def transfer():
+        response = client.post(
+            reverse('wallets:wallets-transfer'),
+            {
+                '_from': wallet.address,
+                '_to': '0x' + secrets.token_hex(20),
+                'currency': 'eth',
+            },
+            content_type='application/json',
+        )
+        assert response.status_code == 200
+
+    measure(benchmark, counter, 'transfer', transfer)
@@ -0,0 +1,140 @@
+import asyncio
+import secrets
+import time
+from typing import Dict, List
+from unittest.mock import Mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+from hexbytes import HexBytes
+from rest_framework.reverse import reverse
+
+from tests.factories.wallets import WalletFactory
+
+NODE_LATENCY = 0.02
+TRANSFERS = 20
+BALANCE = 10 ** 18
+
+
+def test_asgi_transfer_throughput(record_property, wallets, in_flight):
+    """Compare one WSGI worker thread with one ASGI event loop.
+
+    Every node call sleeps NODE_LATENCY, the WSGI worker handles transfers
+    one by one while the event loop keeps many of them in flight. Rates are
+    recorded as properties (see --junitxml). The event loop must overlap
+    node calls of different transfers and be at least as fast as the
+    worker, which waits TRANSFERS * 2 * NODE_LATENCY at least.
+    """
+    payloads = [_get_payload(wallet) for wallet in wallets]
+
+    client = Client()
+    started = time.perf_counter()
+    for payload in payloads:
+        response = client.post(
+            reverse('wallets:wallets-transfer'),
+            payload,
+            content_type='application/json',
+        )
+        assert response.status_code == 200
+    wsgi_elapsed = time.perf_counter() - started
+
+    async_client = AsyncClient()
+
+    async def transfer_all():
+        return await asyncio.gather(*(
+            async_client.post(
+                reverse('wallets:wallets-transfer-async'),
+                payload,
+                content_type='application/json',
+            )
+            for payload in payloads
+        ))
+
+    started = time.perf_counter()
+    responses = async_to_sync(transfer_all)()
+    asgi_elapsed = time.perf_counter() - started
+    assert all(response.status_code == 200 for response in responses)
+
+    record_property('wsgi_transfers_per_second', TRANSFERS / wsgi_elapsed)
+    record_property('asgi_transfers_per_second', TRANSFERS / asgi_elapsed)
+    record_property('asgi_speedup', wsgi_elapsed / asgi_elapsed)
+    record_property('asgi_max_node_calls_in_flight', in_flight['max'])
+    assert in_flight['max'] > 1
+    assert asgi_elapsed <= wsgi_elapsed
+
+
+def _get_payload(wallet):
+    return {
+        '_from': wallet.address,
+        '_to': '0x' + secrets.token_hex(20),
+        'currency': 'eth',
+    }
+
+
+@pytest.fixture
+def wallets() -> List:
+    return [
+        WalletFactory(address='0x' + secrets.token_hex(20))
+        for _ in range(TRANSFERS)
+    ]
+
+
+@pytest.fixture
+def in_flight() -> Dict[str, int]:
+    """Count asynchronous node calls waiting at once."""
+    return {'current': 0, 'max': 0}
+
+
+@pytest.fixture(autouse=True)
+def mock_node(mocker, in_flight) -> None:
+    def make_batch_request(calls):
+        time.sleep(NODE_LATENCY)
+        return [
+            {'jsonrpc': '2.0', 'id': request_id, 'result': hex(result)}
+            for request_id, result in enumerate((BALANCE, 0))
+        ]
+
+    def send_raw_transaction(raw_transaction):
+        time.sleep(NODE_LATENCY)
+        return HexBytes(secrets.token_bytes(32))
+
+    async def async_node_call(*args, result=None):
+        in_flight['current'] += 1
+        in_flight['max'] = max(in_flight['max'], in_flight['current'])
+        try:
+            await asyncio.sleep(NODE_LATENCY)
+        finally:
+            in_flight['current'] -= 1
+        return result
+
+    async def get_balance(*args):
+        return await async_node_call(result=BALANCE)
+
+    async def get_transaction_count(*args):
+        return await async_node_call(result=0)
+
+    async def async_send_raw_transaction(*args):
+        return await async_node_call(result=HexBytes(secrets.token_bytes(32)))
+
+    mocker.patch(
+        'main.w3.PooledHTTPProvider.make_batch_request',
+        side_effect=make_batch_request,
+    )
+    mocker.patch(
+        'web3.eth.Eth.send_raw_transaction',
+        side_effect=send_raw_transaction,
+    )
+    mocker.patch('web3.eth.AsyncEth.get_balance', side_effect=get_balance)
+    mocker.patch(
+        'web3.eth.AsyncEth.get_transaction_count',
+        side_effect=get_transaction_count,
+    )
+    mocker.patch(
+        'web3.eth.AsyncEth.send_raw_transaction',
+        side_effect=async_send_raw_transaction,
+    )
+    mocker.patch(
+        'eth_account.Account.sign_transaction',
+        return_value=Mock(rawTransaction=b''),
+    )
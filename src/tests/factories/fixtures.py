@@ -1,9 +1,13 @@
 import secrets
+import time
 from unittest.mock import Mock
 
 import pytest
 
-from tests.factories.wallets import WalletFactory
+from applications.wallets.fees import Fees
+from applications.wallets.signers import reset_signer_cache
+from main.w3 import reset_w3
+from tests.factories.wallets import WalletFactory, WalletTransactionFactory
 
 
 @pytest.fixture
@@ -16,6 +20,11 @@ def wallet_factory():
     return WalletFactory
 
 
+@pytest.fixture
+def wallet_transaction_factory():
+    return WalletTransactionFactory
+
+
 @pytest.fixture
 def mock_fernet_encrypt(mocker, encrypted_wallet_private_key) -> Mock:
     return mocker.patch(
@@ -33,8 +42,8 @@ def mock_fernet_decrypt(mocker, decrypted_wallet_private_key) -> Mock:
 
 
 @pytest.fixture
-def encrypted_wallet_private_key() -> str:
-    return 'encrypted-private-key'
+def encrypted_wallet_private_key() -> bytes:
+    return b'encrypted-private-key'
 
 
 @pytest.fixture
@@ -48,3 +57,33 @@ def mock_wallet_create_new_address(mocker) -> Mock:
         'applications.wallets.models.Wallet._create_new_address',
         return_value='0x' + secrets.token_hex(20),
     )
+
+
+@pytest.fixture
+def fees() -> Fees:
+    return Fees(
+        max_fee_per_gas=4000000000,
+        max_priority_fee_per_gas=2000000000,
+        updated_at=time.monotonic(),
+    )
+
+
+@pytest.fixture(autouse=True)
+def mock_get_fees(mocker, fees) -> Mock:
+    return mocker.patch(
+        'applications.wallets.fees.get_fee_oracle',
+        return_value=Mock(get_fees=Mock(return_value=fees)),
+    )
+
+
+@pytest.fixture(autouse=True)
+def signer_cache():
+    yield
+    reset_signer_cache()
+
+
+@pytest.fixture(autouse=True)
+def w3_client():
+    """Keep mocked providers of a test out of the shared client."""
+    yield
+    reset_w3()
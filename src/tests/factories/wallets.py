@@ -1,6 +1,10 @@
+from string import hexdigits
+
+from factory import Sequence, SubFactory
 from factory.django import DjangoModelFactory
+from factory.fuzzy import FuzzyText
 
-from applications.wallets.models import Wallet
+from applications.wallets.models import Wallet, WalletTransaction
 
 
 class WalletFactory(DjangoModelFactory):
@@ -11,3 +15,20 @@ class WalletFactory(DjangoModelFactory):
     class Meta:
         model = Wallet
         django_get_or_create = ('address', 'currency')
+
+
+class WalletTransactionFactory(DjangoModelFactory):
+    """Factory for WalletTransaction model."""
+    wallet = SubFactory(
+        WalletFactory,
+        address=FuzzyText(prefix='0x', length=40, chars=hexdigits),
+    )
+    hash = FuzzyText(prefix='0x', length=64, chars='0123456789abcdef')
+    nonce = Sequence(lambda number: number)
+    to_address = FuzzyText(prefix='0x', length=40, chars=hexdigits)
+    value = 10 ** 18
+    max_fee_per_gas = 4000000000
+    max_priority_fee_per_gas = 2000000000
+
+    class Meta:
+        model = WalletTransaction
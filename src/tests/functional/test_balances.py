@@ -0,0 +1,120 @@
+import secrets
+from string import hexdigits
+from unittest.mock import Mock, PropertyMock
+
+import pytest
+from django.core.cache import cache
+from factory.fuzzy import FuzzyText
+
+from applications.wallets.balances import (BLOCK_NUMBER_CACHE_KEY,
+                                           fetch_balances, get_balances,
+                                           invalidate_balances)
+from applications.wallets.models import Wallet
+
+
+@pytest.fixture
+def addresses():
+    return ['0x' + secrets.token_hex(20) for _ in range(3)]
+
+
+@pytest.fixture(autouse=True)
+def mock_block_number(mocker) -> Mock:
+    return mocker.patch(
+        'web3.eth.Eth.block_number',
+        new_callable=PropertyMock,
+        return_value=100,
+    )
+
+
+@pytest.fixture(autouse=True)
+def mock_make_batch_request(mocker) -> Mock:
+    return mocker.patch(
+        'main.w3.PooledHTTPProvider.make_batch_request',
+        side_effect=lambda calls: [
+            {'id': request_id, 'result': hex(request_id + 1)}
+            for request_id, _ in enumerate(calls)
+        ],
+    )
+
+
+def test_get_balances_cached_within_block(
+    addresses,
+    mock_block_number,
+    mock_make_batch_request,
+):
+    assert get_balances(addresses) == {
+        address: index + 1 for index, address in enumerate(addresses)
+    }
+    assert get_balances(addresses[:2]) == {
+        addresses[0]: 1,
+        addresses[1]: 2,
+    }
+    mock_block_number.assert_called_once()
+    mock_make_batch_request.assert_called_once()
+    calls = mock_make_batch_request.call_args.args[0]
+    assert calls[0] == ('eth_getBalance', [addresses[0], hex(100)])
+
+
+def test_get_balances_new_block(
+    addresses,
+    mock_block_number,
+    mock_make_batch_request,
+):
+    get_balances(addresses)
+    mock_block_number.return_value = 101
+    cache.delete(BLOCK_NUMBER_CACHE_KEY)
+    get_balances(addresses)
+    assert mock_make_batch_request.call_count == 2
+
+
+def test_invalidate_balances(addresses, mock_make_batch_request):
+    get_balances(addresses)
+    invalidate_balances(addresses[:1])
+    get_balances(addresses)
+    assert mock_make_batch_request.call_count == 2
+    assert mock_make_batch_request.call_args.args[0] == [
+        ('eth_getBalance', [addresses[0], 'pending']),
+    ]
+
+
+def test_balance_changed_after_transfer(addresses, mock_make_batch_request):
+    node_balances = {addresses[0]: 10 ** 18}
+
+    def make_batch_request(calls):
+        return [
+            {
+                'id': request_id,
+                'result': hex(
+                    node_balances[params[0]] if params[1] == 'pending'
+                    else 10 ** 18,
+                ),
+            }
+            for request_id, (_, params) in enumerate(calls)
+        ]
+
+    mock_make_batch_request.side_effect = make_batch_request
+    assert get_balances(addresses[:1]) == {addresses[0]: 10 ** 18}
+    node_balances[addresses[0]] = 0
+    invalidate_balances(addresses[:1])
+    assert get_balances(addresses[:1]) == {addresses[0]: 0}
+    assert get_balances(addresses[:1]) == {addresses[0]: 0}
+
+
+def test_fetch_balances_in_batches(addresses, mock_make_batch_request):
+    mock_make_batch_request.side_effect = lambda calls: [
+        {'id': request_id, 'result': hex(int(params[0], 16))}
+        for request_id, (_, params) in enumerate(calls)
+    ]
+    addresses = addresses + ['0x' + secrets.token_hex(20) for _ in range(2)]
+    balances = fetch_balances(addresses, batch_size=2, concurrency=2)
+    assert balances == {address: int(address, 16) for address in addresses}
+    assert mock_make_batch_request.call_count == 3
+
+
+def test_get_balances_of_wallets(wallet_factory):
+    wallets = wallet_factory.create_batch(
+        2,
+        address=FuzzyText(prefix='0x', length=40, chars=hexdigits),
+    )
+    balances = get_balances(Wallet.objects.all())
+    assert set(balances) == {wallet.address for wallet in wallets}
@@ -0,0 +1,45 @@
+from applications.wallets.bulk import create_wallets
+from applications.wallets.keys import derive_address, generate_private_key
+from applications.wallets.models import Wallet
+
+
+def test_create_wallets_in_process_pool(settings):
+    settings.WALLET_BULK_CREATE_BATCH_SIZE = 2
+    settings.WALLET_BULK_CREATE_PROCESSES = 2
+    private_keys = [generate_private_key() for _ in range(5)]
+    batches = list(create_wallets(private_keys, 'eth'))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    expected_addresses = [derive_address(key) for key in private_keys]
+    actual_addresses = [
+        wallet.address for batch in batches for wallet in batch
+    ]
+    assert actual_addresses == expected_addresses
+    for wallet in Wallet.objects.all():
+        assert wallet.private_key == private_keys[
+            expected_addresses.index(wallet.address)
+        ]
+
+
+def test_create_wallets_skips_existing(wallet_factory):
+    private_key = generate_private_key()
+    wallet_factory(address=derive_address(private_key))
+    private_keys = [private_key, generate_private_key()]
+    batches = list(create_wallets(private_keys, 'eth'))
+    assert sum(len(batch) for batch in batches) == 1
+    assert Wallet.objects.count() == 2
+
+
+def test_create_wallets_concurrent_insert(wallet_factory, mocker):
+    private_key = generate_private_key()
+    address = derive_address(private_key)
+    wallet_factory(address=address)
+    mocker.patch(
+        'applications.wallets.bulk._get_existing_addresses',
+        side_effect=(set(), set(), {address}),
+    )
+    private_keys = [private_key, generate_private_key()]
+    batches = list(create_wallets(private_keys, 'eth'))
+    assert [wallet.address for wallet in batches[0]] == [
+        derive_address(private_keys[1]),
+    ]
+    assert Wallet.objects.count() == 2
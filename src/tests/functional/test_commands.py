@@ -0,0 +1,101 @@
+import csv
+import json
+import secrets
+from io import StringIO
+from string import hexdigits
+
+from cryptography.fernet import Fernet
+from django.core.management import call_command
+from factory.fuzzy import FuzzyText
+
+from applications.wallets.models import Wallet
+
+
+def test_rotate_wallet_keys(settings, wallet_factory):
+    old_key, new_key = Fernet.generate_key(), Fernet.generate_key()
+    settings.FERNET_KEYS = [old_key]
+    private_keys = {
+        wallet_factory(
+            address='0x' + secrets.token_hex(20),
+            private_key=private_key,
+        ).pk: private_key
+        for private_key in ('0x' + secrets.token_hex(32) for _ in range(3))
+    }
+    settings.FERNET_KEYS = [new_key, old_key]
+    call_command('rotate_wallet_keys', chunk_size=2)
+    settings.FERNET_KEYS = [new_key]
+    for wallet in Wallet.objects.all():
+        assert wallet.private_key == private_keys[wallet.pk]
+
+
+def test_rotate_wallet_keys_to_aes_gcm(settings, wallet_factory):
+    private_keys = {
+        wallet_factory(
+            address='0x' + secrets.token_hex(20),
+            private_key=private_key,
+        ).pk: private_key
+        for private_key in ('0x' + secrets.token_hex(32) for _ in range(3))
+    }
+    settings.AES_GCM_KEYS = [Fernet.generate_key()]
+    settings.WALLET_PRIVATE_KEY_ENCRYPTOR = (
+        'applications.wallets.encryptors.WalletSecretAESGCMEncryptor'
+    )
+    call_command('rotate_wallet_keys', chunk_size=2)
+    settings.FERNET_KEYS = [Fernet.generate_key()]
+    for wallet in Wallet.objects.all():
+        assert wallet.private_key.encrypted_value[:1] == b'\x01'
+        assert wallet.private_key == private_keys[wallet.pk]
+
+
+def test_export_wallets_ndjson(wallet_factory):
+    wallets = wallet_factory.create_batch(
+        3,
+        address=FuzzyText(prefix='0x', length=40, chars=hexdigits),
+    )
+    stdout = StringIO()
+    call_command('export_wallets', chunk_size=2, stdout=stdout)
+    rows = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert rows == [
+        {'address': wallet.address, 'currency': wallet.currency}
+        for wallet in wallets
+    ]
+
+
+def test_export_wallets_csv(wallet_factory):
+    wallets = wallet_factory.create_batch(
+        3,
+        address=FuzzyText(prefix='0x', length=40, chars=hexdigits),
+    )
+    stdout = StringIO()
+    call_command('export_wallets', output='csv', stdout=stdout)
+    rows = list(csv.reader(StringIO(stdout.getvalue())))
+    assert rows == [['address', 'currency']] + [
+        [wallet.address, wallet.currency] for wallet in wallets
+    ]
+
+
+def test_fetch_balances(mocker, wallet_factory):
+    wallets = wallet_factory.create_batch(
+        3,
+        address=FuzzyText(prefix='0x', length=40, chars=hexdigits),
+    )
+    mock_make_batch_request = mocker.patch(
+        'main.w3.PooledHTTPProvider.make_batch_request',
+        side_effect=lambda calls: [
+            {'id': request_id, 'result': hex(1)}
+            for request_id, _ in enumerate(calls)
+        ],
+    )
+    stdout, stderr = StringIO(), StringIO()
+    call_command(
+        'fetch_balances',
+        batch_size=2,
+        stdout=stdout,
+        stderr=stderr,
+    )
+    rows = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert rows == [
+        {'address': wallet.address, 'balance': 1} for wallet in wallets
+    ]
+    assert 'Total: 3 wei' in stderr.getvalue()
+    assert mock_make_batch_request.call_count == 2
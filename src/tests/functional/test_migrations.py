@@ -0,0 +1,112 @@
+import secrets
+from typing import Callable
+
+import pytest
+from cryptography.fernet import Fernet
+from django.apps.registry import Apps
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from applications.wallets.encryptors import WalletSecretFernetEncryptor
+from applications.wallets.keys import derive_address, generate_private_key
+from applications.wallets.models import Wallet
+
+
+@pytest.fixture
+def migrate(transactional_db) -> Callable[[str], Apps]:
+    """Migrate wallets app to a migration, get its models."""
+
+    def migrate_to(name: str) -> Apps:
+        executor = MigrationExecutor(connection)
+        executor.migrate([('wallets', name)])
+        return executor.loader.project_state(('wallets', name)).apps
+
+    yield migrate_to
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+def test_private_key_moves_to_binary_column(migrate):
+    private_key = '0x' + secrets.token_hex(32)
+    token = WalletSecretFernetEncryptor.encrypt(private_key).decode()
+    OldWallet = migrate('0005_wallet_address_bytes').get_model(
+        'wallets',
+        'Wallet',
+    )
+    OldWallet.objects.create(
+        private_key=token,
+        address='0x' + secrets.token_hex(20),
+    )
+    migrate('0006_wallet_private_key_binary')
+    wallet = Wallet.objects.get()
+    assert wallet.private_key.encrypted_value == token.encode()
+    assert wallet.private_key == private_key
+
+
+def test_private_key_migration_is_reversible(migrate, settings):
+    settings.AES_GCM_KEYS = [Fernet.generate_key()]
+    settings.WALLET_PRIVATE_KEY_ENCRYPTOR = (
+        'applications.wallets.encryptors.WalletSecretAESGCMEncryptor'
+    )
+    private_key = '0x' + secrets.token_hex(32)
+    migrate('0006_wallet_private_key_binary')
+    Wallet.objects.create(
+        private_key=private_key,
+        address='0x' + secrets.token_hex(20),
+    )
+    OldWallet = migrate('0005_wallet_address_bytes').get_model(
+        'wallets',
+        'Wallet',
+    )
+    token = OldWallet.objects.get().private_key
+    assert WalletSecretFernetEncryptor.decrypt(token.encode()) == private_key
+
+
+def test_addresses_are_merged_and_repaired(migrate):
+    private_key = '0x' + secrets.token_hex(32)
+    address = derive_address(private_key)
+    token = WalletSecretFernetEncryptor.encrypt(private_key).decode()
+    apps = migrate('0004_wallet_transaction')
+    OldWallet = apps.get_model('wallets', 'Wallet')
+    kept = OldWallet.objects.create(private_key=token, address=address)
+    duplicate = OldWallet.objects.create(
+        private_key=token,
+        address=address.lower(),
+    )
+    malformed = OldWallet.objects.create(
+        private_key=WalletSecretFernetEncryptor.encrypt(
+            generate_private_key(),
+        ).decode(),
+        address='0x' + 'z' * 40,
+    )
+    apps.get_model('wallets', 'WalletTransaction').objects.create(
+        wallet=duplicate,
+        hash='0x' + secrets.token_hex(32),
+        nonce=0,
+        to_address=address,
+        value=1,
+        max_fee_per_gas=1,
+        max_priority_fee_per_gas=1,
+    )
+    migrate('0005_wallet_address_bytes')
+    assert set(Wallet.objects.values_list('id', flat=True)) == {
+        kept.id,
+        malformed.id,
+    }
+    assert Wallet.objects.get(id=kept.id).transactions.count() == 1
+    repaired = Wallet.objects.get(id=malformed.id)
+    assert repaired.address == derive_address(str(repaired.private_key))
+
+
+def test_malformed_address_without_key_fails(migrate):
+    OldWallet = migrate('0004_wallet_transaction').get_model(
+        'wallets',
+        'Wallet',
+    )
+    wallet = OldWallet.objects.create(
+        private_key='invalid',
+        address='0xinvalid',
+    )
+    with pytest.raises(ValueError, match='malformed address'):
+        migrate('0005_wallet_address_bytes')
+    wallet.delete()
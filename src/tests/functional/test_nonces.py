@@ -0,0 +1,64 @@
+import secrets
+
+import pytest
+
+from applications.wallets import nonces
+from applications.wallets.models import WalletNonce
+from applications.wallets.nonces import (allocate_nonce, allocate_nonces,
+                                         reset_nonce)
+
+
+@pytest.fixture(autouse=True)
+def clear_synced_wallets():
+    nonces._synced_wallets.clear()
+
+
+def test_allocate_nonce_increments_locally(wallet):
+    allocated = [allocate_nonce(wallet, 5) for _ in range(3)]
+    assert allocated == [5, 6, 7]
+    assert WalletNonce.objects.get(wallet=wallet).nonce == 8
+
+
+def test_allocate_nonce_syncs_on_startup(wallet):
+    allocate_nonce(wallet, 5)
+    nonces._synced_wallets.clear()
+    assert allocate_nonce(wallet, 10) == 10
+    nonces._synced_wallets.clear()
+    assert allocate_nonce(wallet, 8) == 8
+
+
+def test_allocate_nonce_fills_gap_after_crash(wallet):
+    """A nonce allocated but never sent is reused after restart."""
+    assert allocate_nonce(wallet, 5) == 5
+    nonces._synced_wallets.clear()
+    assert allocate_nonce(wallet, 5) == 5
+
+
+def test_allocate_nonce_queries(wallet, django_assert_max_num_queries):
+    allocate_nonce(wallet, 5)
+    with django_assert_max_num_queries(4):
+        allocate_nonce(wallet, 5)
+
+
+def test_reset_nonce(wallet):
+    allocate_nonce(wallet, 5)
+    reset_nonce(wallet)
+    assert allocate_nonce(wallet, 2) == 2
+
+
+def test_allocate_nonces(wallet_factory, django_assert_max_num_queries):
+    wallets = [
+        wallet_factory(address='0x' + secrets.token_hex(20))
+        for _ in range(3)
+    ]
+    allocate_nonce(wallets[0], 5)
+    with django_assert_max_num_queries(6):
+        allocated = allocate_nonces(
+            [(wallet, 1) for wallet in wallets],
+        )
+    assert allocated == {
+        wallets[0].pk: 6,
+        wallets[1].pk: 1,
+        wallets[2].pk: 1,
+    }
+    assert allocate_nonces([(wallets[1], 1)]) == {wallets[1].pk: 2}
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import Mock, PropertyMock
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from applications.wallets.models import WalletNonce, WalletTransaction
+from applications.wallets.receipts import poll_receipts
+
+
+def get_receipt(status: int) -> dict:
+    return {
+        'status': hex(status),
+        'blockNumber': hex(100),
+        'gasUsed': hex(21000),
+        'effectiveGasPrice': hex(3000000000),
+    }
+
+
+@pytest.fixture
+def receipts():
+    return {}
+
+
+@pytest.fixture
+def known_transactions():
+    return {}
+
+
+@pytest.fixture(autouse=True)
+def mock_make_batch_request(mocker, receipts, known_transactions) -> Mock:
+    results = {
+        'eth_getTransactionReceipt': receipts,
+        'eth_getTransactionByHash': known_transactions,
+    }
+    return mocker.patch(
+        'main.w3.PooledHTTPProvider.make_batch_request',
+        side_effect=lambda calls: [
+            {'id': request_id, 'result': results[method].get(params[0])}
+            for request_id, (method, params) in enumerate(calls)
+        ],
+    )
+
+
+def test_poll_receipts(
+    wallet_transaction_factory,
+    receipts,
+    mock_make_batch_request,
+):
+    succeeded, failed, pending = wallet_transaction_factory.create_batch(3)
+    receipts[succeeded.hash] = get_receipt(1)
+    receipts[failed.hash] = get_receipt(0)
+    assert poll_receipts(batch_size=2) == 2
+    assert mock_make_batch_request.call_count == 2
+    statuses = WalletTransaction.StatusChoices
+    succeeded.refresh_from_db()
+    assert succeeded.status == statuses.SUCCESS
+    assert succeeded.block_number == 100
+    assert succeeded.gas_used == 21000
+    assert succeeded.effective_gas_price == 3000000000
+    failed.refresh_from_db()
+    assert failed.status == statuses.FAILED
+    pending.refresh_from_db()
+    assert pending.status == statuses.PENDING
+
+
+def test_poll_receipts_skips_finished(
+    wallet_transaction_factory,
+    mock_make_batch_request,
+):
+    wallet_transaction_factory(
+        status=WalletTransaction.StatusChoices.SUCCESS,
+    )
+    assert poll_receipts() == 0
+    mock_make_batch_request.assert_not_called()
+
+
+def test_poll_receipts_drops_forgotten(
+    wallet_transaction_factory,
+    known_transactions,
+):
+    dropped, known, recent = wallet_transaction_factory.create_batch(3)
+    WalletTransaction.objects.filter(id__in=(dropped.id, known.id)).update(
+        created_at=timezone.now() - timedelta(hours=2),
+    )
+    known_transactions[known.hash] = {'hash': known.hash}
+    WalletNonce.objects.create(wallet=dropped.wallet, nonce=dropped.nonce + 1)
+    assert poll_receipts() == 1
+    statuses = WalletTransaction.StatusChoices
+    dropped.refresh_from_db()
+    assert dropped.status == statuses.DROPPED
+    known.refresh_from_db()
+    assert known.status == statuses.PENDING
+    recent.refresh_from_db()
+    assert recent.status == statuses.PENDING
+    assert WalletNonce.objects.get(wallet=dropped.wallet).nonce is None
+
+
+def test_poll_receipts_skips_failed_batch(
+    wallet_transaction_factory,
+    receipts,
+    mock_make_batch_request,
+):
+    failed_batch, polled = wallet_transaction_factory.create_batch(2)
+    receipts[polled.hash] = get_receipt(1)
+    side_effect = mock_make_batch_request.side_effect
+    mock_make_batch_request.side_effect = [
+        [{'id': 0, 'error': {'code': -32005, 'message': 'limit exceeded'}}],
+        side_effect([('eth_getTransactionReceipt', [polled.hash])]),
+    ]
+    assert poll_receipts(batch_size=1) == 1
+    failed_batch.refresh_from_db()
+    assert failed_batch.status == WalletTransaction.StatusChoices.PENDING
+
+
+def test_poll_receipts_command(mocker, wallet_transaction_factory, receipts):
+    mocker.patch(
+        'web3.eth.Eth.block_number',
+        new_callable=PropertyMock,
+        return_value=100,
+    )
+    wallet_transaction = wallet_transaction_factory()
+    receipts[wallet_transaction.hash] = get_receipt(1)
+    call_command('poll_receipts', once=True)
+    wallet_transaction.refresh_from_db()
+    assert wallet_transaction.status == WalletTransaction.StatusChoices.SUCCESS
+
+
+def test_poll_receipts_command_survives_errors(mocker):
+    mocker.patch(
+        'web3.eth.Eth.block_number',
+        new_callable=PropertyMock,
+        side_effect=ConnectionError('node is down'),
+    )
+    stderr = StringIO()
+    call_command('poll_receipts', once=True, stderr=stderr)
+    assert 'node is down' in stderr.getvalue()
@@ -0,0 +1,169 @@
+import secrets
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+from eth_account import Account
+from eth_utils import keccak
+from hexbytes import HexBytes
+
+from applications.wallets.bulk import create_wallets
+from applications.wallets.keys import generate_private_key
+from applications.wallets.models import Wallet, WalletNonce
+from applications.wallets.signers import get_signer_cache
+from applications.wallets.sweep import (SWEEP_FAILED, SWEEP_SENT,
+                                        SWEEP_SKIPPED, _sign_secrets,
+                                        sweep_wallets)
+
+
+@pytest.fixture
+def destination() -> str:
+    return '0x' + secrets.token_hex(20)
+
+
+@pytest.fixture
+def private_keys() -> List[str]:
+    return [generate_private_key() for _ in range(3)]
+
+
+@pytest.fixture
+def wallets(private_keys) -> List[Wallet]:
+    list(create_wallets(private_keys, 'eth'))
+    return list(Wallet.objects.order_by('id'))
+
+
+@pytest.fixture
+def fee(settings, fees) -> int:
+    return settings.ETHEREUM_TRANSFER_GAS * fees.max_fee_per_gas
+
+
+@pytest.fixture
+def balances(wallets, fee) -> List[int]:
+    return [fee * 2, fee, fee * 3]
+
+
+@pytest.fixture(autouse=True)
+def mock_make_batch_request(mocker, wallets, balances) -> Mock:
+    state = {
+        wallet.address: (balance, index)
+        for index, (wallet, balance) in enumerate(zip(wallets, balances))
+    }
+
+    def make_batch_request(calls):
+        return [
+            {
+                'id': request_id,
+                'result': hex(state[params[0]][method != 'eth_getBalance']),
+            }
+            for request_id, (method, params) in enumerate(calls)
+        ]
+
+    return mocker.patch(
+        'main.w3.PooledHTTPProvider.make_batch_request',
+        side_effect=make_batch_request,
+    )
+
+
+@pytest.fixture(autouse=True)
+def mock_send_raw_transaction(mocker) -> Mock:
+    return mocker.patch(
+        'web3.eth.Eth.send_raw_transaction',
+        side_effect=lambda raw_transaction: HexBytes(b'hash'),
+    )
+
+
+def test_sweep_wallets(
+    wallets,
+    destination,
+    fee,
+    balances,
+    mock_make_batch_request,
+    mock_send_raw_transaction,
+):
+    reports = sweep_wallets(Wallet.objects.order_by('id'), destination)
+    assert [report['status'] for report in reports] == [
+        SWEEP_SENT,
+        SWEEP_SKIPPED,
+        SWEEP_SENT,
+    ]
+    assert [report['nonce'] for report in reports] == [0, None, 2]
+    assert [report['value'] for report in reports] == [fee, None, fee * 2]
+    mock_make_batch_request.assert_called_once()
+    assert mock_send_raw_transaction.call_count == 2
+    raw_transaction = mock_send_raw_transaction.call_args_list[0].args[0]
+    assert Account.recover_transaction(raw_transaction) == wallets[0].address
+    assert reports[0]['hash'] == HexBytes(keccak(raw_transaction)).hex()
+    assert WalletNonce.objects.get(wallet=wallets[2]).nonce == 3
+
+
+def test_sweep_wallets_uses_signer_cache(wallets, destination):
+    sweep_wallets(wallets, destination)
+    assert get_signer_cache().get_stats()['size'] == 2
+
+
+def test_sweep_wallets_in_process_pool(settings, destination):
+    settings.WALLET_SWEEP_SIGN_CHUNK_SIZE = 1
+    settings.WALLET_SWEEP_SIGN_PROCESSES = 2
+    reports = sweep_wallets(Wallet.objects.order_by('id'), destination)
+    assert [report['status'] for report in reports] == [
+        SWEEP_SENT,
+        SWEEP_SKIPPED,
+        SWEEP_SENT,
+    ]
+
+
+def test_sweep_wallets_pool_gets_encrypted_keys(
+    mocker,
+    settings,
+    wallets,
+    private_keys,
+    destination,
+):
+    settings.WALLET_SWEEP_SIGN_CHUNK_SIZE = 1
+    settings.WALLET_SWEEP_SIGN_PROCESSES = 2
+    executor = mocker.patch(
+        'applications.wallets.sweep.ProcessPoolExecutor',
+    ).return_value.__enter__.return_value
+    chunks = []
+
+    def map_chunks(function, function_chunks):
+        assert function is _sign_secrets
+        chunks.extend(function_chunks)
+        return map(function, chunks)
+
+    executor.map.side_effect = map_chunks
+    sweep_wallets(wallets, destination)
+    secrets_ = [secret for chunk in chunks for _, secret, _ in chunk]
+    assert secrets_ == [
+        wallets[0].private_key.encrypted_value,
+        wallets[2].private_key.encrypted_value,
+    ]
+    assert not set(private_keys) & {str(secret) for secret in secrets_}
+
+
+def test_sweep_wallets_allocates_nonces_at_once(
+    wallets,
+    destination,
+    django_assert_max_num_queries,
+):
+    with django_assert_max_num_queries(8):
+        sweep_wallets(wallets, destination)
+
+
+def test_sweep_wallets_broadcast_failed(
+    wallets,
+    destination,
+    mock_send_raw_transaction,
+):
+    mock_send_raw_transaction.side_effect = ValueError('nonce too low')
+    reports = sweep_wallets([wallets[0]], destination)
+    assert reports[0]['status'] == SWEEP_FAILED
+    assert reports[0]['error'] == 'nonce too low'
+    assert WalletNonce.objects.get(wallet=wallets[0]).nonce is None
+
+
+def test_sweep_wallets_skips_destination(wallets, mock_send_raw_transaction):
+    reports = sweep_wallets(wallets, wallets[0].address.lower())
+    assert [report['address'] for report in reports] == [
+        wallet.address for wallet in wallets[1:]
+    ]
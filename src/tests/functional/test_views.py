@@ -1,17 +1,26 @@
+import json as json_module
 import secrets
+import time
 from copy import deepcopy
 from http import HTTPStatus
-from typing import TYPE_CHECKING, Dict, List, Optional, TypedDict
-from unittest.mock import Mock
+from itertools import count
+from string import hexdigits
+from typing import Any, Dict, List, Optional, TypedDict
+from unittest.mock import AsyncMock, Mock, PropertyMock, patch
 
 import pytest
+from django.core.cache import cache, caches
+from django.utils.http import http_date
 from factory.fuzzy import FuzzyText
+from hexbytes import HexBytes
 from pytest_drf import UsesGetMethod, UsesPostMethod, ViewSetTest
 from pytest_lambda import lambda_fixture, static_fixture
+from rest_framework.mixins import ListModelMixin
 from rest_framework.reverse import reverse
 
-if TYPE_CHECKING:
-    from applications.wallets.models import Wallet
+from applications.wallets.changes import CHANGED_AT_CACHE_KEY
+from applications.wallets.keys import derive_address
+from applications.wallets.models import Wallet, WalletTransaction
 
 
 class ParamsToTestTransfer(TypedDict):
@@ -48,6 +57,63 @@ class TestWalletViewSet(ViewSetTest, UsesPostMethod):
             expected_keys = list(sorted(['hash', 'nonce']))
             assert actual_keys == expected_keys
 
+        def test_account_state_fetched_once(
+            self,
+            response,
+            mock_make_batch_request,
+        ):
+            assert response.status_code == HTTPStatus.OK
+            mock_make_batch_request.assert_called_once()
+
+        def test_wallet_lookup_is_not_decrypted(
+            self,
+            mock_fernet_decrypt,
+            response,
+        ):
+            assert response.status_code == HTTPStatus.OK
+            mock_fernet_decrypt.assert_not_called()
+
+        def test_transaction_recorded(self, response, json, wallet, balance):
+            wallet_transaction = WalletTransaction.objects.get(
+                hash=json['hash'],
+            )
+            assert wallet_transaction.wallet == wallet
+            assert wallet_transaction.nonce == json['nonce']
+            assert wallet_transaction.value == balance - 84000000000000
+            assert wallet_transaction.status == (
+                WalletTransaction.StatusChoices.PENDING
+            )
+
+        class TestSignedParams:
+            """Test params of the signed transaction."""
+
+            def test_sign_params(
+                self,
+                response,
+                balance,
+                mock_sign_transaction,
+            ):
+                assert response.status_code == HTTPStatus.OK
+                assert_transfer_params(mock_sign_transaction, balance)
+
+            @pytest.fixture(autouse=True)
+            def mock_send_transaction(self):
+                """Sign and send the transaction for real."""
+
+            @pytest.fixture(autouse=True)
+            def mock_send_raw_transaction(self, mocker) -> Mock:
+                return mocker.patch(
+                    'web3.eth.Eth.send_raw_transaction',
+                    return_value=HexBytes(secrets.token_bytes(32)),
+                )
+
+            @pytest.fixture(autouse=True)
+            def mock_sign_transaction(self, mocker) -> Mock:
+                return mocker.patch(
+                    'eth_account.Account.sign_transaction',
+                    return_value=Mock(rawTransaction=b''),
+                )
+
         class TestIncorrectBalance:
             """Test incorrect balance value."""
 
@@ -56,19 +122,15 @@ class TestWalletViewSet(ViewSetTest, UsesPostMethod):
                 assert '_from' in json
 
             @pytest.fixture(
-                autouse=True,
                 params=(
                     0,
                     -3,
                     4000000000,
-                    3000000000,
+                    84000000000000,
                 ),
             )
-            def mock_get_balance_error(self, mocker, request) -> Mock:
-                return mocker.patch(
-                    'web3.eth.Eth.get_balance',
-                    return_value=request.param,
-                )
+            def balance(self, request) -> int:
+                return request.param
 
         class TestTransferBadRequest:
             """Test transfer fields validation."""
@@ -152,6 +214,169 @@ class TestWalletViewSet(ViewSetTest, UsesPostMethod):
             def wallet_(self, wallet_factory):
                 return wallet_factory(address=self.wallet_address)
 
+    class TestTransferAsyncAction:
+        """Test asynchronous transfer view."""
+
+        url = static_fixture(
+            reverse('wallets:wallets-transfer-async')
+        )
+        data = lambda_fixture(
+            lambda wallet: {
+                '_from': wallet.address,
+                '_to': '0x' + secrets.token_hex(20),
+                'currency': 'eth',
+            },
+        )
+
+        def test_response_json(self, response, json):
+            assert response.status_code == HTTPStatus.OK
+            actual_keys = list(sorted(json.keys()))
+            expected_keys = list(sorted(['hash', 'nonce']))
+            assert actual_keys == expected_keys
+
+        def test_sign_params(self, response, balance, mock_sign_transaction):
+            assert response.status_code == HTTPStatus.OK
+            assert_transfer_params(mock_sign_transaction, balance)
+
+        def test_reads_do_not_use_sync_client(
+            self,
+            mock_make_batch_request,
+            response,
+        ):
+            assert response.status_code == HTTPStatus.OK
+            mock_make_batch_request.assert_not_called()
+
+        class TestIncorrectBalance:
+            """Test incorrect balance value."""
+
+            def test_response_json(self, response, json):
+                assert response.status_code == HTTPStatus.BAD_REQUEST
+                assert '_from' in json
+
+            @pytest.fixture(params=(0, -3, 4000000000, 84000000000000))
+            def balance(self, request) -> int:
+                return request.param
+
+        class TestUnknownWallet:
+            """Test transfer from unknown wallet."""
+
+            data = static_fixture({
+                '_from': '0x' + secrets.token_hex(20),
+                '_to': '0x' + secrets.token_hex(20),
+                'currency': 'eth',
+            })
+
+            def test_response_json(self, response, json):
+                assert response.status_code == HTTPStatus.BAD_REQUEST
+                assert '_from' in json
+
+        class TestIncorrectField:
+            """Test transfer fields validation."""
+
+            data = lambda_fixture(
+                lambda wallet: {
+                    '_from': wallet.address,
+                    '_to': '1x' + secrets.token_hex(20),
+                    'currency': 'eth',
+                },
+            )
+
+            def test_response_json(self, response, json):
+                assert response.status_code == HTTPStatus.BAD_REQUEST
+                assert '_to' in json
+
+        @pytest.fixture(autouse=True)
+        def mock_async_eth(self, mocker, balance, nonce) -> Dict[str, Mock]:
+            return {
+                'get_balance': mocker.patch(
+                    'web3.eth.AsyncEth.get_balance',
+                    new=AsyncMock(return_value=balance),
+                ),
+                'get_transaction_count': mocker.patch(
+                    'web3.eth.AsyncEth.get_transaction_count',
+                    new=AsyncMock(return_value=nonce),
+                ),
+                'send_raw_transaction': mocker.patch(
+                    'web3.eth.AsyncEth.send_raw_transaction',
+                    new=AsyncMock(
+                        return_value=HexBytes(secrets.token_bytes(32)),
+                    ),
+                ),
+            }
+
+        @pytest.fixture(autouse=True)
+        def mock_sign_transaction(self, mocker) -> Mock:
+            return mocker.patch(
+                'eth_account.Account.sign_transaction',
+                return_value=Mock(rawTransaction=b''),
+            )
+
+    class TestBulkAction:
+        """Test bulk creation action."""
+
+        url = static_fixture(
+            reverse('wallets:wallets-bulk')
+        )
+        data = static_fixture({'count': 3})
+
+        def test_response_json(self, response, json, expected_keys):
+            assert response.status_code == HTTPStatus.CREATED
+            assert len(json) == 3
+            for wallet in json:
+                assert expected_keys == list(sorted(wallet.keys()))
+
+        def test_wallets_created(self, client, response, json):
+            addresses = {wallet['address'] for wallet in json}
+            listed = client.get(reverse('wallets:wallets-list')).json()
+            assert addresses == {
+                wallet['address'] for wallet in listed['results']
+            }
+
+        class TestPrivateKeys:
+            """Test creation from private keys."""
+
+            private_keys = ['0x' + secrets.token_hex(32) for _ in range(2)]
+            data = static_fixture({'private_keys': private_keys})
+
+            def test_response_json(self, response, json):
+                assert response.status_code == HTTPStatus.CREATED
+                actual_addresses = [wallet['address'] for wallet in json]
+                expected_addresses = [
+                    derive_address(key) for key in self.private_keys
+                ]
+                assert actual_addresses == expected_addresses
+
+        class TestStreaming:
+            """Test streamed response."""
+
+            @pytest.fixture(autouse=True)
+            def stream_threshold(self, settings):
+                settings.WALLET_BULK_CREATE_STREAM_THRESHOLD = 2
+                settings.WALLET_BULK_CREATE_BATCH_SIZE = 2
+
+            def test_response(self, response):
+                assert response.status_code == HTTPStatus.CREATED
+                assert response.streaming
+                wallets = json_module.loads(b''.join(response))
+                assert len(wallets) == 3
+
+        class TestBadRequest:
+            """Test bulk creation validation."""
+
+            @pytest.fixture(params=(
+                {},
+                {'count': 0},
+                {'count': 2, 'private_keys': ['0x' + '1' * 64]},
+                {'private_keys': ['0x' + '1' * 64, '0x' + '1' * 64]},
+                {'private_keys': ['0x' + '1' * 63]},
+                {'count': 1, 'currency': 'unexpected'},
+            ))
+            def data(self, request) -> Dict[str, Any]:
+                return request.param
+
+            def test_response(self, response):
+                assert response.status_code == HTTPStatus.BAD_REQUEST
+
     class TestListMethod(UsesGetMethod):
         """Test List Method."""
 
@@ -165,16 +390,502 @@ class TestWalletViewSet(ViewSetTest, UsesPostMethod):
             created_wallets,
         ):
             assert response.status_code == HTTPStatus.OK
-            assert len(json) == created_wallets
-            for wallet in json:
+            assert len(json['results']) == created_wallets
+            for wallet in json['results']:
                 returned_keys = list(sorted(wallet.keys()))
                 assert expected_keys == returned_keys
 
+        def test_private_keys_are_not_decrypted(
+            self,
+            mock_fernet_decrypt,
+            response,
+        ):
+            assert response.status_code == HTTPStatus.OK
+            mock_fernet_decrypt.assert_not_called()
+
         @pytest.fixture(autouse=True)
         def wallets(self, wallet_factory, created_wallets) -> List['Wallet']:
             return wallet_factory.create_batch(
                 created_wallets,
-                address=FuzzyText(length=42),
+                address=FuzzyText(prefix='0x', length=40, chars=hexdigits),
+            )
+
+        class TestPages:
+            """Test cursor pagination."""
+
+            created_wallets = static_fixture(5)
+            query_params = static_fixture({'page_size': 2})
+
+            def test_pages(self, client, response, json, wallets):
+                addresses = [wallet['address'] for wallet in json['results']]
+                while json['next']:
+                    json = client.get(json['next']).json()
+                    assert len(json['results']) <= 2
+                    addresses += [
+                        wallet['address'] for wallet in json['results']
+                    ]
+                expected_wallets = sorted(
+                    wallets,
+                    key=lambda wallet: wallet.pk,
+                    reverse=True,
+                )
+                assert addresses == [
+                    wallet.address for wallet in expected_wallets
+                ]
+
+        class TestCurrencyFilter:
+            """Test filtering by currency."""
+
+            query_params = static_fixture({'currency': 'unexpected'})
+
+            def test_response_json(self, response, json):
+                assert response.status_code == HTTPStatus.OK
+                assert json['results'] == []
+
+        class TestConditionalGetOff:
+            """Test list without shared cache for the change counter."""
+
+            def test_no_validators(self, response):
+                assert response.status_code == HTTPStatus.OK
+                assert 'ETag' not in response
+                assert 'Last-Modified' not in response
+
+        class TestConditionalGet:
+            """Test ETag and Last-Modified validation."""
+
+            @pytest.fixture(autouse=True)
+            def conditional_get(self, settings):
+                settings.WALLET_LIST_CONDITIONAL_GET = True
+
+            def test_not_modified(self, client, url, response, mocker):
+                mock_list = mocker.patch(
+                    'rest_framework.mixins.ListModelMixin.list',
+                )
+                not_modified = client.get(
+                    url,
+                    HTTP_IF_NONE_MATCH=response['ETag'],
+                )
+                assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+                assert not_modified['ETag'] == response['ETag']
+                mock_list.assert_not_called()
+
+            def test_no_last_modified_in_second_of_change(self, response):
+                assert 'ETag' in response
+                assert 'Last-Modified' not in response
+
+            class TestSettledChange:
+                """Test Last-Modified of a change made seconds ago."""
+
+                @pytest.fixture(autouse=True)
+                def clock(self, mocker) -> Mock:
+                    mock_time = mocker.patch(
+                        'applications.wallets.changes.time',
+                    )
+                    mock_time.time.side_effect = count(int(time.time()))
+                    mock_time.time_ns.return_value = time.time_ns()
+                    return mock_time
+
+                def test_not_modified_since(self, client, url, response):
+                    not_modified = client.get(
+                        url,
+                        HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+                    )
+                    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+            def test_new_wallet_changes_etag(
+                self,
+                client,
+                url,
+                response,
+                wallet_factory,
+            ):
+                wallet_factory(
+                    address=FuzzyText(prefix='0x', length=40, chars=hexdigits),
+                )
+                modified = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                assert modified.status_code == HTTPStatus.OK
+                assert modified['ETag'] != response['ETag']
+                assert len(modified.json()['results']) == 3
+
+            def test_page_etags_differ(self, client, url, response):
+                next_page = client.get(url, {'page_size': 1})
+                assert next_page['ETag'] != response['ETag']
+
+            def test_rows_written_without_counter_bump(
+                self,
+                client,
+                url,
+                response,
+                wallet_factory,
+            ):
+                """Changed rows are seen when the counter is not bumped."""
+                with patch('applications.wallets.changes.bump_wallet_changes'):
+                    wallet_factory(
+                        address=FuzzyText(
+                            prefix='0x',
+                            length=40,
+                            chars=hexdigits,
+                        ),
+                    )
+                changed_at = int(time.time()) - 60
+                cache.set(CHANGED_AT_CACHE_KEY, changed_at, timeout=None)
+                modified = client.get(
+                    url,
+                    HTTP_IF_MODIFIED_SINCE=http_date(changed_at),
+                )
+                assert modified.status_code == HTTPStatus.OK
+                assert len(modified.json()['results']) == 3
+                not_modified = client.get(
+                    url,
+                    HTTP_IF_NONE_MATCH=modified['ETag'],
+                )
+                assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+                modified = client.get(
+                    url,
+                    HTTP_IF_NONE_MATCH=response['ETag'],
+                )
+                assert modified.status_code == HTTPStatus.OK
+
+            def test_counter_lost(self, client, url, response):
+                cache.clear()
+                modified = client.get(
+                    url,
+                    HTTP_IF_NONE_MATCH=response['ETag'],
+                )
+                assert modified.status_code == HTTPStatus.OK
+                assert modified['ETag'] != response['ETag']
+
+        class TestPageCache:
+            """Test cache of rendered pages."""
+
+            @pytest.fixture(autouse=True)
+            def page_cache(self, settings):
+                settings.CACHES = {
+                    **settings.CACHES,
+                    'wallet_list': {
+                        'BACKEND': (
+                            'django.core.cache.backends.locmem.LocMemCache'
+                        ),
+                        'LOCATION': 'wallet-list-tests',
+                    },
+                }
+                settings.WALLET_LIST_CACHE = 'wallet_list'
+                settings.WALLET_LIST_CONDITIONAL_GET = True
+                yield
+                caches['wallet_list'].clear()
+
+            def test_page_is_cached(self, client, url, response, mocker):
+                spy_list = mocker.spy(ListModelMixin, 'list')
+                cached = client.get(url)
+                assert cached.status_code == HTTPStatus.OK
+                assert cached.content == response.content
+                assert cached['Content-Type'] == response['Content-Type']
+                assert cached['ETag'] == response['ETag']
+                spy_list.assert_not_called()
+
+    class TestBalancesAction(UsesGetMethod):
+        """Test balances action."""
+
+        url = static_fixture(
+            reverse('wallets:wallets-balances')
+        )
+        query_params = lambda_fixture(
+            lambda wallet: {'address': wallet.address},
+        )
+
+        def test_response_json(self, response, json, wallet, balance):
+            assert response.status_code == HTTPStatus.OK
+            assert json == [{
+                'address': wallet.address,
+                'currency': wallet.currency,
+                'balance': balance,
+            }]
+
+        class TestUnknownWallet:
+            """Test balances of unknown wallets."""
+
+            query_params = static_fixture(
+                {'address': '0x' + secrets.token_hex(20)},
+            )
+
+            def test_response_json(
+                self,
+                response,
+                json,
+                mock_make_batch_request,
+            ):
+                assert response.status_code == HTTPStatus.OK
+                assert json == []
+                mock_make_batch_request.assert_not_called()
+
+        class TestBadRequest:
+            """Test address validation."""
+
+            @pytest.fixture(params=({}, {'address': '0x' + '1' * 39}))
+            def query_params(self, request) -> Dict[str, str]:
+                return request.param
+
+            def test_response(self, response):
+                assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        @pytest.fixture(autouse=True)
+        def mock_block_number(self, mocker) -> Mock:
+            return mocker.patch(
+                'web3.eth.Eth.block_number',
+                new_callable=PropertyMock,
+                return_value=100,
+            )
+
+    class TestBalancesBatchAction:
+        """Test batch balances action."""
+
+        url = static_fixture(
+            reverse('wallets:wallets-balances-batch')
+        )
+        data = lambda_fixture(
+            lambda wallet: {'addresses': [wallet.address], 'currency': 'eth'},
+        )
+
+        def test_response_json(self, response, json, wallet, balance):
+            assert response.status_code == HTTPStatus.OK
+            assert json == {
+                'balances': {wallet.address: balance},
+                'total': balance,
+            }
+
+        class TestBadRequest:
+            """Test validation."""
+
+            data = static_fixture({'addresses': ['0x']})
+
+            def test_response(self, response):
+                assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        class TestNoSelection:
+            """Test request without addresses and currency."""
+
+            data = static_fixture({})
+
+            def test_response(self, response, mock_make_batch_request):
+                assert response.status_code == HTTPStatus.BAD_REQUEST
+                mock_make_batch_request.assert_not_called()
+
+        class TestTooManyWallets:
+            """Test selection above WALLET_BALANCE_BATCH_MAX_WALLETS."""
+
+            data = static_fixture({'currency': 'eth'})
+
+            def test_response(self, response, mock_make_batch_request):
+                assert response.status_code == HTTPStatus.BAD_REQUEST
+                mock_make_batch_request.assert_not_called()
+
+            @pytest.fixture(autouse=True)
+            def max_wallets(self, settings, wallet_factory):
+                settings.WALLET_BALANCE_BATCH_MAX_WALLETS = 1
+                wallet_factory.create_batch(
+                    2,
+                    address=FuzzyText(prefix='0x', length=40, chars=hexdigits),
+                )
+
+        class TestTooManyAddresses:
+            """Test more addresses than WALLET_BALANCE_BATCH_MAX_WALLETS."""
+
+            data = static_fixture({
+                'addresses': ['0x' + secrets.token_hex(20) for _ in range(2)],
+            })
+
+            def test_response(self, response, json):
+                assert response.status_code == HTTPStatus.BAD_REQUEST
+                assert 'addresses' in json
+
+            @pytest.fixture(autouse=True)
+            def max_wallets(self, settings):
+                settings.WALLET_BALANCE_BATCH_MAX_WALLETS = 1
+
+        @pytest.fixture(autouse=True)
+        def mock_block_number(self, mocker) -> Mock:
+            return mocker.patch(
+                'web3.eth.Eth.block_number',
+                new_callable=PropertyMock,
+                return_value=100,
+            )
+
+        @pytest.fixture(autouse=True)
+        def mock_make_batch_request(self, mocker, balance) -> Mock:
+            return mocker.patch(
+                'main.w3.PooledHTTPProvider.make_batch_request',
+                return_value=[{'id': 0, 'result': hex(balance)}],
+            )
+
+    class TestSweepAction:
+        """Test sweep action."""
+
+        url = static_fixture(
+            reverse('wallets:wallets-sweep')
+        )
+        destination = static_fixture('0x' + secrets.token_hex(20))
+        missing_address = static_fixture('0x' + secrets.token_hex(20))
+        data = lambda_fixture(
+            lambda wallet, destination, missing_address: {
+                'addresses': [wallet.address, missing_address],
+                'destination': destination,
+            },
+        )
+
+        def test_response_json(
+            self,
+            response,
+            json,
+            wallet,
+            destination,
+            missing_address,
+        ):
+            assert response.status_code == HTTPStatus.OK
+            assert json == {
+                'destination': destination,
+                'results': [{
+                    'address': wallet.address,
+                    'status': 'sent',
+                    'hash': '0x' + b'signed-hash'.hex(),
+                    'nonce': 0,
+                    'value': 10 ** 18 - 21000 * 4000000000,
+                    'error': None,
+                }],
+                'missing': [missing_address],
+            }
+
+        class TestBadRequest:
+            """Test validation."""
+
+            @pytest.fixture(params=(
+                {'destination': '0x' + '1' * 40},
+                {'addresses': ['0x' + '1' * 40], 'destination': '0x'},
+                {'currency': 'eth'},
+            ))
+            def data(self, request) -> Dict[str, Any]:
+                return request.param
+
+            def test_response(self, response):
+                assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        @pytest.fixture(autouse=True)
+        def mock_make_batch_request(self, mocker) -> Mock:
+            return mocker.patch(
+                'main.w3.PooledHTTPProvider.make_batch_request',
+                return_value=[
+                    {'id': 0, 'result': hex(10 ** 18)},
+                    {'id': 1, 'result': hex(0)},
+                ],
+            )
+
+        @pytest.fixture(autouse=True)
+        def mock_sign_transaction(self, mocker) -> Mock:
+            return mocker.patch(
+                'applications.wallets.sweep.sign_transaction',
+                return_value=Mock(
+                    rawTransaction=HexBytes(b'raw'),
+                    hash=HexBytes(b'signed-hash'),
+                ),
+            )
+
+        @pytest.fixture(autouse=True)
+        def mock_send_raw_transaction(self, mocker) -> Mock:
+            return mocker.patch(
+                'web3.eth.Eth.send_raw_transaction',
+                return_value=HexBytes(b'signed-hash'),
+            )
+
+    class TestTransactionAction(UsesGetMethod):
+        """Test transaction status action."""
+
+        wallet_transaction = lambda_fixture(
+            lambda wallet_transaction_factory: wallet_transaction_factory(),
+        )
+        url = lambda_fixture(
+            lambda wallet_transaction: reverse(
+                'wallets:wallets-transaction',
+                kwargs={'hash': wallet_transaction.hash},
+            ),
+        )
+
+        def test_response_json(self, response, json, wallet_transaction):
+            assert response.status_code == HTTPStatus.OK
+            assert json['hash'] == wallet_transaction.hash
+            assert json['address'] == wallet_transaction.wallet.address
+            assert json['status'] == 'pending'
+            assert json['value'] == 10 ** 18
+
+        def test_node_is_not_asked(self, response, mock_make_request):
+            assert response.status_code == HTTPStatus.OK
+            mock_make_request.assert_not_called()
+
+        class TestUnknownTransaction:
+            """Test unknown hash."""
+
+            url = static_fixture(
+                reverse(
+                    'wallets:wallets-transaction',
+                    kwargs={'hash': '0x' + '1' * 64},
+                ),
+            )
+
+            def test_response(self, response):
+                assert response.status_code == HTTPStatus.NOT_FOUND
+
+        @pytest.fixture(autouse=True)
+        def mock_make_request(self, mocker) -> Mock:
+            return mocker.patch('main.w3.PooledHTTPProvider.make_request')
+
+    class TestExportAction(UsesGetMethod):
+        """Test export action."""
+
+        url = static_fixture(
+            reverse('wallets:wallets-export')
+        )
+
+        def test_response(
+            self,
+            mock_fernet_decrypt,
+            response,
+            wallets,
+        ):
+            assert response.status_code == HTTPStatus.OK
+            assert response.streaming
+            assert response['Content-Type'] == 'application/x-ndjson'
+            rows = [
+                json_module.loads(line)
+                for line in b''.join(response).splitlines()
+            ]
+            assert {row['address'] for row in rows} == {
+                wallet.address for wallet in wallets
+            }
+            mock_fernet_decrypt.assert_not_called()
+
+        class TestCsv:
+            """Test CSV export."""
+
+            query_params = static_fixture({'output': 'csv'})
+
+            def test_response(self, response, wallets):
+                assert response.status_code == HTTPStatus.OK
+                assert response['Content-Type'] == 'text/csv'
+                lines = b''.join(response).decode().splitlines()
+                assert lines[0] == 'address,currency'
+                assert len(lines) == len(wallets) + 1
+
+        class TestUnknownFormat:
+            """Test unknown export format."""
+
+            query_params = static_fixture({'output': 'xml'})
+
+            def test_response(self, response):
+                assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        @pytest.fixture
+        def wallets(self, wallet_factory) -> List['Wallet']:
+            return wallet_factory.create_batch(
+                3,
+                address=FuzzyText(prefix='0x', length=40, chars=hexdigits),
             )
 
     class TestCreateMethod:
@@ -187,6 +898,31 @@ class TestWalletViewSet(ViewSetTest, UsesPostMethod):
             returned_keys = list(sorted(json.keys()))
             assert expected_keys == returned_keys
 
+        class TestPrivateKey:
+            """Test creation from a private key."""
+
+            private_key = '0x' + secrets.token_hex(32)
+            data = static_fixture({'private_key': private_key})
+
+            def test_response(self, response):
+                assert response.status_code == HTTPStatus.CREATED
+                wallet = Wallet.objects.get()
+                assert wallet.private_key == self.private_key
+
+        class TestBadRequest:
+            """Test private key validation."""
+
+            @pytest.fixture(params=(
+                'private_key',
+                '0x' + '1' * 63,
+                '0x' + 'g' * 64,
+            ))
+            def data(self, request) -> Dict[str, Any]:
+                return {'private_key': request.param}
+
+            def test_response(self, response):
+                assert response.status_code == HTTPStatus.BAD_REQUEST
+
 
 @pytest.fixture(autouse=True)
 def mock_send_transaction(mocker) -> Mock:
@@ -197,30 +933,38 @@ def mock_send_transaction(mocker) -> Mock:
     )
 
 
+def assert_transfer_params(mock_sign_transaction: Mock, balance: int):
+    """Check that the transfer pays the fee out of the balance."""
+    params = mock_sign_transaction.call_args[0][0]
+    assert params['gas'] == 21000
+    assert params['maxFeePerGas'] == 4000000000
+    assert params['value'] == balance - 21000 * 4000000000
+    assert params['value'] + params['gas'] * params['maxFeePerGas'] == (
+        balance
+    )
+
+
 @pytest.fixture
 def expected_keys() -> List[str]:
     return list(sorted(['address', 'currency']))
 
 
-@pytest.fixture(autouse=True)
-def mock_get_balance(mocker) -> Mock:
-    return mocker.patch(
-        'web3.eth.Eth.get_balance',
-        return_value=5000000000,
-    )
+@pytest.fixture
+def balance() -> int:
+    return 10 ** 18
 
 
-@pytest.fixture(autouse=True)
-def mock_generate_gas_price(mocker) -> Mock:
-    return mocker.patch(
-        'web3.eth.Eth.generate_gas_price',
-        return_value=4,
-    )
+@pytest.fixture
+def nonce() -> int:
+    return 0
 
 
 @pytest.fixture(autouse=True)
-def mock_get_transaction_count(mocker) -> Mock:
+def mock_make_batch_request(mocker, balance, nonce) -> Mock:
     return mocker.patch(
-        'web3.eth.Eth.get_transaction_count',
-        return_value=0,
+        'main.w3.PooledHTTPProvider.make_batch_request',
+        return_value=[
+            {'jsonrpc': '2.0', 'id': 0, 'result': hex(balance)},
+            {'jsonrpc': '2.0', 'id': 1, 'result': hex(nonce)},
+        ],
     )
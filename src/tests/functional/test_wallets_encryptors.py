@@ -1,6 +1,11 @@
 import secrets
 
-from applications.wallets.encryptors import WalletSecretFernetEncryptor
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet
+
+from applications.wallets.encryptors import (WalletSecretAESGCMEncryptor,
+                                             WalletSecretFernetEncryptor)
 
 
 def test_wallet_secret_fernet_encryptor():
@@ -12,3 +17,53 @@ def test_wallet_secret_fernet_encryptor():
     assert len(encrypted) < maximum_encrypted_length
     decrypted = WalletSecretFernetEncryptor.decrypt(encrypted)
     assert decrypted == private_key
+
+
+def test_wallet_secret_fernet_encryptor_decrypts_with_old_keys(settings):
+    """Test WalletSecretFernetEncryptor with several keys."""
+    old_key, new_key = Fernet.generate_key(), Fernet.generate_key()
+    private_key = '0x' + secrets.token_hex(32)
+    settings.FERNET_KEYS = [old_key]
+    encrypted = WalletSecretFernetEncryptor.encrypt(private_key)
+    settings.FERNET_KEYS = [new_key, old_key]
+    assert WalletSecretFernetEncryptor.decrypt(encrypted) == private_key
+    rotated = WalletSecretFernetEncryptor.rotate(encrypted)
+    settings.FERNET_KEYS = [new_key]
+    assert WalletSecretFernetEncryptor.decrypt(rotated) == private_key
+
+
+def test_wallet_secret_aes_gcm_encryptor(settings):
+    """Test WalletSecretAESGCMEncryptor."""
+    settings.AES_GCM_KEYS = [Fernet.generate_key()]
+    private_key = '0x' + secrets.token_hex(32)
+    encrypted = WalletSecretAESGCMEncryptor.encrypt(private_key)
+    assert len(encrypted) == 61
+    assert encrypted[:1] == b'\x01'
+    assert WalletSecretAESGCMEncryptor.decrypt(encrypted) == private_key
+    assert WalletSecretAESGCMEncryptor.encrypt(private_key) != encrypted
+
+
+def test_wallet_secret_aes_gcm_encryptor_decrypts_with_old_keys(settings):
+    """Test WalletSecretAESGCMEncryptor with several keys."""
+    old_key, new_key = Fernet.generate_key(), Fernet.generate_key()
+    private_key = '0x' + secrets.token_hex(32)
+    settings.AES_GCM_KEYS = [old_key]
+    encrypted = WalletSecretAESGCMEncryptor.encrypt(private_key)
+    settings.AES_GCM_KEYS = [new_key, old_key]
+    assert WalletSecretAESGCMEncryptor.decrypt(encrypted) == private_key
+    rotated = WalletSecretAESGCMEncryptor.rotate(encrypted)
+    settings.AES_GCM_KEYS = [new_key]
+    assert WalletSecretAESGCMEncryptor.decrypt(rotated) == private_key
+    with pytest.raises(InvalidTag):
+        WalletSecretAESGCMEncryptor.decrypt(encrypted)
+
+
+def test_wallet_secret_aes_gcm_encryptor_converts_fernet(settings):
+    """Test WalletSecretAESGCMEncryptor with Fernet tokens."""
+    settings.AES_GCM_KEYS = [Fernet.generate_key()]
+    private_key = '0x' + secrets.token_hex(32)
+    token = WalletSecretFernetEncryptor.encrypt(private_key)
+    assert WalletSecretAESGCMEncryptor.decrypt(token) == private_key
+    rotated = WalletSecretAESGCMEncryptor.rotate(token)
+    assert rotated[:1] == b'\x01'
+    assert WalletSecretAESGCMEncryptor.decrypt(rotated) == private_key
@@ -0,0 +1,52 @@
+import time
+
+from django.core.cache import cache
+
+from applications.wallets.changes import (CHANGED_AT_CACHE_KEY,
+                                          bump_wallet_changes,
+                                          get_wallet_changes)
+from applications.wallets.checks import check_wallet_list_conditional_get
+
+
+def test_bumped_on_commit(django_capture_on_commit_callbacks):
+    changes, _ = get_wallet_changes(0)
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        bump_wallet_changes()
+        assert get_wallet_changes(0)[0] == changes
+    assert len(callbacks) == 1
+    assert get_wallet_changes(0)[0] == changes + 1
+
+
+def test_bumped_on_delete(django_capture_on_commit_callbacks, wallet):
+    changes, _ = get_wallet_changes(0)
+    with django_capture_on_commit_callbacks(execute=True):
+        wallet.delete()
+    assert get_wallet_changes(0)[0] == changes + 1
+
+
+def test_new_max_id_is_a_change():
+    changes, _ = get_wallet_changes(1)
+    assert get_wallet_changes(1)[0] == changes
+    assert get_wallet_changes(2)[0] == changes + 1
+
+
+def test_lost_counter_starts_from_clock():
+    started = time.time_ns()
+    get_wallet_changes(1)
+    cache.clear()
+    assert get_wallet_changes(1)[0] >= started
+
+
+def test_changed_at_hidden_in_second_of_change():
+    assert get_wallet_changes(1)[1] is None
+    changed_at = int(time.time()) - 1
+    cache.set(CHANGED_AT_CACHE_KEY, changed_at, timeout=None)
+    assert get_wallet_changes(1)[1] == changed_at
+
+
+def test_conditional_get_off_is_warned(settings):
+    settings.WALLET_LIST_CONDITIONAL_GET = False
+    warnings = check_wallet_list_conditional_get(None)
+    assert [warning.id for warning in warnings] == ['wallets.W001']
+    settings.WALLET_LIST_CONDITIONAL_GET = True
+    assert check_wallet_list_conditional_get(None) == []
@@ -0,0 +1,102 @@
+import re
+import secrets
+from http import HTTPStatus
+from string import hexdigits
+from unittest.mock import Mock
+
+import pytest
+from django.urls import reverse
+from factory.fuzzy import FuzzyText
+from hexbytes import HexBytes
+
+from main.costs import get_request_costs
+
+SERVER_TIMING_PATTERN = re.compile(
+    r'(?P<name>\w+);desc="(?P<count>\d+) [\w-]+";dur=[\d.]+',
+)
+
+
+@pytest.fixture(autouse=True)
+def request_costs_enabled(settings):
+    settings.REQUEST_COSTS_ENABLED = True
+
+
+@pytest.fixture
+def mock_node(mocker) -> None:
+    mocker.patch(
+        'main.w3.PooledHTTPProvider.make_batch_request',
+        return_value=[
+            {'id': 0, 'result': hex(10 ** 18)},
+            {'id': 1, 'result': hex(0)},
+        ],
+    )
+    mocker.patch(
+        'main.w3.PooledHTTPProvider.make_request',
+        return_value={'id': 0, 'result': '0x' + '1' * 64},
+    )
+    mocker.patch(
+        'eth_account.Account.sign_transaction',
+        return_value=Mock(rawTransaction=HexBytes(b'raw')),
+    )
+
+
+def get_counts(response) -> dict:
+    return {
+        match['name']: int(match['count'])
+        for match in SERVER_TIMING_PATTERN.finditer(response['Server-Timing'])
+    }
+
+
+def test_list_costs(client, wallet_factory):
+    wallet_factory.create_batch(
+        3,
+        address=FuzzyText(prefix='0x', length=40, chars=hexdigits),
+    )
+    response = client.get(reverse('wallets:wallets-list'))
+    assert response.status_code == HTTPStatus.OK
+    assert get_counts(response) == {'db': 1, 'crypto': 0, 'rpc': 0}
+
+
+@pytest.mark.usefixtures('mock_node')
+def test_transfer_costs(client, wallet, mocker):
+    mock_logger = mocker.patch('main.costs.logger')
+    response = client.post(
+        reverse('wallets:wallets-transfer'),
+        {
+            '_from': wallet.address,
+            '_to': '0x' + secrets.token_hex(20),
+            'currency': 'eth',
+        },
+        content_type='application/json',
+    )
+    assert response.status_code == HTTPStatus.OK
+    counts = get_counts(response)
+    assert counts['crypto'] == 1
+    assert counts['rpc'] == 2
+    assert counts['db'] > 0
+    fields = mock_logger.info.call_args.kwargs['extra']
+    assert fields['path'] == reverse('wallets:wallets-transfer')
+    assert fields['rpc_count'] == 2
+    assert get_request_costs() is None
+
+
+def test_costs_disabled(client, settings):
+    settings.REQUEST_COSTS_ENABLED = False
+    response = client.get(reverse('wallets:wallets-list'))
+    assert 'Server-Timing' not in response
+
+
+def test_slow_request_profiled(client, settings, tmp_path):
+    settings.REQUEST_PROFILE_SAMPLE_RATE = 1
+    settings.REQUEST_PROFILE_MIN_DURATION = 0
+    settings.REQUEST_PROFILE_DIR = str(tmp_path)
+    client.get(reverse('wallets:wallets-list'))
+    assert len(list(tmp_path.glob('*-get-*.prof'))) == 1
+
+
+def test_fast_request_not_profiled(client, settings, tmp_path):
+    settings.REQUEST_PROFILE_SAMPLE_RATE = 1
+    settings.REQUEST_PROFILE_MIN_DURATION = 60
+    settings.REQUEST_PROFILE_DIR = str(tmp_path)
+    client.get(reverse('wallets:wallets-list'))
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,135 @@
+import threading
+
+import pytest
+from eth_account import Account
+from web3 import Web3
+
+from applications.wallets.fees import FeeOracle
+from applications.wallets.keys import generate_private_key
+from main.devnode import DevNode, DevNodeServer
+from main.w3 import batch_request, get_w3
+
+
+@pytest.fixture
+def node() -> DevNode:
+    return DevNode(default_balance=10 ** 18)
+
+
+@pytest.fixture
+def node_url(node, settings) -> str:
+    server = DevNodeServer(('127.0.0.1', 0), node)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.W3_PROVIDER_URL = 'http://127.0.0.1:{0}'.format(
+        server.server_address[1],
+    )
+    yield settings.W3_PROVIDER_URL
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def account():
+    return Account.from_key(generate_private_key())
+
+
+def sign(
+    account,
+    nonce: int,
+    to: str,
+    value: int,
+    gas: int = 21000,
+) -> bytes:
+    return account.sign_transaction({
+        'nonce': nonce,
+        'maxFeePerGas': 4000000000,
+        'maxPriorityFeePerGas': 2000000000,
+        'gas': gas,
+        'to': to,
+        'value': value,
+        'data': b'',
+        'type': 2,
+        'chainId': 1,
+    }).rawTransaction
+
+
+@pytest.mark.usefixtures('node_url')
+def test_send_raw_transaction(node, account):
+    w3 = get_w3()
+    recipient = Web3.toChecksumAddress('0x' + '1' * 40)
+    transaction_hash = w3.eth.send_raw_transaction(
+        sign(account, 0, recipient, 10),
+    )
+    assert w3.eth.get_balance(recipient) == 10 ** 18 + 10
+    assert w3.eth.get_balance(account.address) == (
+        10 ** 18 - 10 - 21000 * (node.base_fee + node.priority_fee)
+    )
+    assert w3.eth.get_transaction_count(account.address, 'pending') == 1
+    assert w3.eth.block_number == 1
+    receipt = w3.eth.get_transaction_receipt(transaction_hash)
+    assert receipt['status'] == 1
+    assert receipt['from'] == account.address
+    with pytest.raises(ValueError, match='nonce too low'):
+        w3.eth.send_raw_transaction(sign(account, 0, recipient, 10))
+
+
+@pytest.mark.usefixtures('node_url')
+def test_nonce_too_high(account):
+    recipient = Web3.toChecksumAddress('0x' + '1' * 40)
+    with pytest.raises(ValueError, match='nonce too high'):
+        get_w3().eth.send_raw_transaction(sign(account, 1, recipient, 10))
+    assert get_w3().eth.get_transaction_count(account.address) == 0
+
+
+@pytest.mark.usefixtures('node_url')
+def test_intrinsic_gas_too_low(account):
+    recipient = Web3.toChecksumAddress('0x' + '1' * 40)
+    with pytest.raises(ValueError, match='intrinsic gas too low'):
+        get_w3().eth.send_raw_transaction(
+            sign(account, 0, recipient, 10, gas=2),
+        )
+
+
+@pytest.mark.usefixtures('node_url')
+def test_insufficient_funds(account):
+    recipient = Web3.toChecksumAddress('0x' + '1' * 40)
+    with pytest.raises(ValueError, match='insufficient funds'):
+        get_w3().eth.send_raw_transaction(
+            sign(account, 0, recipient, 10 ** 18),
+        )
+
+
+@pytest.mark.usefixtures('node_url')
+def test_batch_request(account):
+    balance, nonce = batch_request(
+        get_w3(),
+        (
+            ('eth_getBalance', [account.address, 'latest']),
+            ('eth_getTransactionCount', [account.address, 'pending']),
+        ),
+    )
+    assert (balance, nonce) == (hex(10 ** 18), '0x0')
+
+
+@pytest.mark.usefixtures('node_url')
+def test_fee_history(node):
+    fees = FeeOracle().refresh()
+    assert fees.max_priority_fee_per_gas == node.priority_fee
+    assert fees.max_fee_per_gas == 2 * node.base_fee + node.priority_fee
+
+
+def test_error_injection(account):
+    node = DevNode(error_rate=1)
+    response = node.handle([
+        {'id': 1, 'method': 'eth_getBalance', 'params': [account.address]},
+    ])
+    assert response == [{
+        'jsonrpc': '2.0',
+        'id': 1,
+        'error': {'code': -32000, 'message': 'injected error'},
+    }]
+
+
+def test_unknown_method(node):
+    response = node.handle({'id': 1, 'method': 'eth_mining', 'params': []})
+    assert response['error']['code'] == -32601
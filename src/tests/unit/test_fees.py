@@ -0,0 +1,94 @@
+import time
+
+import pytest
+from web3.datastructures import AttributeDict
+
+from applications.wallets import fees
+from applications.wallets.fees import FeeOracle
+
+
+@pytest.fixture
+def oracle() -> FeeOracle:
+    oracle = FeeOracle()
+    yield oracle
+    oracle.stop()
+
+
+@pytest.fixture(autouse=True)
+def mock_get_fees():
+    """Use the real fee oracle of the process."""
+    yield
+    fees.reset_fee_oracle()
+
+
+@pytest.fixture(autouse=True)
+def mock_fee_history(mocker):
+    return mocker.patch(
+        'web3.eth.Eth.fee_history',
+        return_value=AttributeDict({
+            'baseFeePerGas': [10, 20, 30],
+            'reward': [[1], [3]],
+        }),
+    )
+
+
+def test_refresh(oracle, mock_fee_history):
+    oracle.refresh()
+    fees = oracle.get_fees()
+    assert fees.max_priority_fee_per_gas == 2
+    assert fees.max_fee_per_gas == 2 * 30 + 2
+    mock_fee_history.assert_called_once()
+
+
+def test_get_fees_defaults(oracle, settings, mock_fee_history):
+    defaults = settings.ETHEREUM_TRANSACTIONS_DEFAULTS
+    assert oracle.get_fees().max_fee_per_gas == defaults['maxFeePerGas']
+    oracle.refresh()
+    settings.FEE_ORACLE_MAX_AGE = -1
+    assert oracle.get_fees().max_fee_per_gas == defaults['maxFeePerGas']
+    mock_fee_history.assert_called_once()
+
+
+def test_background_refresh(oracle, settings, mock_fee_history):
+    settings.FEE_ORACLE_INTERVAL = 0.01
+    oracle.start()
+    deadline = time.monotonic() + 5
+    while mock_fee_history.call_count < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    oracle.stop()
+    assert mock_fee_history.call_count >= 2
+    assert oracle.fees is not None
+
+
+def test_reset_fee_oracle_after_fork_with_lock_held(oracle, mocker):
+    mocker.patch.object(fees, '_oracle', oracle)
+    with fees._oracle_lock:
+        fees._reset_fee_oracle_after_fork()
+    assert fees._oracle is None
+    assert not fees._oracle_lock.locked()
+
+
+def test_get_fees_on_demand(settings, mock_fee_history):
+    settings.FEE_ORACLE_INTERVAL = 60
+    assert fees.get_fees().max_fee_per_gas == 2 * 30 + 2
+    assert fees.get_fees().max_fee_per_gas == 2 * 30 + 2
+    mock_fee_history.assert_called_once()
+    assert fees.get_fee_oracle()._thread is None
+
+
+def test_get_fees_on_demand_failure(settings, mock_fee_history):
+    mock_fee_history.side_effect = KeyError('eth_feeHistory')
+    defaults = settings.ETHEREUM_TRANSACTIONS_DEFAULTS
+    assert fees.get_fees().max_fee_per_gas == defaults['maxFeePerGas']
+    assert fees.get_fees().max_fee_per_gas == defaults['maxFeePerGas']
+    mock_fee_history.assert_called_once()
+
+
+def test_start_fee_oracle(mocker, mock_fee_history):
+    mocker.patch.object(fees, '_background', False)
+    fees.start_fee_oracle()
+    assert fees.get_fee_oracle()._thread.is_alive()
+    fees.get_fees()
+    fees.reset_fee_oracle()
+    fees.get_fees()
+    assert fees.get_fee_oracle()._thread is not None
@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+from eth_account import Account
+
+from applications.wallets.keys import (derive_address, derive_addresses,
+                                       generate_private_key)
+
+
+def test_derive_address():
+    private_key = generate_private_key()
+    assert derive_address(private_key) == Account.from_key(private_key).address
+
+
+def test_derive_addresses():
+    private_keys = [generate_private_key() for _ in range(3)]
+    expected_addresses = [
+        Account.from_key(private_key).address for private_key in private_keys
+    ]
+    assert derive_addresses(private_keys) == expected_addresses
+
+
+def test_models_do_not_import_web3():
+    code = (
+        'import sys, django; django.setup(); '
+        'import applications.wallets.models; '
+        'assert "web3" not in sys.modules'
+    )
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+    subprocess.run((sys.executable, '-c', code), check=True, env=env)
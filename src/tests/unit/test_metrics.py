@@ -0,0 +1,122 @@
+from http import HTTPStatus
+from unittest.mock import Mock
+
+import pytest
+from django.urls import reverse
+
+from applications.wallets.encryptors import WalletSecretFernetEncryptor
+from main.metrics import (RPC_DURATION, RPC_ERRORS, RPC_REQUESTS,
+                          SECRET_OPERATIONS, Counter, Histogram)
+from main.w3 import batch_request, get_w3
+
+
+@pytest.fixture
+def metrics_enabled(settings):
+    settings.METRICS_ENABLED = True
+
+
+@pytest.fixture
+def mock_make_request(mocker) -> Mock:
+    return mocker.patch(
+        'main.w3.PooledHTTPProvider.make_request',
+        return_value={'jsonrpc': '2.0', 'id': 0, 'result': hex(100)},
+    )
+
+
+def test_counter_render():
+    counter = Counter('calls_total', 'Calls.', ('method',))
+    counter.inc('eth_call')
+    counter.inc('eth_"call"', amount=2)
+    assert counter.render() == [
+        '# HELP calls_total Calls.',
+        '# TYPE calls_total counter',
+        'calls_total{method="eth_\\"call\\""} 2',
+        'calls_total{method="eth_call"} 1',
+    ]
+
+
+def test_histogram_render():
+    histogram = Histogram('duration_seconds', 'Duration.', buckets=(0.1, 1))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+    assert histogram.render()[2:] == [
+        'duration_seconds_bucket{le="0.1"} 1',
+        'duration_seconds_bucket{le="1"} 2',
+        'duration_seconds_bucket{le="+Inf"} 3',
+        'duration_seconds_sum 5.55',
+        'duration_seconds_count 3',
+    ]
+
+
+@pytest.mark.usefixtures('metrics_enabled')
+def test_rpc_metrics_middleware(mock_make_request):
+    requests = RPC_REQUESTS.get('eth_blockNumber')
+    durations = RPC_DURATION.get_count('eth_blockNumber')
+    errors = RPC_ERRORS.get('eth_blockNumber')
+    assert get_w3().eth.block_number == 100
+    mock_make_request.return_value = {
+        'jsonrpc': '2.0',
+        'id': 0,
+        'error': {'code': -32000, 'message': 'failed'},
+    }
+    with pytest.raises(ValueError):
+        get_w3().eth.block_number
+    assert RPC_REQUESTS.get('eth_blockNumber') == requests + 2
+    assert RPC_DURATION.get_count('eth_blockNumber') == durations + 2
+    assert RPC_ERRORS.get('eth_blockNumber') == errors + 1
+
+
+@pytest.mark.usefixtures('metrics_enabled')
+def test_rpc_batch_metrics(mocker):
+    mocker.patch(
+        'main.w3.PooledHTTPProvider.make_batch_request',
+        return_value=[
+            {'id': 0, 'result': '0x1'},
+            {'id': 1, 'error': {'code': -32000, 'message': 'failed'}},
+        ],
+    )
+    batches = RPC_DURATION.get_count('batch')
+    errors = RPC_ERRORS.get('eth_getTransactionCount')
+    with pytest.raises(ValueError):
+        batch_request(
+            get_w3(),
+            (
+                ('eth_getBalance', ['0x' + '1' * 40, 'latest']),
+                ('eth_getTransactionCount', ['0x' + '1' * 40, 'pending']),
+            ),
+        )
+    assert RPC_DURATION.get_count('batch') == batches + 1
+    assert RPC_ERRORS.get('eth_getTransactionCount') == errors + 1
+
+
+def test_rpc_metrics_disabled(mock_make_request):
+    requests = RPC_REQUESTS.get('eth_blockNumber')
+    get_w3().eth.block_number
+    assert RPC_REQUESTS.get('eth_blockNumber') == requests
+
+
+@pytest.mark.usefixtures('metrics_enabled')
+def test_secret_operations():
+    labels = ('WalletSecretFernetEncryptor', 'decrypt')
+    decrypts = SECRET_OPERATIONS.get(*labels)
+    WalletSecretFernetEncryptor.decrypt(
+        WalletSecretFernetEncryptor.encrypt('0x' + '1' * 64),
+    )
+    assert SECRET_OPERATIONS.get(*labels) == decrypts + 1
+
+
+@pytest.mark.usefixtures('metrics_enabled')
+def test_metrics_endpoint(client, mock_make_request):
+    get_w3().eth.block_number
+    response = client.get(reverse('metrics'))
+    assert response.status_code == HTTPStatus.OK
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert 'w3_rpc_requests_total{method="eth_blockNumber"}' in (
+        response.content.decode()
+    )
+
+
+def test_metrics_endpoint_disabled(client):
+    response = client.get(reverse('metrics'))
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -1,5 +1,10 @@
 import pytest
 
+from applications.wallets.encryptors import WalletSecretFernetEncryptor
+from applications.wallets.models import Wallet, WalletSecret
+
+ADDRESS = '0x52908400098527886E0F7030069857D2E4169EE7'
+
 
 def test_wallet_secret_field_uses_encryptor(
     mock_fernet_encrypt,
@@ -8,14 +13,41 @@ def test_wallet_secret_field_uses_encryptor(
 ):
     wallet.refresh_from_db()
     mock_fernet_encrypt.assert_called_once()
+    mock_fernet_decrypt.assert_not_called()
+    str(wallet.private_key)
+    str(wallet.private_key)
     mock_fernet_decrypt.assert_called_once()
 
 
+def test_wallet_secret_field_keeps_ciphertext_on_save(
+    mock_fernet_encrypt,
+    mock_fernet_decrypt,
+    wallet,
+):
+    wallet.refresh_from_db()
+    wallet.save()
+    mock_fernet_encrypt.assert_called_once()
+    mock_fernet_decrypt.assert_not_called()
+
+
+def test_wallet_secret_is_unhashable():
+    secrets = [
+        WalletSecret(
+            WalletSecretFernetEncryptor.encrypt('private_key'),
+            WalletSecretFernetEncryptor,
+        )
+        for _ in range(2)
+    ]
+    assert secrets[0] == secrets[1]
+    with pytest.raises(TypeError):
+        hash(secrets[0])
+
+
 @pytest.mark.parametrize(
     'create_kwargs,expected_mock_called',
     (
-        ({'address': 'address', 'private_key': 'private_key'}, False),
-        ({'address': 'address'}, False),
+        ({'address': ADDRESS, 'private_key': 'private_key'}, False),
+        ({'address': ADDRESS}, False),
         ({'private_key': 'private_key'}, True),
         ({}, True),
     ),
@@ -31,3 +63,15 @@ def test_wallet_creation(
         mock_wallet_create_new_address.assert_called_once()
     else:
         mock_wallet_create_new_address.assert_not_called()
+
+
+def test_wallet_address_is_stored_canonical(wallet_factory):
+    wallet = wallet_factory(address=ADDRESS.lower())
+    assert wallet.address == ADDRESS
+    wallet.refresh_from_db()
+    assert wallet.address == ADDRESS
+    assert Wallet.objects.filter(address=ADDRESS.lower()).get() == wallet
+    assert Wallet.objects.filter(address__in=[ADDRESS.upper()[2:]]).exists()
+    assert list(Wallet.objects.values_list('address', flat=True)) == [
+        ADDRESS,
+    ]
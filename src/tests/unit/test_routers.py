@@ -0,0 +1,102 @@
+from contextvars import copy_context
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.test import RequestFactory
+
+from applications.wallets.models import Wallet
+from main.routers import (ReplicaLagMonitor, ReplicaRouter,
+                          ReplicaRoutingMiddleware, _use_primary, use_primary)
+
+# Test transactions would keep every read on the primary.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica_0']
+    settings.DATABASE_REPLICA_MAX_LAG = 5
+    settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL = 5
+    # Writes of test database setup pin the main context to the primary.
+    token = _use_primary.set(False)
+    yield settings.DATABASE_REPLICAS
+    _use_primary.reset(token)
+
+
+@pytest.fixture
+def mock_measure_lag(mocker):
+    return mocker.patch.object(
+        ReplicaLagMonitor,
+        '_measure_lag',
+        return_value=0.5,
+    )
+
+
+def route_read(router, model) -> str:
+    return copy_context().run(router.db_for_read, model)
+
+
+def test_reads_go_to_primary_without_replicas():
+    assert route_read(ReplicaRouter(), Wallet) == 'default'
+
+
+@pytest.mark.usefixtures('replicas', 'mock_measure_lag')
+def test_wallet_reads_go_to_replica():
+    router = ReplicaRouter()
+    assert route_read(router, Wallet) == 'replica_0'
+    assert route_read(router, Session) == 'default'
+
+
+@pytest.mark.usefixtures('replicas', 'mock_measure_lag')
+def test_reads_after_write_go_to_primary():
+    router = ReplicaRouter()
+
+    def write_and_read():
+        assert router.db_for_write(Wallet) == 'default'
+        return router.db_for_read(Wallet)
+
+    assert copy_context().run(write_and_read) == 'default'
+
+    def pin_and_read():
+        use_primary()
+        return router.db_for_read(Wallet)
+
+    assert copy_context().run(pin_and_read) == 'default'
+    assert route_read(router, Wallet) == 'replica_0'
+
+
+@pytest.mark.usefixtures('replicas', 'mock_measure_lag')
+def test_reads_in_transaction_go_to_primary():
+    router = ReplicaRouter()
+    with transaction.atomic():
+        assert route_read(router, Wallet) == 'default'
+
+
+@pytest.mark.usefixtures('replicas')
+@pytest.mark.parametrize(
+    'lag,expected_alias',
+    ((0.5, 'replica_0'), (10.0, 'default'), (None, 'default')),
+)
+def test_lagging_replica_falls_back_to_primary(
+    mock_measure_lag,
+    lag,
+    expected_alias,
+):
+    mock_measure_lag.return_value = lag
+    router = ReplicaRouter()
+    assert route_read(router, Wallet) == expected_alias
+    assert route_read(router, Wallet) == expected_alias
+    mock_measure_lag.assert_called_once()
+
+
+def test_middleware_resets_primary_pinning():
+    middleware = ReplicaRoutingMiddleware(
+        lambda request: ReplicaRouter()._must_use_primary(),
+    )
+
+    def pin_and_request():
+        use_primary()
+        return middleware(RequestFactory().get('/'))
+
+    assert copy_context().run(pin_and_request) is False
@@ -0,0 +1,83 @@
+import secrets
+
+from applications.wallets import signers
+from applications.wallets.encryptors import WalletSecretFernetEncryptor
+from applications.wallets.models import WalletSecret
+from applications.wallets.signers import SignerCache, get_signer_cache
+
+
+def create_wallets(wallet_factory, count: int):
+    return [
+        wallet_factory(address='0x' + secrets.token_hex(20))
+        for _ in range(count)
+    ]
+
+
+def test_signer_cache_hits(wallet):
+    wallet.refresh_from_db()
+    signer_cache = SignerCache(max_size=10, ttl=60)
+    account = signer_cache.get(wallet)
+    assert account.key.hex() == str(wallet.private_key)
+    assert signer_cache.get(wallet) is account
+    assert signer_cache.get_stats() == {
+        'hits': 1,
+        'misses': 1,
+        'size': 1,
+        'max_size': 10,
+    }
+
+
+def test_signer_cache_evicts_least_recently_used(wallet_factory):
+    first, second, third = create_wallets(wallet_factory, 3)
+    signer_cache = SignerCache(max_size=2, ttl=60)
+    signer_cache.get(first)
+    signer_cache.get(second)
+    signer_cache.get(first)
+    signer_cache.get(third)
+    signer_cache.get(first)
+    signer_cache.get(second)
+    assert (signer_cache.hits, signer_cache.misses) == (2, 4)
+
+
+def test_signer_cache_expires(wallet, mocker):
+    signer_cache = SignerCache(max_size=10, ttl=60)
+    monotonic = mocker.patch(
+        'applications.wallets.signers.time.monotonic',
+        return_value=100,
+    )
+    signer_cache.get(wallet)
+    monotonic.return_value = 161
+    signer_cache.get(wallet)
+    assert (signer_cache.hits, signer_cache.misses) == (0, 2)
+
+
+def test_signer_cache_misses_rotated_key(wallet):
+    wallet.refresh_from_db()
+    signer_cache = SignerCache(max_size=10, ttl=60)
+    signer_cache.get(wallet)
+    wallet.private_key = WalletSecret(
+        WalletSecretFernetEncryptor.rotate(wallet.private_key.encrypted_value),
+        WalletSecretFernetEncryptor,
+    )
+    signer_cache.get(wallet)
+    assert (signer_cache.hits, signer_cache.misses) == (0, 2)
+
+
+def test_signer_cache_invalidate(wallet_factory):
+    first, second = create_wallets(wallet_factory, 2)
+    signer_cache = SignerCache(max_size=10, ttl=60)
+    signer_cache.get(first)
+    signer_cache.get(second)
+    signer_cache.invalidate([first.pk])
+    assert signer_cache.get_stats()['size'] == 1
+    signer_cache.invalidate()
+    assert signer_cache.get_stats()['size'] == 0
+
+
+def test_reset_signer_cache_after_fork_with_locks_held(wallet):
+    signer_cache = get_signer_cache()
+    signer_cache.get(wallet)
+    with signers._signer_cache_lock, signer_cache._lock:
+        signers._reset_signer_cache_after_fork()
+    assert not signer_cache._signers
+    assert get_signer_cache() is not signer_cache
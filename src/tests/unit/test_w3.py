@@ -0,0 +1,309 @@
+import json
+import os
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+import requests
+from asgiref.sync import async_to_sync
+
+import main.w3
+from main.w3 import batch_request, get_async_w3, get_w3, reset_w3
+
+
+def test_get_w3_is_shared():
+    assert get_w3() is get_w3()
+
+
+def test_reset_w3():
+    w3 = get_w3()
+    reset_w3()
+    assert get_w3() is not w3
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='fork is unavailable')
+def test_get_w3_in_child_forked_with_lock_held():
+    w3 = get_w3()
+    with main.w3._w3_lock:
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if get_w3() is not w3 else 1)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            break
+        time.sleep(0.01)
+    else:
+        os.kill(pid, 9)
+        os.waitpid(pid, 0)
+        pytest.fail('Child blocked on the client lock')
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+
+
+def test_get_w3_uses_pooled_session(settings):
+    settings.W3_PROVIDER_URL = 'http://127.0.0.1:8545'
+    settings.W3_PROVIDER_POOL_SIZE = 3
+    settings.W3_PROVIDER_TIMEOUT = 1.5
+    provider = get_w3().provider
+    adapter = provider.session.get_adapter(settings.W3_PROVIDER_URL)
+    assert provider.endpoint_uri == settings.W3_PROVIDER_URL
+    assert adapter._pool_maxsize == settings.W3_PROVIDER_POOL_SIZE
+    assert dict(provider.get_request_kwargs())['timeout'] == 1.5
+
+
+def test_batch_request_keeps_calls_order(mocker):
+    w3 = get_w3()
+    post = mocker.patch.object(w3.provider.session, 'post')
+    post.return_value.content = (
+        b'[{"id": 1, "result": "0x2"}, {"id": 0, "result": "0x1"}]'
+    )
+    mocker.patch.object(w3.provider, 'request_counter', iter(range(2)))
+    results = batch_request(
+        w3,
+        (('eth_getBalance', ['0x0', 'latest']), ('eth_gasPrice', [])),
+    )
+    assert results == ['0x1', '0x2']
+    post.assert_called_once()
+
+
+def test_batch_request_raises_rpc_error(mocker):
+    w3 = get_w3()
+    mocker.patch.object(
+        w3.provider,
+        'make_batch_request',
+        return_value=[{'id': 0, 'error': {'code': -32000, 'message': ''}}],
+    )
+    with pytest.raises(ValueError):
+        batch_request(w3, (('eth_gasPrice', []),))
+
+
+def test_batch_request_raises_batch_error(mocker):
+    w3 = get_w3()
+    post = mocker.patch.object(w3.provider.session, 'post')
+    post.return_value.content = (
+        b'{"jsonrpc": "2.0", "id": null,'
+        b' "error": {"code": -32600, "message": "batch too large"}}'
+    )
+    with pytest.raises(ValueError, match='batch too large'):
+        batch_request(w3, (('eth_gasPrice', []), ('eth_chainId', [])))
+
+
+def test_batch_request_raises_missing_response(mocker):
+    w3 = get_w3()
+    post = mocker.patch.object(w3.provider.session, 'post')
+    post.return_value.content = b'[{"id": 0, "result": "0x1"}]'
+    mocker.patch.object(w3.provider, 'request_counter', iter(range(2)))
+    with pytest.raises(ValueError, match='misses requests'):
+        batch_request(w3, (('eth_gasPrice', []), ('eth_chainId', [])))
+
+
+PROVIDER_URLS = ['http://first:8545', 'http://second:8545']
+
+
+@pytest.fixture
+def provider_urls(settings):
+    settings.W3_PROVIDER_URLS = PROVIDER_URLS
+    settings.W3_PROVIDER_MAX_FAILURES = 2
+    settings.W3_PROVIDER_EJECT_SECONDS = 30
+    settings.W3_PROVIDER_HEDGE_AFTER = 0
+    return PROVIDER_URLS
+
+
+@pytest.fixture
+def make_request(mocker):
+    return mocker.patch(
+        'main.w3.PooledHTTPProvider.make_request',
+        autospec=True,
+        return_value={'jsonrpc': '2.0', 'id': 0, 'result': '0x1'},
+    )
+
+
+def get_called_urls(make_request):
+    return [call.args[0].endpoint_uri for call in make_request.call_args_list]
+
+
+@pytest.mark.usefixtures('provider_urls')
+def test_reads_go_to_fastest_provider(make_request):
+    router = get_w3().provider.router
+    first, second = router.endpoints
+    first.latency, second.latency = 0.5, 0.1
+    assert get_w3().eth.block_number == 1
+    assert get_called_urls(make_request) == [PROVIDER_URLS[1]]
+
+
+@pytest.mark.usefixtures('provider_urls')
+def test_broadcast_goes_to_first_provider(make_request):
+    router = get_w3().provider.router
+    first, second = router.endpoints
+    first.latency, second.latency = 0.5, 0.1
+    get_w3().eth.send_raw_transaction(b'\x01')
+    assert get_called_urls(make_request) == [PROVIDER_URLS[0]]
+
+
+@pytest.mark.usefixtures('provider_urls')
+def test_read_fails_over_and_ejects_provider(make_request, mocker):
+    def make_request_side_effect(provider, method, params):
+        if provider.endpoint_uri == PROVIDER_URLS[0]:
+            raise requests.ConnectionError()
+        return {'jsonrpc': '2.0', 'id': 0, 'result': '0x1'}
+
+    make_request.side_effect = make_request_side_effect
+    w3 = get_w3()
+    w3.eth.block_number
+    w3.eth.block_number
+    first, second = w3.provider.router.endpoints
+    assert not first.is_healthy(time.monotonic())
+    w3.eth.block_number
+    assert get_called_urls(make_request) == [
+        PROVIDER_URLS[0],
+        PROVIDER_URLS[1],
+        PROVIDER_URLS[0],
+        PROVIDER_URLS[1],
+        PROVIDER_URLS[1],
+    ]
+    assert w3.provider.router.get_broadcast_endpoint() is second
+
+    make_request.side_effect = None
+    mocker.patch('main.w3.time.monotonic', return_value=time.monotonic() + 31)
+    first.latency = 0.0
+    w3.eth.block_number
+    assert get_called_urls(make_request)[-1] == PROVIDER_URLS[0]
+    assert first.failures == 0
+    assert w3.provider.router.get_broadcast_endpoint() is first
+
+
+@pytest.mark.usefixtures('provider_urls')
+def test_slow_read_is_hedged(make_request, settings):
+    settings.W3_PROVIDER_HEDGE_AFTER = 0.05
+    released = threading.Event()
+
+    def make_request_side_effect(provider, method, params):
+        if provider.endpoint_uri == PROVIDER_URLS[0]:
+            released.wait(1)
+            return {'jsonrpc': '2.0', 'id': 0, 'result': '0x1'}
+        return {'jsonrpc': '2.0', 'id': 0, 'result': '0x2'}
+
+    make_request.side_effect = make_request_side_effect
+    assert get_w3().eth.block_number == 2
+    released.set()
+    assert sorted(get_called_urls(make_request)) == PROVIDER_URLS
+
+
+@pytest.mark.usefixtures('provider_urls')
+def test_read_fails_over_on_retryable_error(make_request):
+    rate_limited = {
+        'jsonrpc': '2.0',
+        'id': 0,
+        'error': {'code': -32005, 'message': 'limit exceeded'},
+    }
+
+    def make_request_side_effect(provider, method, params):
+        if provider.endpoint_uri == PROVIDER_URLS[0]:
+            return rate_limited
+        return {'jsonrpc': '2.0', 'id': 0, 'result': '0x2'}
+
+    make_request.side_effect = make_request_side_effect
+    w3 = get_w3()
+    assert w3.eth.block_number == 2
+    assert w3.eth.block_number == 2
+    first, second = w3.provider.router.endpoints
+    assert not first.is_healthy(time.monotonic())
+
+    make_request.side_effect = None
+    make_request.return_value = rate_limited
+    with pytest.raises(ValueError, match='limit exceeded'):
+        w3.eth.block_number
+
+
+@pytest.mark.usefixtures('provider_urls')
+def test_batch_fails_over_on_batch_error(mocker):
+    def post(session, url, data, **kwargs):
+        if url == PROVIDER_URLS[0]:
+            return Mock(content=(
+                b'{"jsonrpc": "2.0", "id": null,'
+                b' "error": {"code": -32005, "message": "limit exceeded"}}'
+            ))
+        return Mock(content=json.dumps([
+            {'jsonrpc': '2.0', 'id': request['id'], 'result': '0x1'}
+            for request in json.loads(data)
+        ]).encode())
+
+    mocker.patch('requests.Session.post', autospec=True, side_effect=post)
+    w3 = get_w3()
+    results = batch_request(w3, (('eth_gasPrice', []), ('eth_chainId', [])))
+    assert results == ['0x1', '0x1']
+    first, _ = w3.provider.router.endpoints
+    assert first.failures == 1
+
+
+@pytest.mark.usefixtures('provider_urls')
+def test_read_error_is_not_retried(make_request):
+    make_request.return_value = {
+        'jsonrpc': '2.0',
+        'id': 0,
+        'error': {'code': -32000, 'message': 'header not found'},
+    }
+    with pytest.raises(ValueError, match='header not found'):
+        get_w3().eth.block_number
+    assert make_request.call_count == 1
+    assert get_w3().provider.router.endpoints[0].failures == 0
+
+
+@pytest.mark.usefixtures('provider_urls')
+def test_hedging_skipped_when_saturated(make_request, settings):
+    settings.W3_PROVIDER_HEDGE_AFTER = 0.01
+    settings.W3_PROVIDER_POOL_SIZE = 1
+    released = threading.Event()
+
+    def make_request_side_effect(provider, method, params):
+        if provider.endpoint_uri == PROVIDER_URLS[0]:
+            released.wait(0.2)
+        return {'jsonrpc': '2.0', 'id': 0, 'result': '0x1'}
+
+    make_request.side_effect = make_request_side_effect
+    first, second = get_w3().provider.router.endpoints
+    first.latency, second.latency = 0.1, 0.5
+    assert get_w3().eth.block_number == 1
+    released.set()
+    assert get_called_urls(make_request) == [PROVIDER_URLS[0]]
+
+
+@pytest.mark.usefixtures('provider_urls')
+def test_async_read_fails_over_on_retryable_error(mocker):
+    async def make_request(provider, method, params):
+        if provider.endpoint_uri == PROVIDER_URLS[0]:
+            return {
+                'jsonrpc': '2.0',
+                'id': 0,
+                'error': {'code': -32603, 'message': 'internal error'},
+            }
+        return {'jsonrpc': '2.0', 'id': 0, 'result': '0x2'}
+
+    mocker.patch(
+        'main.w3.AsyncHTTPProvider.make_request',
+        autospec=True,
+        side_effect=make_request,
+    )
+    first, second = get_async_w3().provider.router.endpoints
+    assert async_to_sync(lambda: get_async_w3().eth.block_number)() == 2
+    assert first.failures == 1
+
+
+@pytest.mark.usefixtures('provider_urls')
+def test_async_read_fails_over(mocker):
+    async def make_request(provider, method, params):
+        if provider.endpoint_uri == PROVIDER_URLS[0]:
+            raise requests.ConnectionError()
+        return {'jsonrpc': '2.0', 'id': 0, 'result': '0x2'}
+
+    mocker.patch(
+        'main.w3.AsyncHTTPProvider.make_request',
+        autospec=True,
+        side_effect=make_request,
+    )
+    first, second = get_async_w3().provider.router.endpoints
+    assert async_to_sync(lambda: get_async_w3().eth.block_number)() == 2
+    assert first.failures == 1
+    assert second.latency is not None